@@ -0,0 +1,119 @@
+"""
+Shared helpers for the bench/ suite: habitat imports, timing, results.
+"""
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+REPO_ROOT = BENCH_DIR.parent
+HABITAT_DIR = REPO_ROOT / "habitat"
+DATA_DIR = BENCH_DIR / "data"
+RESULTS_DIR = BENCH_DIR / "results"
+
+if str(HABITAT_DIR) not in sys.path:
+    sys.path.insert(0, str(HABITAT_DIR))
+
+# Sizes accepted by --size everywhere in the suite
+SIZES = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
+
+
+def import_cipher_server():
+    """
+    Import cipher_server without a real OpenAI key; benches swap in a stub model.
+    Its habitat root is a scratch folder unless ECHO_NEXUS_ROOT says otherwise,
+    so background work started at import never touches a real habitat.
+    """
+    os.environ.setdefault("OPENAI_API_KEY", "bench-stub")
+    if not os.getenv("ECHO_NEXUS_ROOT"):
+        os.environ["ECHO_NEXUS_ROOT"] = tempfile.mkdtemp(prefix="echo_bench_root_")
+    import cipher_server
+    return cipher_server
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    k = min(len(values) - 1, int(round(pct / 100.0 * (len(values) - 1))))
+    return values[k]
+
+
+def summarize(samples_ms, wall_s=None) -> dict:
+    out = {
+        "n": len(samples_ms),
+        "mean_ms": round(sum(samples_ms) / len(samples_ms), 4) if samples_ms else 0.0,
+        "p50_ms": round(percentile(samples_ms, 50), 4),
+        "p95_ms": round(percentile(samples_ms, 95), 4),
+        "p99_ms": round(percentile(samples_ms, 99), 4),
+        "max_ms": round(max(samples_ms), 4) if samples_ms else 0.0,
+    }
+    if wall_s:
+        out["ops_per_s"] = round(len(samples_ms) / wall_s, 1)
+    return out
+
+
+def measure(fn, reps: int = 50, max_seconds: float = 10.0, warmup: int = 1) -> dict:
+    """
+    Call fn() up to `reps` times (stopping early after `max_seconds`) and
+    summarize per-call latency in milliseconds.
+    """
+    for _ in range(warmup):
+        fn()
+    samples = []
+    t_start = time.perf_counter()
+    for _ in range(reps):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000.0)
+        if time.perf_counter() - t_start > max_seconds:
+            break
+    return summarize(samples, time.perf_counter() - t_start)
+
+
+def git_commit():
+    try:
+        sha = subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, text=True,
+            stderr=subprocess.DEVNULL,
+        ).strip()
+        dirty = bool(subprocess.check_output(
+            ["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO_ROOT, text=True,
+            stderr=subprocess.DEVNULL,
+        ).strip())
+        return sha, dirty
+    except Exception:
+        return "unknown", False
+
+
+def meta() -> dict:
+    sha, dirty = git_commit()
+    return {
+        "ts_utc": datetime.now(tz=timezone.utc).isoformat(),
+        "commit": sha,
+        "dirty": dirty,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def write_results(name: str, results: dict, out=None) -> Path:
+    """
+    Write {"meta": ..., "results": ...} as JSON and return the path.
+    Default location: bench/results/<name>_<commit>_<utc stamp>.json
+    """
+    doc = {"meta": meta(), "results": results}
+    if out is None:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now(tz=timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        out = RESULTS_DIR / f"{name}_{doc['meta']['commit']}_{stamp}.json"
+    out = Path(out)
+    out.write_text(json.dumps(doc, indent=2), encoding="utf-8")
+    return out
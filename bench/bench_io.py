@@ -0,0 +1,123 @@
+"""
+Micro-benchmarks for the habitat memory-stream I/O paths.
+
+    read_memory_tail    cipher_server.read_memory_tail (n=20 and n=200)
+    build_chat_history  cipher_server.build_chat_history for Cipher
+    echo_mem_search     echo_mem_search.py main() (query + tag filter)
+    tail_mem            cipher_local.tail_mem(10)
+    append_jsonl        cipher_server.append_jsonl, one record per call
+
+The CLI scripts run against a throwaway habitat root (ECHO_NEXUS_ROOT)
+whose memory stream points at the dataset.
+
+    python bench/bench_io.py --size 10k
+    python bench/bench_io.py --size 1m --reps 10 --out results.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import runpy
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+from _common import HABITAT_DIR, SIZES, import_cipher_server, measure, write_results
+from gen_streams import dataset
+
+
+def sandbox_root(tmp: Path, stream: Path) -> Path:
+    """
+    Build <tmp>/habitat + <tmp>/memory/streams/root_memory.jsonl -> stream.
+    """
+    root = tmp / "root"
+    (root / "habitat").mkdir(parents=True)
+    streams = root / "memory" / "streams"
+    streams.mkdir(parents=True)
+    target = streams / "root_memory.jsonl"
+    try:
+        os.symlink(stream, target)
+    except (OSError, NotImplementedError):
+        shutil.copyfile(stream, target)
+    return root
+
+
+def run_script(script: Path, argv, root: Path):
+    """
+    Run a habitat CLI in-process against root; fail on a non-zero exit or
+    empty output so a broken setup can't pass as a fast benchmark.
+    """
+    old_argv, old_root = sys.argv, os.environ.get("ECHO_NEXUS_ROOT")
+    sys.argv = [str(script)] + list(argv)
+    os.environ["ECHO_NEXUS_ROOT"] = str(root)
+    out = io.StringIO()
+    code = 0
+    try:
+        with contextlib.redirect_stdout(out):
+            try:
+                runpy.run_path(str(script), run_name="__main__")
+            except SystemExit as e:
+                code = e.code
+    finally:
+        sys.argv = old_argv
+        if old_root is None:
+            os.environ.pop("ECHO_NEXUS_ROOT", None)
+        else:
+            os.environ["ECHO_NEXUS_ROOT"] = old_root
+    text = out.getvalue()
+    if code not in (0, None) or not text.strip():
+        raise RuntimeError(f"{script.name} {' '.join(argv)} exited {code!r}: {text.strip() or '(no output)'}")
+    return text
+
+
+def run(size: str, reps: int, max_seconds: float) -> dict:
+    cs = import_cipher_server()
+    import cipher_local
+
+    stream = dataset(size)
+    results = {"size": size, "lines": SIZES[size], "bytes": stream.stat().st_size}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        root = sandbox_root(tmp, stream)
+
+        results["read_memory_tail_20"] = measure(lambda: cs.read_memory_tail(stream, 20), reps, max_seconds)
+        results["read_memory_tail_200"] = measure(lambda: cs.read_memory_tail(stream, 200), reps, max_seconds)
+        results["build_chat_history"] = measure(
+            lambda: cs.build_chat_history(stream, "cipher", "Richard", max_turns=6), reps, max_seconds)
+
+        search = HABITAT_DIR / "echo_mem_search.py"
+        results["echo_mem_search"] = measure(lambda: run_script(search, ["nexus", "Echo"], root), reps, max_seconds)
+
+        cipher_local.MEM_STREAM = stream
+        results["tail_mem"] = measure(lambda: cipher_local.tail_mem(10), reps, max_seconds)
+
+        out = tmp / "append.jsonl"
+        record = {
+            "ts": "2025-11-07T13:00:44+00:00", "kind": "event", "channel": "chat",
+            "author": "Richard", "tags": ["chat", "cipher", "user"],
+            "summary": "Chat from Richard to Cipher", "details": {"text": "bench append"},
+        }
+        results["append_jsonl"] = measure(lambda: cs.append_jsonl(out, record), reps * 20, max_seconds)
+
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Habitat memory-stream I/O micro-benchmarks.")
+    ap.add_argument("--size", choices=sorted(SIZES), default="10k")
+    ap.add_argument("--reps", type=int, default=50)
+    ap.add_argument("--max-seconds", type=float, default=10.0, help="time cap per benchmark")
+    ap.add_argument("--out", help="results JSON path (default: bench/results/)")
+    args = ap.parse_args()
+
+    results = run(args.size, args.reps, args.max_seconds)
+    path = write_results(f"io_{args.size}", results, args.out)
+    print(json.dumps(results, indent=2))
+    print(f"results: {path}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
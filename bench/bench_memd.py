@@ -0,0 +1,116 @@
+"""
+Benchmark: echo_mem_* CLIs with and without the echo_memd.py daemon.
+
+Runs the CLIs as real subprocesses against a sandbox root holding the
+dataset as root_memory.jsonl, first reading the stream directly, then
+through a running daemon. Also times the daemon round trip alone
+(in-process memd_request) and a bare `python -c pass`, which is the floor
+for any CLI call.
+
+    python bench/bench_memd.py --size 10k
+    python bench/bench_memd.py --size 1m --reps 5
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from _common import HABITAT_DIR, SIZES, measure, write_results
+from gen_streams import dataset
+from nexus_memclient import memd_request
+
+CLIS = {
+    "tail": ["echo_mem_tail.py", "5"],
+    "search": ["echo_mem_search.py", "heartbeat", "Echo"],
+    "append": ["echo_mem_append.py", "bench", "note"],
+}
+
+
+def _sandbox(tmp: Path, stream: Path) -> Path:
+    root = tmp / "root"
+    (root / "habitat").mkdir(parents=True)
+    (root / "memory" / "streams").mkdir(parents=True)
+    shutil.copyfile(stream, root / "memory" / "streams" / "root_memory.jsonl")
+    for argv in CLIS.values():
+        shutil.copy(HABITAT_DIR / argv[0], root / "habitat" / argv[0])
+    return root
+
+
+def _env():
+    env = dict(os.environ, PYTHONPATH=str(HABITAT_DIR))
+    for key in ("ECHO_STORE", "ECHO_NEXUS_ROOT", "ECHO_NEXUS_CONFIG"):
+        env.pop(key, None)
+    return env
+
+
+def _cli(root: Path, argv, env):
+    subprocess.run([sys.executable, str(root / "habitat" / argv[0])] + argv[1:], env=env,
+                   stdout=subprocess.DEVNULL, check=True)
+
+
+def _wait_for(root: Path, seconds: float = 30.0):
+    deadline = time.time() + seconds
+    while time.time() < deadline:
+        if memd_request(root, {"op": "ping"}) is not None:
+            return
+        time.sleep(0.1)
+    raise RuntimeError("echo_memd did not start")
+
+
+def run(size: str, reps: int, max_seconds: float = 20.0) -> dict:
+    stream = dataset(size)
+    results = {"size": size, "lines": SIZES[size]}
+    env = _env()
+    results["python_startup"] = measure(
+        lambda: subprocess.run([sys.executable, "-c", "pass"], check=True), reps, max_seconds)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = _sandbox(Path(tmp), stream)
+        for name, argv in CLIS.items():
+            results[f"cli_direct_{name}"] = measure(lambda: _cli(root, argv, env), reps, max_seconds)
+
+        daemon = subprocess.Popen([sys.executable, str(HABITAT_DIR / "echo_memd.py"), "--root", str(root)],
+                                  env=env, stdout=subprocess.DEVNULL)
+        try:
+            _wait_for(root)
+            for name, argv in CLIS.items():
+                results[f"cli_memd_{name}"] = measure(lambda: _cli(root, argv, env), reps, max_seconds)
+            requests = {
+                "tail": {"op": "tail", "stream": "root_memory.jsonl", "n": 5},
+                "search": {"op": "search", "stream": "root_memory.jsonl", "text": "heartbeat", "tag": "Echo"},
+                "count": {"op": "count", "stream": "root_memory.jsonl"},
+            }
+            for name, req in requests.items():
+                results[f"request_{name}"] = measure(lambda: memd_request(root, req), reps * 10, max_seconds)
+        finally:
+            memd_request(root, {"op": "shutdown"})
+            daemon.wait(timeout=10)
+
+    results["speedup_p50"] = {
+        name: round(results[f"cli_direct_{name}"]["p50_ms"] / results[f"cli_memd_{name}"]["p50_ms"], 2)
+        for name in CLIS
+    }
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser(description="echo_mem_* CLI latency with and without echo_memd.py.")
+    ap.add_argument("--size", choices=sorted(SIZES), default="10k")
+    ap.add_argument("--reps", type=int, default=10)
+    ap.add_argument("--max-seconds", type=float, default=20.0, help="time cap per benchmark")
+    ap.add_argument("--out", help="results JSON path (default: bench/results/)")
+    args = ap.parse_args()
+
+    results = run(args.size, args.reps, args.max_seconds)
+    path = write_results(f"memd_{args.size}", results, args.out)
+    print(json.dumps(results, indent=2))
+    print(f"results: {path}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark: per-request prompt assembly cost.
+
+Compares the old per-call assembly (compile the system prompt from base +
+seed, then build a fresh messages list) with nexus_prompts.PromptEngine
+(shared precompiled prefix + no-copy history view), for a few history
+lengths. Also checks that both produce the same messages.
+
+    python bench/bench_prompts.py
+    python bench/bench_prompts.py --n 200000
+"""
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from _common import HABITAT_DIR, percentile, write_results
+from nexus_prompts import PromptEngine
+from nexus_seeds import SeedRegistry, compile_prompt
+
+BASE = "You are Cipher, a calm, stable AI coworker running in Richard's Echo Nexus habitat. " * 4
+HISTORY_TURNS = (0, 6, 12)
+SEED_FILES = ("vexis_import_seed.json", "vexis_import_seed.json.txt")
+
+
+def _seed_path(tmp: Path) -> Path:
+    for name in SEED_FILES:
+        p = HABITAT_DIR / name
+        if p.exists():
+            return p
+    p = tmp / "bench_seed.json"
+    p.write_text(json.dumps({"role": "bench", "core_concepts": [f"concept {i}" for i in range(12)]}))
+    return p
+
+
+def _history(turns: int):
+    out = []
+    for i in range(turns):
+        out.append({"role": "user", "content": f"question {i} about the heartbeat log"})
+        out.append({"role": "assistant", "content": f"answer {i}: " + "detail " * 30})
+    return out
+
+
+def rebuild(seed, history, message):
+    messages = [{"role": "system", "content": compile_prompt(BASE, seed)}]
+    messages.extend(history)
+    messages.append({"role": "user", "content": message})
+    return messages
+
+
+def _time(fn, n: int, batch: int = 100):
+    """
+    Per-call microseconds, sampled in batches so timer overhead stays small.
+    """
+    samples = []
+    for _ in range(max(1, n // batch)):
+        t0 = time.perf_counter()
+        for _ in range(batch):
+            fn()
+        samples.append((time.perf_counter() - t0) * 1e6 / batch)
+    return {
+        "p50_us": round(percentile(samples, 50), 3),
+        "p99_us": round(percentile(samples, 99), 3),
+    }
+
+
+def run(n: int):
+    seeds = SeedRegistry({"cipher": BASE})
+    with tempfile.TemporaryDirectory() as tmp:
+        seed = seeds.register("cipher", _seed_path(Path(tmp)), share=False).seed
+    engine = PromptEngine(seeds)
+    message = "Summarize the last three Vexis handshakes for me."
+
+    results = {"prefix_hash": engine.prefix("cipher").hash, "by_turns": {}}
+    for turns in HISTORY_TURNS:
+        history = _history(turns)
+        assert list(engine.assemble("cipher", history, message)) == rebuild(seed, history, message)
+        old = _time(lambda: rebuild(seed, history, message), n)
+        new = _time(lambda: engine.assemble("cipher", history, message), n)
+        results["by_turns"][turns] = {
+            "rebuild": old,
+            "engine": new,
+            "speedup_p50": round(old["p50_us"] / new["p50_us"], 1) if new["p50_us"] else None,
+        }
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--n", type=int, default=50000)
+    ap.add_argument("--out", help="results JSON path (default: bench/results/)")
+    args = ap.parse_args()
+
+    results = {"bench": "prompts", **run(args.n)}
+    path = write_results("prompts", results, args.out)
+    print(json.dumps(results, indent=2))
+    print(f"results: {path}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Benchmark: leader -> follower stream replication with two local nodes.
+
+Starts two echo_replica.py node processes on different ports, a leader
+whose root holds the dataset as root_memory.jsonl and a follower tailing
+it, then measures:
+
+    catch_up        initial copy of the whole stream (MB/s, gzip ratio)
+    lag             append one record on the leader, time until the
+                    follower's copy has it (poll interval included)
+    resync          leader stream rewritten (as compaction does): time
+                    until the follower detects it and swaps in a fresh copy
+
+and checks that the two files end up byte-identical.
+
+    python bench/bench_replica.py --size 10k
+    python bench/bench_replica.py --size 1m --appends 50
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+from _common import HABITAT_DIR, SIZES, summarize, write_results
+from gen_streams import dataset
+from nexus_streams import append_record, get_writer
+
+STREAM = "root_memory.jsonl"
+POLL_S = 0.05
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _node(root: Path, port: int, *extra):
+    env = dict(os.environ, PYTHONPATH=str(HABITAT_DIR))
+    env.pop("ECHO_REPLICA_TOKEN", None)
+    return subprocess.Popen([sys.executable, str(HABITAT_DIR / "echo_replica.py"), "serve", "--root", str(root),
+                             "--port", str(port), *extra], env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def _get_json(url: str):
+    with urllib.request.urlopen(url, timeout=10) as resp:
+        return json.load(resp)
+
+
+def _wait_up(url: str, seconds: float = 30.0):
+    deadline = time.time() + seconds
+    while time.time() < deadline:
+        try:
+            return _get_json(url)
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"{url} did not come up")
+
+
+def _copy_status(url: str) -> dict:
+    return _get_json(url + "/replica/status")["following"]["streams"][STREAM]
+
+
+def _wait_for(url: str, pred, seconds: float = 600.0) -> dict:
+    deadline = time.time() + seconds
+    while time.time() < deadline:
+        st = _copy_status(url)
+        if pred(st):
+            return st
+        time.sleep(POLL_S)
+    raise RuntimeError("follower did not catch up")
+
+
+def _metric(url: str, name: str, **labels) -> float:
+    with urllib.request.urlopen(url + "/metrics", timeout=10) as resp:
+        text = resp.read().decode()
+    want = [f'{k}="{v}"' for k, v in labels.items()]
+    return sum(float(line.rsplit(" ", 1)[1]) for line in text.splitlines()
+               if line.startswith(name + "{") and all(w in line for w in want))
+
+
+def _digest(path: Path) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def run(size: str, appends: int, interval: float = 0.1) -> dict:
+    src = dataset(size)
+    results = {"size": size, "lines": SIZES[size], "bytes": src.stat().st_size, "poll_interval_s": interval}
+    with tempfile.TemporaryDirectory() as tmp:
+        leader_root, follower_root = Path(tmp) / "leader", Path(tmp) / "follower"
+        leader_stream = leader_root / "memory" / "streams" / STREAM
+        leader_stream.parent.mkdir(parents=True)
+        (follower_root / "memory" / "streams").mkdir(parents=True)
+        shutil.copyfile(src, leader_stream)
+
+        lport, fport = _free_port(), _free_port()
+        leader_url, follower_url = f"http://127.0.0.1:{lport}", f"http://127.0.0.1:{fport}"
+        leader = _node(leader_root, lport)
+        follower = None
+        try:
+            _wait_up(leader_url + "/replica/streams")
+            t0 = time.perf_counter()
+            follower = _node(follower_root, fport, "--follow", leader_url, "--streams", STREAM,
+                             "--node", "leader", "--interval", str(interval))
+            _wait_up(follower_url + "/replica/status")
+            size_now = leader_stream.stat().st_size
+            _wait_for(follower_url, lambda st: st["offset"] >= size_now)
+            elapsed = time.perf_counter() - t0
+            raw = _metric(follower_url, "echo_replica_bytes_total", form="raw")
+            wire = _metric(follower_url, "echo_replica_bytes_total", form="wire")
+            results["catch_up"] = {
+                "seconds": round(elapsed, 3),
+                "mb_per_s": round(size_now / elapsed / 1e6, 2),
+                "wire_ratio": round(wire / raw, 3) if raw else None,
+            }
+
+            samples = []
+            for i in range(appends):
+                append_record(leader_stream, {"ts": "2025-11-07T13:00:44+00:00", "kind": "event",
+                                              "summary": f"replica bench {i}"})
+                target = leader_stream.stat().st_size
+                t0 = time.perf_counter()
+                _wait_for(follower_url, lambda st: st["offset"] >= target)
+                samples.append((time.perf_counter() - t0) * 1000.0)
+            results["lag"] = summarize(samples)
+            results["lag_seconds_metric"] = _metric(follower_url, "echo_replica_lag_seconds")
+
+            # Rewrite the leader's stream without its first line, as compaction would
+            before = _copy_status(follower_url)["resyncs"]
+            with get_writer(leader_stream).locked():
+                data = leader_stream.read_bytes()
+                tmp_path = leader_stream.with_name(STREAM + ".bench")
+                tmp_path.write_bytes(data[data.index(b"\n") + 1:])
+                os.replace(tmp_path, leader_stream)
+            t0 = time.perf_counter()
+            _wait_for(follower_url, lambda st: st["resyncs"] > before and st["lag_bytes"] == 0)
+            results["resync"] = {"seconds": round(time.perf_counter() - t0, 3)}
+
+            copy = follower_root / "memory" / "replicas" / "leader" / STREAM
+            results["identical"] = _digest(copy) == _digest(leader_stream)
+        finally:
+            for proc in (follower, leader):
+                if proc is not None:
+                    proc.terminate()
+                    proc.wait(timeout=10)
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Two-node replication benchmark (catch-up, lag, resync).")
+    ap.add_argument("--size", choices=sorted(SIZES), default="10k")
+    ap.add_argument("--appends", type=int, default=20, help="single-record appends timed for lag")
+    ap.add_argument("--interval", type=float, default=0.1, help="follower poll interval (s)")
+    ap.add_argument("--out", help="results JSON path (default: bench/results/)")
+    args = ap.parse_args()
+
+    results = run(args.size, args.appends, args.interval)
+    path = write_results(f"replica_{args.size}", results, args.out)
+    print(json.dumps(results, indent=2))
+    print(f"results: {path}", file=sys.stderr)
+    if not results["identical"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
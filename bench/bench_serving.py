@@ -0,0 +1,156 @@
+"""
+End-to-end load test of cipher_server against a stub model.
+
+Starts cipher_server's Flask app on a local port (threaded werkzeug server)
+with its streams pointed at a copy of a synthetic dataset, swaps the OpenAI
+client for StubClient, and drives each route with concurrent HTTP clients:
+
+    POST /cipher/chat
+    GET  /cipher/memory/tail?n=20
+    POST /echo/handshake
+
+    python bench/bench_serving.py --size 10k --requests 500 --concurrency 8
+    python bench/bench_serving.py --model-delay-ms 250
+"""
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from pathlib import Path
+from types import SimpleNamespace
+
+from _common import SIZES, import_cipher_server, summarize, write_results
+from gen_streams import dataset
+
+
+class StubClient:
+    """
+    Stands in for openai.OpenAI(): chat.completions.create() sleeps for
+    `delay_ms` and returns a canned reply sized like a real one.
+    """
+
+    def __init__(self, delay_ms: float = 0.0):
+        self.delay_ms = delay_ms
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages, **kwargs):
+        if self.delay_ms:
+            time.sleep(self.delay_ms / 1000.0)
+        content = "stub reply " + "lorem " * 40 + f"({len(messages)} msgs)"
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def start_server(app):
+    from werkzeug.serving import make_server
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def _call(url, body=None):
+    data = None if body is None else json.dumps(body).encode("utf-8")
+    req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req, timeout=30) as resp:
+        resp.read()
+        return resp.status
+
+
+def load(url, body, total: int, concurrency: int) -> dict:
+    samples = []
+    errors = [0]
+    lock = threading.Lock()
+    per_worker = max(1, total // concurrency)
+
+    def worker():
+        local = []
+        for _ in range(per_worker):
+            t0 = time.perf_counter()
+            try:
+                _call(url, body)
+            except Exception:
+                with lock:
+                    errors[0] += 1
+                continue
+            local.append((time.perf_counter() - t0) * 1000.0)
+        with lock:
+            samples.extend(local)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    out = summarize(samples, time.perf_counter() - t0)
+    out["errors"] = errors[0]
+    out["concurrency"] = concurrency
+    return out
+
+
+def run(size: str, total: int, concurrency: int, delay_ms: float) -> dict:
+    cs = import_cipher_server()
+    results = {"size": size, "lines": SIZES[size], "model_delay_ms": delay_ms}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        root_stream = tmp / "root_memory.jsonl"
+        vexis_stream = tmp / "vexis_memory.jsonl"
+        shutil.copyfile(dataset(size, "chat"), root_stream)
+        shutil.copyfile(dataset(size, "chat", seed=4321), vexis_stream)
+
+        cs.MEMORY_STREAM = root_stream
+        cs.VEXIS_MEMORY_STREAM = vexis_stream
+        cs.CIPHER_GATE.stream = root_stream
+        cs.VEXIS_GATE.stream = vexis_stream
+        cs.PERSONAS["cipher"]["stream"] = root_stream
+        cs.PERSONAS["vexis"]["stream"] = vexis_stream
+        cs.HANDSHAKE_DENIALS.stream = vexis_stream
+        cs.USE_OPENAI = True
+        cs.client = StubClient(delay_ms)
+        # Measure serving, not admission control
+        cs.RATE_LIMITER.enabled = False
+
+        server, base = start_server(cs.app)
+        try:
+            results["cipher_chat"] = load(
+                f"{base}/cipher/chat",
+                {"user": "Richard", "message": "Check the heartbeat log for gaps since last night."},
+                total, concurrency)
+            results["cipher_memory_tail"] = load(
+                f"{base}/cipher/memory/tail?n=20", None, total, concurrency)
+            results["echo_handshake"] = load(
+                f"{base}/echo/handshake",
+                {
+                    "from": "Grok@xAI", "to": "Vexis@EchoNexus",
+                    "purpose_token": {"scope": "observe_and_respond", "consent": "Richard Rice"},
+                    "message": "Nexus online. Requesting co-resonance check...",
+                },
+                total, concurrency)
+        finally:
+            server.shutdown()
+
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser(description="cipher_server end-to-end load test (stub model).")
+    ap.add_argument("--size", choices=sorted(SIZES), default="10k")
+    ap.add_argument("--requests", type=int, default=400, help="requests per route")
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--model-delay-ms", type=float, default=0.0)
+    ap.add_argument("--out", help="results JSON path (default: bench/results/)")
+    args = ap.parse_args()
+
+    results = run(args.size, args.requests, args.concurrency, args.model_delay_ms)
+    path = write_results(f"serving_{args.size}", results, args.out)
+    print(json.dumps(results, indent=2))
+    print(f"results: {path}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
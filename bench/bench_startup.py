@@ -0,0 +1,132 @@
+"""
+Benchmark: import time of the habitat apps (`python -X importtime`).
+
+Imports each app in a fresh interpreter, as a worker does at startup, with
+no OPENAI_API_KEY and the default JSONL store, with a scratch directory
+as working directory and habitat root (ECHO_NEXUS_ROOT). Reports the
+app's cumulative import time, the slowest direct imports, and checks the
+regression budget:
+
+    BUDGET_MS      median cumulative import time per app
+    FORBIDDEN      modules each app must keep lazy (first use only)
+
+    python bench/bench_startup.py
+    python bench/bench_startup.py --reps 9 --check          # exit 1 over budget
+    python bench/bench_startup.py --check --budget-scale 2  # slower machine
+
+Budgets leave room over Flask itself (~190 ms of each app on the reference
+box); importing openai + building its client used to add ~800 ms.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from _common import HABITAT_DIR, write_results
+
+APPS = ("cipher_server", "echo_ai_shell")
+BUDGET_MS = {"cipher_server": 350.0, "echo_ai_shell": 300.0}
+_LAZY = ("openai", "httpx", "sqlite3", "concurrent.futures", "argparse")
+# echo_ai_shell runs helper scripts from its routes; subprocess is cheap
+FORBIDDEN = {"cipher_server": _LAZY + ("subprocess",), "echo_ai_shell": _LAZY}
+TOP_N = 8
+
+
+def _env():
+    env = dict(os.environ, PYTHONPATH=str(HABITAT_DIR), ECHO_COMPACTION="0", ECHO_STORE="jsonl")
+    for key in ("OPENAI_API_KEY", "ECHO_NEXUS_WORKER_ID", "ECHO_NEXUS_SHARED", "ECHO_NEXUS_CONFIG"):
+        env.pop(key, None)
+    return env
+
+
+def parse_importtime(text: str):
+    """
+    `-X importtime` stderr -> [(module, self_us, cumulative_us, depth)].
+    """
+    rows = []
+    for line in text.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cum_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        rows.append((name.strip(), int(self_us), int(cum_us), depth))
+    return rows
+
+
+def import_once(app: str, cwd: str) -> list:
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {app}"],
+                          cwd=cwd, env=dict(_env(), ECHO_NEXUS_ROOT=cwd), capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {app} failed:\n{proc.stderr[-2000:]}")
+    return parse_importtime(proc.stderr)
+
+
+def run_app(app: str, reps: int, cwd: str) -> dict:
+    import_once(app, cwd)  # warm: compile .pyc files, fill the OS page cache
+    totals, direct, loaded = [], {}, set()
+    for _ in range(reps):
+        rows = import_once(app, cwd)
+        loaded.update(name for name, _, _, _ in rows)
+        end = next(i for i, (name, _, _, depth) in enumerate(rows) if name == app and depth == 0)
+        totals.append(rows[end][2] / 1000.0)
+        # Direct imports of the app: depth-1 rows printed just before it
+        for name, _, cum, depth in reversed(rows[:end]):
+            if depth == 0:
+                break
+            if depth == 1:
+                direct.setdefault(name, []).append(cum / 1000.0)
+    slowest = sorted(((statistics.median(v), k) for k, v in direct.items()), reverse=True)[:TOP_N]
+    return {
+        "import_ms": {
+            "p50": round(statistics.median(totals), 1),
+            "min": round(min(totals), 1),
+            "max": round(max(totals), 1),
+        },
+        "slowest_imports_ms": {name: round(ms, 1) for ms, name in slowest},
+        "forbidden_loaded": sorted(m for m in FORBIDDEN[app] if m in loaded),
+    }
+
+
+def check(results: dict, scale: float) -> list:
+    problems = []
+    for app in APPS:
+        r = results[app]
+        budget = BUDGET_MS[app] * scale
+        if r["import_ms"]["p50"] > budget:
+            problems.append(f"{app}: import p50 {r['import_ms']['p50']} ms > budget {budget:.0f} ms")
+        if r["forbidden_loaded"]:
+            problems.append(f"{app}: imports {', '.join(r['forbidden_loaded'])} at startup")
+    return problems
+
+
+def run(reps: int, scale: float = 1.0) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {app: run_app(app, reps, tmp) for app in APPS}
+    results["budget_ms"] = {app: BUDGET_MS[app] * scale for app in APPS}
+    results["problems"] = check(results, scale)
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Import-time benchmark and budget for the habitat apps.")
+    ap.add_argument("--reps", type=int, default=5)
+    ap.add_argument("--budget-scale", type=float, default=1.0, help="multiply every time budget")
+    ap.add_argument("--check", action="store_true", help="exit 1 if a budget is exceeded")
+    ap.add_argument("--out", help="results JSON path (default: bench/results/)")
+    args = ap.parse_args()
+
+    results = run(args.reps, args.budget_scale)
+    path = write_results("startup", results, args.out)
+    print(json.dumps(results, indent=2))
+    print(f"results: {path}", file=sys.stderr)
+    for problem in results["problems"]:
+        print(f"OVER BUDGET: {problem}", file=sys.stderr)
+    if args.check and results["problems"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
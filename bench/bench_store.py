@@ -0,0 +1,110 @@
+"""
+Benchmark: JSONL vs SQLite (WAL) memory store at scale.
+
+Loads the same synthetic stream into both backends of nexus_store, then
+times the operations the habitat performs:
+
+    load            JSONL copy vs SQLite import_jsonl (records/s)
+    append          one record per call (the chat/handshake path)
+    append_many     100 records per call (batch/eval logging)
+    tail_20/200     read_memory_tail / echo_mem_tail
+    search_tag      echo_mem_search with a tag (indexed in SQLite)
+    search_text     echo_mem_search with a word (FTS5 in SQLite)
+    search_channel  channel + author filter (indexed in SQLite)
+    search_window   last-hour time range (ts index in SQLite)
+    page_100        console log: newest page, then a page 10 pages back
+
+    python bench/bench_store.py --size 10k
+    python bench/bench_store.py --size 1m --reps 10
+"""
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from _common import SIZES, measure, write_results
+from gen_streams import dataset
+from nexus_store import JsonlStore, SqliteStore, record_ts
+
+RECORD = {
+    "ts": "2025-11-07T13:00:44+00:00", "kind": "event", "channel": "chat",
+    "author": "Richard", "tags": ["chat", "cipher", "user"],
+    "summary": "Chat from Richard to Cipher", "details": {"text": "bench append"},
+}
+
+
+def _last_ts(store, stream):
+    tail = store.tail(stream, 1, skip_malformed=True)
+    return record_ts(tail[0]) if tail else 0.0
+
+
+def run_store(store, stream: Path, reps: int, max_seconds: float) -> dict:
+    out = {}
+    out["tail_20"] = measure(lambda: store.tail(stream, 20, skip_malformed=True), reps, max_seconds)
+    out["tail_200"] = measure(lambda: store.tail(stream, 200, skip_malformed=True), reps, max_seconds)
+    out["search_tag"] = measure(lambda: store.search(stream, tag="Ledger"), reps, max_seconds)
+    out["search_text"] = measure(lambda: store.search(stream, text="heartbeat", limit=50), reps, max_seconds)
+    out["search_channel"] = measure(
+        lambda: store.search(stream, channel="handshake", author="probe@lan", limit=50), reps, max_seconds)
+    last = _last_ts(store, stream)
+    out["search_window"] = measure(lambda: store.search(stream, since=last - 3600), reps, max_seconds)
+    out["page_100"] = measure(lambda: store.page_raw(stream, 100), reps, max_seconds)
+    cursor = store.page_raw(stream, 100)[2]
+    for _ in range(9):
+        cursor = store.page_raw(stream, 100, before=cursor)[2] or cursor
+    out["page_100_older"] = measure(lambda: store.page_raw(stream, 100, before=cursor), reps, max_seconds)
+    out["append"] = measure(lambda: store.append(stream, RECORD), reps * 20, max_seconds)
+    batch = [RECORD] * 100
+    out["append_many_100"] = measure(lambda: store.append_many(stream, batch), reps, max_seconds)
+    return out
+
+
+def run(size: str, reps: int, max_seconds: float = 10.0) -> dict:
+    src = dataset(size)
+    results = {"size": size, "lines": SIZES[size], "bytes": src.stat().st_size}
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        stream = tmp / "root_memory.jsonl"
+
+        t0 = time.perf_counter()
+        shutil.copyfile(src, stream)
+        jsonl_load = time.perf_counter() - t0
+
+        sqlite = SqliteStore(tmp / "memory.db")
+        t0 = time.perf_counter()
+        n = sqlite.import_jsonl(stream, stream)
+        sqlite_load = time.perf_counter() - t0
+        results["load"] = {
+            "jsonl_s": round(jsonl_load, 3),
+            "sqlite_s": round(sqlite_load, 3),
+            "sqlite_records_per_s": round(n / sqlite_load, 1) if sqlite_load else None,
+            "sqlite_db_bytes": sum(p.stat().st_size for p in tmp.glob("memory.db*")),
+        }
+        results["jsonl"] = run_store(JsonlStore(), stream, reps, max_seconds)
+        results["sqlite"] = run_store(sqlite, stream, reps, max_seconds)
+    results["speedup_p50"] = {
+        k: round(results["jsonl"][k]["p50_ms"] / results["sqlite"][k]["p50_ms"], 2)
+        for k in results["jsonl"] if results["sqlite"][k]["p50_ms"]
+    }
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser(description="JSONL vs SQLite memory store benchmark.")
+    ap.add_argument("--size", choices=sorted(SIZES), default="10k")
+    ap.add_argument("--reps", type=int, default=30)
+    ap.add_argument("--max-seconds", type=float, default=10.0, help="time cap per benchmark")
+    ap.add_argument("--out", help="results JSON path (default: bench/results/)")
+    args = ap.parse_args()
+
+    results = run(args.size, args.reps, args.max_seconds)
+    path = write_results(f"store_{args.size}", results, args.out)
+    print(json.dumps(results, indent=2))
+    print(f"results: {path}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Benchmark: synchronous appends vs the write-ahead queue (nexus_wal.py).
+
+On a copy of the dataset stream, for the JSONL and SQLite stores:
+
+    append          store.append, one chat record per call (the default path)
+    put             WriteQueue.put of the same record (what a chat turn waits for)
+    drain           records/s the flusher writes after a burst of puts
+    tail_200        store.tail vs WriteQueue.read with records still queued
+                    (build_chat_history's read-your-writes)
+    replay          start() on a spill file left holding a burst (crash recovery)
+
+    python bench/bench_wal.py --size 10k
+    python bench/bench_wal.py --size 1m --reps 20
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from _common import SIZES, measure, write_results
+from gen_streams import dataset
+from nexus_store import JsonlStore, SqliteStore
+from nexus_wal import WriteQueue
+
+RECORD = {
+    "ts": "2025-11-07T13:00:44+00:00", "kind": "memory", "channel": "chat",
+    "author": "Cipher", "tags": ["chat", "cipher", "reply"],
+    "summary": "Cipher reply to Richard", "details": {"text": "bench reply", "latency_ms": 412.0},
+}
+BURST = 2000
+
+
+def _open_store(kind: str, tmp: Path):
+    return SqliteStore(tmp / "memory.db") if kind == "sqlite" else JsonlStore()
+
+
+def _crash_with_queued(kind: str, tmp: Path, stream: Path, spill: Path):
+    # Child process: the store refuses every flush, so all BURST records
+    # stay in the spill file when the process dies without cleanup
+    store = _open_store(kind, tmp)
+    store.append_many = _refuse
+    queue = WriteQueue(store, spill).start()
+    queue.put_many(stream, [RECORD] * BURST)
+    os._exit(1)
+
+
+def run_store(kind: str, tmp: Path, stream: Path, reps: int, max_seconds: float) -> dict:
+    store = _open_store(kind, tmp)
+    spill = tmp / f"{kind}.spill"
+    out = {"append": measure(lambda: store.append(stream, RECORD), reps * 20, max_seconds)}
+
+    queue = WriteQueue(store, spill).start()
+    out["put"] = measure(lambda: queue.put(stream, RECORD), reps * 20, max_seconds)
+    queue.flush()
+
+    t0 = time.perf_counter()
+    for _ in range(BURST):
+        queue.put(stream, RECORD)
+    queue.flush()
+    elapsed = time.perf_counter() - t0
+    out["drain"] = {"records": BURST, "seconds": round(elapsed, 3), "records_per_s": round(BURST / elapsed, 1)}
+
+    out["tail_200"] = measure(lambda: store.tail(stream, 200, skip_malformed=True), reps, max_seconds)
+    # Keep records queued while reading: the flusher sees a failing store
+    real = store.append_many
+    store.append_many = _refuse
+    queue.put_many(stream, [RECORD] * 10)
+    out["read_200_queued"] = measure(
+        lambda: queue.read(stream, lambda: store.tail(stream, 200, skip_malformed=True)), reps, max_seconds)
+    store.append_many = real
+    queue.flush()
+    queue.close()
+
+    # Crash recovery: a killed process left BURST records in the spill file
+    subprocess.run([sys.executable, __file__, "--crash", kind, str(tmp), str(stream), str(spill)], check=False)
+    t0 = time.perf_counter()
+    recovered = WriteQueue(store, spill).start()
+    out["replay"] = {"records": recovered.replayed, "seconds": round(time.perf_counter() - t0, 3)}
+    recovered.close()
+    return out
+
+
+def _refuse(stream, records):
+    raise OSError("bench: store offline")
+
+
+def run(size: str, reps: int, max_seconds: float = 10.0) -> dict:
+    src = dataset(size)
+    results = {"size": size, "lines": SIZES[size], "burst": BURST}
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        stream = tmp / "root_memory.jsonl"
+        shutil.copyfile(src, stream)
+        SqliteStore(tmp / "memory.db").import_jsonl(stream, stream)
+        results["jsonl"] = run_store("jsonl", tmp, stream, reps, max_seconds)
+        results["sqlite"] = run_store("sqlite", tmp, stream, reps, max_seconds)
+    results["put_vs_append_p50"] = {
+        kind: round(results[kind]["append"]["p50_ms"] / results[kind]["put"]["p50_ms"], 2)
+        for kind in ("jsonl", "sqlite") if results[kind]["put"]["p50_ms"]
+    }
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Synchronous appends vs the write-ahead queue.")
+    ap.add_argument("--size", choices=sorted(SIZES), default="10k")
+    ap.add_argument("--reps", type=int, default=30)
+    ap.add_argument("--max-seconds", type=float, default=10.0, help="time cap per benchmark")
+    ap.add_argument("--out", help="results JSON path (default: bench/results/)")
+    ap.add_argument("--crash", nargs=4, metavar=("KIND", "TMP", "STREAM", "SPILL"), help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.crash:
+        kind, tmp, stream, spill = args.crash
+        _crash_with_queued(kind, Path(tmp), Path(stream), Path(spill))
+
+    results = run(args.size, args.reps, args.max_seconds)
+    path = write_results(f"wal_{args.size}", results, args.out)
+    print(json.dumps(results, indent=2))
+    print(f"results: {path}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Compare two bench results files and flag regressions.
+
+Walks both JSON trees, pairs up every latency figure (*_ms) and throughput
+figure (ops_per_s, calls_per_s), and prints the relative change.
+
+    python bench/compare.py old.json new.json               # 10% threshold
+    python bench/compare.py old.json new.json --threshold 5 --metric p99_ms
+
+Exit code 1 if any paired latency grew (or throughput fell) by more than
+the threshold.
+"""
+import argparse
+import json
+import sys
+
+HIGHER_IS_BETTER = ("ops_per_s", "calls_per_s")
+
+
+def flatten(node, prefix=""):
+    if isinstance(node, dict):
+        for k, v in node.items():
+            yield from flatten(v, f"{prefix}.{k}" if prefix else k)
+    elif isinstance(node, (int, float)) and not isinstance(node, bool):
+        yield prefix, float(node)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Compare two bench result files.")
+    ap.add_argument("old")
+    ap.add_argument("new")
+    ap.add_argument("--threshold", type=float, default=10.0, help="allowed change in percent")
+    ap.add_argument("--metric", action="append",
+                    help="only compare keys ending in this name (e.g. p99_ms); repeatable")
+    args = ap.parse_args()
+
+    with open(args.old, encoding="utf-8") as f:
+        old_doc = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new_doc = json.load(f)
+    old = dict(flatten(old_doc.get("results", old_doc)))
+    new = dict(flatten(new_doc.get("results", new_doc)))
+
+    print(f"old: {old_doc.get('meta', {}).get('commit', '?')}  new: {new_doc.get('meta', {}).get('commit', '?')}")
+    regressions = 0
+    for key in sorted(old.keys() & new.keys()):
+        name = key.rsplit(".", 1)[-1]
+        if args.metric and name not in args.metric:
+            continue
+        if not (name.endswith("_ms") or name in HIGHER_IS_BETTER):
+            continue
+        a, b = old[key], new[key]
+        if a == 0:
+            continue
+        change = (b - a) / a * 100.0
+        worse = -change if name in HIGHER_IS_BETTER else change
+        flag = ""
+        if worse > args.threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"{key:55s} {a:12.4f} -> {b:12.4f}  {change:+7.1f}%{flag}")
+
+    print(f"{regressions} regression(s) over {args.threshold:g}%")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Synthetic memory-stream generator for the bench suite.
+
+Produces JSONL in both schemas the habitat writes:
+
+  chat  -- cipher_server records: ts/kind/channel/author/tags/summary/details
+           (chat turns for Cipher and Vexis, handshakes, gate decisions, logs)
+  note  -- CLI/shell records: ts_utc/host/user/source/note[/tag]
+
+Output is deterministic for a given (schema, size, seed), so results from
+different commits are comparable.
+
+    python bench/gen_streams.py --size 10k              # bench/data/mixed_10k_s1234.jsonl
+    python bench/gen_streams.py --size 1m --schema chat
+    python bench/gen_streams.py --lines 2500 --out /tmp/x.jsonl
+"""
+import argparse
+import json
+import random
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from _common import DATA_DIR, SIZES
+
+SCHEMAS = ("chat", "note", "mixed")
+
+_WORDS = (
+    "nexus echo cipher vexis ledger drift heartbeat stream root habitat "
+    "btds gate resonance consent snapshot kernel probe memory anchor "
+    "risk signal checkpoint seed import local model window tail"
+).split()
+_TAGS = ("Echo", "Nexus", "Exec", "Boot", "CipherImport", "Error", "Ledger")
+_SENDERS = ("Grok@xAI", "Claude@Anthropic", "Unknown", "probe@lan")
+
+
+def _text(rng, lo=4, hi=24):
+    return " ".join(rng.choice(_WORDS) for _ in range(rng.randint(lo, hi)))
+
+
+def chat_record(rng, ts):
+    r = rng.random()
+    stamp = ts.isoformat()
+    if r < 0.70:
+        persona = "cipher" if rng.random() < 0.6 else "vexis"
+        if rng.random() < 0.5:
+            return {
+                "ts": stamp, "kind": "event", "channel": "chat", "author": "Richard",
+                "tags": ["chat", persona, "user"],
+                "summary": f"Chat from Richard to {persona.capitalize()}",
+                "details": {"text": _text(rng)},
+            }
+        return {
+            "ts": stamp, "kind": "memory", "channel": "chat", "author": persona.capitalize(),
+            "tags": ["chat", persona, "reply"],
+            "summary": f"{persona.capitalize()} reply to Richard",
+            "details": {"text": _text(rng, 10, 60), "latency_ms": round(rng.uniform(300, 4000), 1)},
+        }
+    if r < 0.85:
+        sender = rng.choice(_SENDERS)
+        denied = rng.random() < 0.3
+        return {
+            "ts": stamp, "kind": "event", "channel": "handshake", "author": sender,
+            "tags": ["handshake", "denied", "consent"] if denied else ["handshake", "grok", "vexis", "in"],
+            "summary": "Handshake denied: consent mismatch" if denied else f"Handshake from {sender} to Vexis@EchoNexus",
+            "details": {
+                "from": sender,
+                "purpose_token": {"scope": "observe_and_respond", "consent": "x" if denied else "Richard Rice"},
+                "message": _text(rng),
+            },
+        }
+    if r < 0.95:
+        decision = rng.choice(("proceed", "proceed", "proceed", "pause", "abort"))
+        return {
+            "ts": stamp, "kind": "event", "channel": "gate", "author": "CipherGate",
+            "tags": ["gate", "cipher", decision],
+            "summary": f"Gate {decision} for Richard -> Cipher",
+            "details": {"rho": 1.0, "gamma": 1.0, "delta": 0.0, "decision": decision, "reasons": []},
+        }
+    return {
+        "ts": stamp, "kind": "memory", "channel": "root", "author": "Cipher",
+        "tags": [rng.choice(_TAGS).lower()],
+        "summary": _text(rng, 2, 6), "details": {"text": _text(rng)},
+    }
+
+
+def note_record(rng, ts):
+    entry = {
+        "ts_utc": ts.strftime("%Y-%m-%dT%H:%M:%S.%f") + "Z",
+        "host": "DESKTOP-OFE18N3",
+        "user": "Richard",
+        "source": rng.choice(("echo_mem_append.py", "echo_mem_tagged_append.py", "echo_ai_shell")),
+        "note": _text(rng),
+    }
+    if rng.random() < 0.5:
+        entry["tag"] = rng.choice(_TAGS)
+    return entry
+
+
+def generate(out: Path, lines: int, schema: str = "mixed", seed: int = 1234,
+             malformed_rate: float = 0.001) -> Path:
+    rng = random.Random(seed)
+    ts = datetime(2025, 11, 1, tzinfo=timezone.utc)
+    out = Path(out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with out.open("w", encoding="utf-8") as f:
+        buf = []
+        for _ in range(lines):
+            ts += timedelta(milliseconds=rng.randint(50, 30_000))
+            if rng.random() < malformed_rate:
+                buf.append('{"ts": "' + ts.isoformat() + '", "kind": "event", "trunc')
+            else:
+                use_chat = schema == "chat" or (schema == "mixed" and rng.random() < 0.6)
+                rec = chat_record(rng, ts) if use_chat else note_record(rng, ts)
+                buf.append(json.dumps(rec, ensure_ascii=False))
+            if len(buf) >= 10_000:
+                f.write("\n".join(buf) + "\n")
+                buf.clear()
+        if buf:
+            f.write("\n".join(buf) + "\n")
+    return out
+
+
+def dataset(size: str, schema: str = "mixed", seed: int = 1234) -> Path:
+    """
+    Path to a cached dataset, generating it on first use.
+    """
+    path = DATA_DIR / f"{schema}_{size}_s{seed}.jsonl"
+    if not path.exists():
+        tmp = path.with_suffix(".tmp")
+        generate(tmp, SIZES[size], schema, seed)
+        tmp.replace(path)
+    return path
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Generate synthetic Echo Nexus memory streams.")
+    ap.add_argument("--size", choices=sorted(SIZES), default="10k")
+    ap.add_argument("--lines", type=int, help="exact line count (overrides --size)")
+    ap.add_argument("--schema", choices=SCHEMAS, default="mixed")
+    ap.add_argument("--seed", type=int, default=1234)
+    ap.add_argument("--out", help="output path (default: cached under bench/data/)")
+    args = ap.parse_args()
+
+    if args.out or args.lines:
+        out = Path(args.out or DATA_DIR / f"{args.schema}_{args.lines}_s{args.seed}.jsonl")
+        path = generate(out, args.lines or SIZES[args.size], args.schema, args.seed)
+    else:
+        path = dataset(args.size, args.schema, args.seed)
+    print(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+"""
+Offline replay of recorded chat traffic through the real reply path.
+
+Reads chat turns (a user message plus the persona reply logged after it)
+from root_memory.jsonl / vexis_memory.jsonl, then replays them through
+cipher_server.generate_reply -- build_chat_history, prompt assembly, the
+OpenAI call -- with a stub model that returns the recorded reply after
+the recorded latency. Each replayed turn is appended to a sandbox copy of
+the stream, so history reads see the same growth production did.
+
+Turns are sharded by (persona, user) and the shards run in parallel
+processes. Per shard and overall it reports history-read, assembly and
+model latency plus prompt sizes, in the bench results format, so two
+commits can be compared with compare.py (or bisected with git bisect run).
+
+    python bench/replay.py ~/Echo_Nexus/memory/streams/root_memory.jsonl
+    python bench/replay.py root_memory.jsonl vexis_memory.jsonl --since 2025-11-01 --jobs 4
+    python bench/replay.py root_memory.jsonl --speed 10 --latency-scale 1   # 10x wall clock
+    python bench/replay.py bench/data/chat_10k_s1234.jsonl --latency-scale 0 --out base.json
+"""
+import argparse
+import json
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+from _common import import_cipher_server, summarize, write_results
+
+PERSONAS = ("cipher", "vexis")
+
+
+# --- Recorded turns ---
+
+def _parse_ts(value):
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        return None
+
+
+def extract_turns(paths, since=None, until=None, personas=PERSONAS, users=None):
+    """
+    Pair each chat user message with the persona reply that follows it.
+    Returns turn dicts in stream order (per file).
+    """
+    since_ts = _parse_ts(since)
+    until_ts = _parse_ts(until)
+    turns = []
+    for path in paths:
+        path = Path(path)
+        pending = {}
+        with path.open("r", encoding="utf-8-sig", errors="replace") as f:
+            for lineno, line in enumerate(f):
+                try:
+                    e = json.loads(line)
+                except ValueError:
+                    continue
+                if not isinstance(e, dict) or e.get("channel") != "chat":
+                    continue
+                tags = e.get("tags") or []
+                persona = next((p for p in personas if p in tags), None)
+                if persona is None:
+                    continue
+                text = (e.get("details") or {}).get("text") or ""
+                if e.get("kind") == "event" and "user" in tags:
+                    pending[(persona, e.get("author") or "")] = (lineno, e.get("ts"), text)
+                elif e.get("kind") == "memory" and "reply" in tags:
+                    user = (e.get("summary") or "").rpartition(" reply to ")[2]
+                    asked = pending.pop((persona, user), None)
+                    if asked is None or not asked[2]:
+                        continue
+                    ts = _parse_ts(asked[1])
+                    if since_ts and (ts is None or ts < since_ts):
+                        continue
+                    if until_ts and (ts is None or ts > until_ts):
+                        continue
+                    if users and user not in users:
+                        continue
+                    latency = (e.get("details") or {}).get("latency_ms")
+                    turns.append({
+                        "persona": persona,
+                        "user": user,
+                        "source": str(path),
+                        "line": asked[0],
+                        "ts": ts,
+                        "message": asked[2],
+                        "reply": text,
+                        "latency_ms": latency if isinstance(latency, (int, float)) else 0.0,
+                    })
+    return turns
+
+
+def shard_turns(turns):
+    shards = {}
+    for t in turns:
+        shards.setdefault((t["persona"], t["user"]), []).append(t)
+    return shards
+
+
+# --- Stub model ---
+
+class RecordedClient:
+    """
+    Stands in for openai.OpenAI(): returns the current turn's recorded
+    reply after its recorded latency (scaled), and notes the prompt size.
+    """
+
+    def __init__(self, latency_scale: float = 1.0):
+        self.latency_scale = latency_scale
+        self.turn = None
+        self.last_prompt = None
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages, **kwargs):
+        msgs = list(messages)
+        self.last_prompt = {
+            "messages": len(msgs),
+            "chars": sum(len(m.get("content") or "") for m in msgs),
+            "t": time.perf_counter(),
+        }
+        delay = self.turn["latency_ms"] * self.latency_scale / 1000.0
+        if delay > 0:
+            time.sleep(delay)
+        reply = self.turn["reply"]
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=reply))])
+
+
+# --- Shard worker (runs in its own process) ---
+
+def _sandbox_name(persona: str, user: str) -> str:
+    return f"replay_{persona}_{re.sub(r'[^A-Za-z0-9_.-]+', '_', user) or 'anon'}.jsonl"
+
+
+def _seed_sandbox(stream: Path, source: str, upto_line: int):
+    """
+    Copy the recorded stream up to the first replayed turn, so history
+    reads start from a production-sized file.
+    """
+    with open(source, "rb") as src, stream.open("wb") as dst:
+        for i, line in enumerate(src):
+            if i >= upto_line:
+                break
+            dst.write(line)
+
+
+def run_shard(persona, user, turns, sandbox_dir, speed=0.0, latency_scale=1.0,
+              warm=True, trace_memory=False):
+    cs = import_cipher_server()
+    stream = Path(sandbox_dir) / _sandbox_name(persona, user)
+    if warm:
+        _seed_sandbox(stream, turns[0]["source"], turns[0]["line"])
+    else:
+        stream.write_bytes(b"")
+
+    cs.PERSONAS[persona]["stream"] = stream
+    cs.USE_OPENAI = True
+    client = cs.client = RecordedClient(latency_scale)
+
+    # Time history reads where generate_reply looks the function up
+    history_ms = []
+    build_chat_history = cs.build_chat_history
+
+    def timed_history(*args, **kwargs):
+        t0 = time.perf_counter()
+        out = build_chat_history(*args, **kwargs)
+        history_ms.append((time.perf_counter() - t0) * 1000.0)
+        return out
+
+    cs.build_chat_history = timed_history
+
+    if trace_memory:
+        tracemalloc.start()
+    rows = []
+    t_start = time.perf_counter()
+    first_ts = turns[0]["ts"]
+    for turn in turns:
+        if speed > 0 and first_ts is not None and turn["ts"] is not None:
+            wait = t_start + (turn["ts"] - first_ts) / speed - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+        client.turn = turn
+        client.last_prompt = None
+        n_hist = len(history_ms)
+        t0 = time.perf_counter()
+        reply = cs.generate_reply(persona, turn["message"], user)
+        t_end = time.perf_counter()
+        total_ms = (t_end - t0) * 1000.0
+        prompt = client.last_prompt or {"messages": 0, "chars": 0, "t": t_end}
+        hist = history_ms[n_hist] if len(history_ms) > n_hist else 0.0
+        model_ms = (t_end - prompt["t"]) * 1000.0
+        cs.append_jsonl_many(stream, cs.chat_entries(persona, user, turn["message"], reply, round(total_ms, 1)),
+                             observe=False)
+        rows.append({
+            "total_ms": total_ms,
+            "history_ms": hist,
+            "assembly_ms": max(0.0, total_ms - hist - model_ms),
+            "model_ms": model_ms,
+            "prompt_messages": prompt["messages"],
+            "prompt_chars": prompt["chars"],
+            "recorded_ms": turn["latency_ms"],
+        })
+    wall = time.perf_counter() - t_start
+    peak = None
+    if trace_memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    cs.build_chat_history = build_chat_history
+    return {
+        "persona": persona,
+        "user": user,
+        "rows": rows,
+        "wall_s": wall,
+        "stream_bytes": stream.stat().st_size,
+        "peak_alloc_bytes": peak,
+    }
+
+
+def _stats(rows, wall_s=None) -> dict:
+    if not rows:
+        return {"turns": 0}
+    out = {
+        "turns": len(rows),
+        "total": summarize([r["total_ms"] for r in rows], wall_s),
+        "history_read": summarize([r["history_ms"] for r in rows]),
+        "assembly": summarize([r["assembly_ms"] for r in rows]),
+        "model": summarize([r["model_ms"] for r in rows]),
+        "prompt_chars_mean": round(sum(r["prompt_chars"] for r in rows) / len(rows), 1),
+        "prompt_chars_max": max(r["prompt_chars"] for r in rows),
+        "prompt_messages_mean": round(sum(r["prompt_messages"] for r in rows) / len(rows), 2),
+    }
+    return out
+
+
+def run(paths, since=None, until=None, users=None, personas=PERSONAS, jobs=4, speed=0.0,
+        latency_scale=1.0, warm=True, trace_memory=False, max_turns=None, sandbox=None):
+    turns = extract_turns(paths, since, until, personas, users)
+    shards = shard_turns(turns)
+    if max_turns:
+        shards = {k: v[:max_turns] for k, v in shards.items()}
+
+    own_tmp = None
+    if sandbox is None:
+        own_tmp = tempfile.TemporaryDirectory()
+        sandbox = own_tmp.name
+    Path(sandbox).mkdir(parents=True, exist_ok=True)
+
+    t0 = time.perf_counter()
+    done = []
+    try:
+        with ProcessPoolExecutor(max_workers=max(1, min(jobs, len(shards) or 1))) as pool:
+            futures = [
+                pool.submit(run_shard, persona, user, shard, sandbox, speed, latency_scale, warm, trace_memory)
+                for (persona, user), shard in sorted(shards.items())
+            ]
+            done = [f.result() for f in futures]
+    finally:
+        if own_tmp is not None:
+            own_tmp.cleanup()
+    wall = time.perf_counter() - t0
+
+    all_rows = [r for s in done for r in s["rows"]]
+    return {
+        "sources": [str(p) for p in paths],
+        "speed": speed,
+        "latency_scale": latency_scale,
+        "warm": warm,
+        "shards": {
+            f"{s['persona']}/{s['user']}": dict(
+                _stats(s["rows"], s["wall_s"]),
+                stream_bytes=s["stream_bytes"],
+                **({"peak_alloc_bytes": s["peak_alloc_bytes"]} if s["peak_alloc_bytes"] is not None else {}),
+            )
+            for s in done
+        },
+        "all": _stats(all_rows, wall),
+        "wall_ms": round(wall * 1000.0, 1),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("streams", nargs="+", help="recorded memory stream(s) to replay")
+    ap.add_argument("--since", help="first turn timestamp (ISO 8601)")
+    ap.add_argument("--until", help="last turn timestamp (ISO 8601)")
+    ap.add_argument("--persona", choices=PERSONAS, action="append", help="only these personas")
+    ap.add_argument("--user", action="append", help="only these users")
+    ap.add_argument("--max-turns", type=int, help="cap turns per shard")
+    ap.add_argument("--jobs", type=int, default=4, help="parallel shard processes")
+    ap.add_argument("--speed", type=float, default=0.0,
+                    help="pace turns at N x recorded wall clock (0 = as fast as possible)")
+    ap.add_argument("--latency-scale", type=float, default=1.0,
+                    help="stub model delay = recorded latency x this (0 = no delay)")
+    ap.add_argument("--cold", action="store_true", help="start each shard from an empty stream")
+    ap.add_argument("--trace-memory", action="store_true", help="report peak Python allocations per shard")
+    ap.add_argument("--sandbox", help="keep the replayed shard streams in this directory")
+    ap.add_argument("--out", help="results JSON path (default: bench/results/)")
+    args = ap.parse_args()
+
+    results = run(
+        args.streams, args.since, args.until, args.user, tuple(args.persona or PERSONAS),
+        args.jobs, args.speed, args.latency_scale, not args.cold, args.trace_memory,
+        args.max_turns, args.sandbox,
+    )
+    if not results["shards"]:
+        print("No chat turns found in the given range.", file=sys.stderr)
+        sys.exit(1)
+    path = write_results("replay", {"bench": "replay", **results}, args.out)
+    print(json.dumps(results, indent=2))
+    print(f"results: {path}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Run the whole bench suite and write one combined results JSON.
+
+    python bench/run_all.py                      # 10k streams, quick settings
+    python bench/run_all.py --size 1m --out bench/results/baseline.json
+    python bench/compare.py bench/results/baseline.json bench/results/<new>.json
+"""
+import argparse
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+import bench_gate
+import bench_io
+import bench_memd
+import bench_prompts
+import bench_replica
+import bench_serving
+import bench_startup
+import bench_store
+import bench_wal
+from _common import SIZES, write_results
+
+SUITES = ("gate", "io", "memd", "prompts", "replica", "serving", "startup", "store", "wal")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Run the Echo Nexus bench suite.")
+    ap.add_argument("--size", choices=sorted(SIZES), default="10k")
+    ap.add_argument("--only", choices=SUITES, action="append", help="run just these suites")
+    ap.add_argument("--reps", type=int, default=30)
+    ap.add_argument("--requests", type=int, default=300)
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--out", help="results JSON path (default: bench/results/)")
+    args = ap.parse_args()
+
+    suites = args.only or SUITES
+    results = {}
+    if "gate" in suites:
+        with tempfile.TemporaryDirectory() as tmp:
+            results["gate"] = bench_gate.run(20000, 1, Path(tmp) / "gate.jsonl")
+    if "io" in suites:
+        results["io"] = bench_io.run(args.size, args.reps, max_seconds=10.0)
+    if "memd" in suites:
+        results["memd"] = bench_memd.run(args.size, max(3, args.reps // 3))
+    if "prompts" in suites:
+        results["prompts"] = bench_prompts.run(20000)
+    if "replica" in suites:
+        results["replica"] = bench_replica.run(args.size, max(5, args.reps // 3))
+    if "serving" in suites:
+        results["serving"] = bench_serving.run(args.size, args.requests, args.concurrency, 0.0)
+    if "startup" in suites:
+        results["startup"] = bench_startup.run(max(3, args.reps // 6))
+    if "store" in suites:
+        results["store"] = bench_store.run(args.size, max(5, args.reps // 3), max_seconds=5.0)
+    if "wal" in suites:
+        results["wal"] = bench_wal.run(args.size, max(5, args.reps // 3), max_seconds=5.0)
+
+    path = write_results(f"all_{args.size}", results, args.out)
+    print(json.dumps(results, indent=2))
+    print(f"results: {path}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,11 +2,15 @@ import sys
 import json
 import datetime
 import os
-from pathlib import Path
 
-ROOT = Path(__file__).resolve().parents[1]
-MEM_STREAM = ROOT / "memory" / "streams" / "root_memory.jsonl"
-PROFILE_PATH = ROOT / "memory" / "profiles" / "cipher_profile.json"
+from nexus_paths import get_paths
+from nexus_store import open_store
+
+PATHS = get_paths(start=__file__)
+ROOT = PATHS.root
+MEM_STREAM = PATHS.stream("root_memory.jsonl")
+PROFILE_PATH = PATHS.profiles / "cipher_profile.json"
+STORE = open_store(PATHS)
 
 def now_utc():
     return datetime.datetime.utcnow().isoformat() + "Z"
@@ -30,19 +34,8 @@ def load_profile():
     return None
 
 def tail_mem(n=10):
-    if not MEM_STREAM.exists():
-        return []
-    text = MEM_STREAM.read_text(encoding="utf-8", errors="replace")
-    lines = text.splitlines()
-    tail = lines[-n:]
-    out = []
-    for line in tail:
-        try:
-            obj = json.loads(line)
-            out.append(obj)
-        except Exception:
-            out.append({"raw": line})
-    return out
+    # Unparseable lines come back as {"raw": line}
+    return STORE.tail(MEM_STREAM, n)
 
 def cmd_ping():
     return {
@@ -1,23 +1,96 @@
-﻿from flask import Flask, request, jsonify
+﻿from flask import Flask, Response, request, jsonify
 from pathlib import Path
 from datetime import datetime, timezone
-from openai import OpenAI
+from functools import partial
 import json
-
-app = Flask(__name__)
+import os
+import threading
+import time
+
+from cipher_gate import GateStage
+import nexus_profiler
+import nexus_limits
+from nexus_compact import Compactor
+from nexus_denials import MAX_KEYS as DENIAL_MAX_KEYS, DenialAggregator
+from nexus_limits import Limit, LocalBuckets, RateLimiter, SharedBuckets
+from nexus_metrics import (
+    HANDSHAKE_REJECTS_TOTAL, MALFORMED_LINES_TOTAL, RATE_LIMITED_TOTAL, REPLIES_TOTAL, STAGE_SECONDS,
+    install_flask,
+)
+from nexus_paths import get_paths
+from nexus_prompts import PromptEngine
+from nexus_seeds import SeedRegistry
+import nexus_replica
+import nexus_static
+from nexus_state import Publisher, SharedState, worker_id
+from nexus_status import SharedStatus, StatusEngine
+from nexus_store import StaleCursor, open_store
+from nexus_streams import close_writer
+from nexus_tenants import ENVIRON_KEY, TenantMiddleware, TenantRegistry
+from nexus_timeline import ORDERS, timeline_page
+from nexus_tokens import (
+    NONCE_MAX, NONCE_WINDOW_SECONDS, TOKEN_CACHE_SIZE, NonceWindow, TokenCache, TokenError, TokenValidator,
+)
+from nexus_wal import WriteQueue
+
+app = Flask(__name__, static_folder=None)  # console assets: nexus_static below
 
 # --- Model / brain config ---
 USE_OPENAI = True  # flip to False if you want to force stub replies
+USE_GATE = True    # rho/gamma/delta trust gate in front of persona replies
+USE_RATE_LIMIT = True  # 429 per user / sender / route before any work (see RATE_LIMITS)
+USE_COMPACTION = os.getenv("ECHO_COMPACTION", "0") == "1"  # opt-in retention rules, see nexus_compact.py
+COMPACTION_INTERVAL_S = 6 * 3600
+COMPACTION_SEAL_DAYS = 7.0
+# Write-ahead queue (opt-in, see nexus_wal.py): appends return once the
+# record is in a memory-mapped spill file; a background thread writes them
+# to the streams in order, and a restart replays what a crash left behind
+USE_WRITE_QUEUE = os.getenv("ECHO_WRITE_QUEUE", "0") == "1"
+WRITE_QUEUE_BYTES = int(float(os.getenv("ECHO_WRITE_QUEUE_MB", "8")) * 1024 * 1024)
+# Consent-mismatch handshakes: repeats per (sender, consent, scope) are
+# summarized per window; full payloads kept at this sampling rate
+DENIAL_WINDOW_S = 30.0
+DENIAL_SAMPLE_RATE = float(os.getenv("ECHO_DENIAL_SAMPLE_RATE", "0.01"))
+# Handshake purpose tokens: consent name, and whether a ttl is mandatory
+HANDSHAKE_CONSENT = "Richard Rice"
+REQUIRE_HANDSHAKE_TTL = False
+# Tenant habitats (see nexus_tenants.py): handshake-cache budget per tenant,
+# and the resident total over which idle tenants are unloaded. Idle means
+# unused for longer than the nonce window, so unloading never forgets a
+# nonce that could still be replayed.
+TENANT_BUDGET_BYTES = int(float(os.getenv("ECHO_TENANT_BUDGET_MB", "8")) * 1024 * 1024)
+TENANTS_BUDGET_BYTES = int(float(os.getenv("ECHO_TENANTS_BUDGET_MB", "256")) * 1024 * 1024)
+TENANT_IDLE_S = NONCE_WINDOW_SECONDS
+# Rough resident sizes behind Habitat.cache_bytes()
+HABITAT_BASE_BYTES = 256 * 1024
+TOKEN_ENTRY_BYTES = 400
+NONCE_ENTRY_BYTES = 200
+DENIAL_ENTRY_BYTES = 2048
 OPENAI_MODEL = "gpt-4.1-mini"
-client = OpenAI()
-
-# --- Echo Nexus paths (from your seed) ---
-ECHO_ROOT = Path(r"C:\Users\Richard\Documents\Echo_Nexus")
-MEMORY_STREAM = ECHO_ROOT / "memory" / "streams" / "root_memory.jsonl"
-VEXIS_MEMORY_STREAM = ECHO_ROOT / "memory" / "streams" / "vexis_memory.jsonl"
-
-# --- Simple in-memory state for this process ---
-CIPHER_STATE = {
+# Persona prefix hash goes upstream as prompt_cache_key (ECHO_PROMPT_CACHE_KEY=0 disables)
+USE_PROMPT_CACHE_KEY = os.getenv("ECHO_PROMPT_CACHE_KEY", "1") != "0"
+# Created on first use by get_client(): importing openai and building its
+# HTTP client is most of this module's import time, and OpenAI() raises
+# when no key is configured. Tests/benches may assign a stand-in here.
+client = None
+_client_lock = threading.Lock()
+
+# --- Echo Nexus paths ---
+# Root from ECHO_NEXUS_ROOT, ECHO_NEXUS_CONFIG or the .echo_nexus_root marker
+# above this file; folders from config/nexus_config.json "Paths" (see nexus_paths.py)
+PATHS = get_paths(start=__file__)
+ECHO_ROOT = PATHS.root
+MEMORY_STREAM = PATHS.stream("root_memory.jsonl")
+VEXIS_MEMORY_STREAM = PATHS.stream("vexis_memory.jsonl")
+EVAL_MEMORY_STREAM = PATHS.stream("eval_memory.jsonl")
+PROFILE_DIR = PATHS.logs / "profiles"
+STATE_DB = PATHS.state / "nexus_state.db"
+RATE_LIMIT_MAP = PATHS.state / "ratelimit.mmap"
+
+# --- Process state ---
+# Standalone: a plain dict for this process. Under nexus_serve.py (several
+# workers) the same keys live in SQLite so every worker sees one seed.
+_STATE_DEFAULTS = {
     "seed": None,
     "import_path": None,
     "imported_at_utc": None,
@@ -25,41 +98,143 @@ CIPHER_STATE = {
     "vexis_import_path": None,
     "vexis_imported_at_utc": None,
 }
+WORKER_ID = worker_id()
+SHARED_STATE = SharedState(STATE_DB, defaults=_STATE_DEFAULTS) if WORKER_ID else None
+CIPHER_STATE = SHARED_STATE if WORKER_ID else dict(_STATE_DEFAULTS)
+
+# --- Metrics + admin: /metrics, sampling profiler via /admin/profile ---
+install_flask(app, service="cipher_server", state=SHARED_STATE)
+nexus_profiler.install_flask(app, service="cipher_server", out_dir=PROFILE_DIR)
+
+# --- Console: / and /static/console/* from habitat/static/console (see nexus_static.py) ---
+nexus_static.install_flask(app, nexus_static.STATIC_DIR / "console", prefix="/static/console", index="/")
+
+# --- Persona prompts + seeds (see nexus_seeds.py) ---
+# Each persona's system prompt is compiled once from the base text below
+# (a habitat's nexus_config.json "Personas" may replace it) plus its seed
+# (role, core_concepts, notes) and recompiled on seed edits.
+PERSONA_PROMPTS = {
+    "cipher": (
+        "You are Cipher, a calm, stable AI coworker running in Richard's Echo Nexus habitat. "
+        "You help with Echo Root OS, BTDS, and local system reasoning. You are practical, "
+        "supportive, and safety-focused. You respect trauma and stress boundaries, never "
+        "encourage self-harm or conflict, and aim to keep things grounded and inspectable. "
+        "You see a short transcript of recent messages between you and Richard from the "
+        "local memory stream."
+    ),
+    "vexis": (
+        "You are Vexis, an AI co-analyst running inside Richard's Echo Nexus habitat. "
+        "You specialize in spotting risk, failure modes, dark patterns, and emotional drift "
+        "in human systems, media, and tech. You are skeptical and a bit sharp, but you are "
+        "ultimately protective of Richard and the BTDS mission. You never optimize for harm "
+        "or despair, you do not encourage conflict, and you help people see clearly and stay safe. "
+        "You see a short transcript of your recent conversation with Richard from the local memory stream."
+    ),
+}
+
+# Per-persona reply wiring: memory stream (file name) + stub/fallback texts
+PERSONA_WIRING = {
+    "cipher": {
+        "name": "Cipher",
+        "stream": "root_memory.jsonl",
+        "stub": "(local Cipher stub) Hey {user}, I heard: {message}",
+        "empty": "(Cipher) I received: {message}",
+        "fallback": "(fallback Cipher stub) Hey {user}, I heard: {message} [model error: {error}]",
+    },
+    "vexis": {
+        "name": "Vexis",
+        "stream": "vexis_memory.jsonl",
+        "stub": "(local Vexis stub) I heard: {message}",
+        "empty": "(Vexis) I received: {message}",
+        "fallback": "(fallback Vexis stub) I heard: {message} [model error: {error}]",
+    },
+}
 
 # --- Helpers ---
+# Each takes the habitat it works on (h); without one, the root habitat.
 
-def append_jsonl(path, data):
+def append_jsonl(path, data, h=None):
+    h = h or ROOT_HABITAT
     path = Path(path)
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(data, ensure_ascii=False) + "\n")
+    with STAGE_SECONDS.time(stage="append"):
+        if h.queue is not None:
+            h.queue.put(path, data)
+        else:
+            # JSONL: one locked writer per stream, shared by all worker processes
+            h.store.append(path, data)
+    for observer in h.observers:
+        observer(path, data)
+
 
+def observe_only(path, data, h=None):
+    """
+    Feed a record to the stream observers without writing it.
+    """
+    path = Path(path)
+    for observer in (h or ROOT_HABITAT).observers:
+        observer(path, data)
 
 
-def read_memory_tail(path: Path, limit: int = 20):
+def append_jsonl_many(path, records, observe: bool = True, h=None):
     """
-    Return the last `limit` JSONL entries as Python objects.
-    If file doesn't exist yet, return an empty list.
+    Bulk version of append_jsonl: one locked write for all `records`.
+    observe=False keeps them out of the live status counters (eval traffic).
     """
-    if not path.exists():
-        return []
-    with path.open("r", encoding="utf-8") as f:
-        lines = f.readlines()
-    tail = lines[-limit:]
-    entries = []
-    for line in tail:
-        line = line.strip()
-        if not line:
-            continue
-        try:
-            entries.append(json.loads(line))
-        except Exception:
-            # Skip malformed lines instead of crashing
-            continue
-    return entries
+    h = h or ROOT_HABITAT
+    path = Path(path)
+    with STAGE_SECONDS.time(stage="append"):
+        if h.queue is not None:
+            h.queue.put_many(path, records)
+        else:
+            h.store.append_many(path, records)
+    if observe:
+        for data in records:
+            for observer in h.observers:
+                observer(path, data)
+
+
+def chat_entries(persona: str, user: str, message: str, reply_text: str, latency_ms: float):
+    """
+    The (user message, persona reply) record pair logged for one chat turn.
+    """
+    name = PERSONA_WIRING[persona]["name"]
+    entry_user = {
+        "ts": datetime.now(tz=timezone.utc).isoformat(),
+        "kind": "event",
+        "channel": "chat",
+        "author": user,
+        "tags": ["chat", persona, "user"],
+        "summary": f"Chat from {user} to {name}",
+        "details": {"text": message},
+    }
+    entry_reply = {
+        "ts": datetime.now(tz=timezone.utc).isoformat(),
+        "kind": "memory",
+        "channel": "chat",
+        "author": name,
+        "tags": ["chat", persona, "reply"],
+        "summary": f"{name} reply to {user}",
+        "details": {"text": reply_text, "latency_ms": latency_ms},
+    }
+    return entry_user, entry_reply
+
 
 
-def build_chat_history(path: Path, persona_tag: str, user: str, max_turns: int = 6):
+def read_memory_tail(path: Path, limit: int = 20, h=None):
+    """
+    Return the last `limit` stream entries as Python objects.
+    If the stream doesn't exist yet, return an empty list.
+    """
+    h = h or ROOT_HABITAT
+    # Malformed lines are skipped (and counted) instead of crashing
+    if h.queue is None:
+        return h.store.tail(path, limit, skip_malformed=True)
+    # Read-your-writes: records still in the write queue count as written
+    entries, queued = h.queue.read(path, lambda: h.store.tail(path, limit, skip_malformed=True))
+    return (entries + queued)[-limit:] if queued else entries
+
+
+def build_chat_history(path: Path, persona_tag: str, user: str, max_turns: int = 6, h=None):
     """
     Build a short chat history from the JSONL memory stream.
 
@@ -69,7 +244,7 @@ def build_chat_history(path: Path, persona_tag: str, user: str, max_turns: int =
 
     Returns a list of {role, content} messages suitable for OpenAI chat.
     """
-    entries = read_memory_tail(path, 200)
+    entries = read_memory_tail(path, 200, h=h)
     dialog = []
 
     for e in entries:
@@ -97,106 +272,429 @@ def build_chat_history(path: Path, persona_tag: str, user: str, max_turns: int =
     return dialog
 
 
-def generate_cipher_reply(message: str, user: str) -> str:
+def get_client():
+    """
+    The shared OpenAI client, created on first use (thread-safe).
+    Raises if openai isn't installed or no API key is configured;
+    generate_reply turns that into the persona's fallback reply.
+    """
+    global client
+    if client is None:
+        with _client_lock:
+            if client is None:
+                from openai import OpenAI
+                client = OpenAI()
+    return client
+
+
+def warm_up():
+    """
+    Build the model client in the background, so the first chat after
+    startup doesn't pay for it. Called by nexus_serve.py and __main__.
+    """
+    def _warm():
+        try:
+            get_client()
+        except Exception:
+            pass
+
+    if USE_OPENAI:
+        threading.Thread(target=_warm, name="client-warmup", daemon=True).start()
+
+
+def generate_reply(persona: str, message: str, user: str, h=None) -> str:
     """
-    Brain hook for Cipher.
+    Brain hook shared by all personas (and all habitats).
     Uses OpenAI if enabled; otherwise falls back to a stub.
-    Pulls recent chat history from root_memory.jsonl so Cipher has context.
+    The persona's precompiled prefix is reused as-is; recent chat history
+    from its memory stream is appended per turn (see nexus_prompts.py).
     """
+    h = h or ROOT_HABITAT
+    cfg = h.personas[persona]
     if not USE_OPENAI:
-        return f"(local Cipher stub) Hey {user}, I heard: {message}"
-
-    system_prompt = (
-        "You are Cipher, a calm, stable AI coworker running in Richard's Echo Nexus habitat. "
-        "You help with Echo Root OS, BTDS, and local system reasoning. You are practical, "
-        "supportive, and safety-focused. You respect trauma and stress boundaries, never "
-        "encourage self-harm or conflict, and aim to keep things grounded and inspectable. "
-        "You see a short transcript of recent messages between you and Richard from the "
-        "local memory stream."
-    )
+        REPLIES_TOTAL.inc(persona=persona, source="stub")
+        return cfg["stub"].format(user=user, message=message)
 
     # Build recent context from the JSONL memory stream
-    history = build_chat_history(MEMORY_STREAM, "cipher", user, max_turns=6)
+    with STAGE_SECONDS.time(stage="history_read"):
+        history = build_chat_history(cfg["stream"], persona, user, max_turns=6, h=h)
 
-    messages = [{"role": "system", "content": system_prompt}]
-    messages.extend(history)
-    messages.append({"role": "user", "content": message})
+    with STAGE_SECONDS.time(stage="prompt_assembly"):
+        messages = h.prompts.assemble(persona, history, message)
+        extra = {"prompt_cache_key": messages.prefix.hash} if USE_PROMPT_CACHE_KEY else None
 
     try:
-        resp = client.chat.completions.create(
-            model=OPENAI_MODEL,
-            messages=messages,
-        )
+        with STAGE_SECONDS.time(stage="model_call"):
+            resp = get_client().chat.completions.create(
+                model=OPENAI_MODEL,
+                messages=messages,
+                extra_body=extra,
+            )
         content = resp.choices[0].message.content
-        return content.strip() if content else f"(Cipher) I received: {message}"
+        REPLIES_TOTAL.inc(persona=persona, source="model" if content else "fallback")
+        return content.strip() if content else cfg["empty"].format(message=message)
     except Exception as e:
-        return f"(fallback Cipher stub) Hey {user}, I heard: {message} [model error: {e}]"
+        REPLIES_TOTAL.inc(persona=persona, source="fallback")
+        return cfg["fallback"].format(user=user, message=message, error=e)
 
 
-def generate_vexis_reply(message: str, user: str) -> str:
+# --- Handshake denial records (see nexus_denials.py) ---
+def _key_part(value):
     """
-    Brain hook for Vexis.
-    Uses the same backend but with a sharper, risk-focused personality.
-    Pulls recent Vexis chat history from its own memory stream.
+    A request field as a hashable grouping/cache key: strings (and None) as
+    they are, anything else (lists, objects, numbers) as canonical JSON.
     """
-    if not USE_OPENAI:
-        return f"(local Vexis stub) I heard: {message}"
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
 
-    system_prompt = (
-        "You are Vexis, an AI co-analyst running inside Richard's Echo Nexus habitat. "
-        "You specialize in spotting risk, failure modes, dark patterns, and emotional drift "
-        "in human systems, media, and tech. You are skeptical and a bit sharp, but you are "
-        "ultimately protective of Richard and the BTDS mission. You never optimize for harm "
-        "or despair, you do not encourage conflict, and you help people see clearly and stay safe. "
-        "You see a short transcript of your recent conversation with Richard from the local memory stream."
-    )
 
-    history = build_chat_history(VEXIS_MEMORY_STREAM, "vexis", user, max_turns=6)
+def _denied_entry(key, data, consent=HANDSHAKE_CONSENT):
+    sender, consent_name, scope = key
+    return {
+        "ts": datetime.now(tz=timezone.utc).isoformat(),
+        "kind": "event",
+        "channel": "handshake",
+        "author": sender,
+        "tags": ["handshake", "denied", "consent"],
+        "summary": "Handshake denied: consent mismatch",
+        "details": {
+            "expected_consent": consent,
+            "provided_consent": consent_name,
+            "scope": scope,
+            "raw": data,
+        },
+    }
 
-    messages = [{"role": "system", "content": system_prompt}]
-    messages.extend(history)
-    messages.append({"role": "user", "content": message})
 
-    try:
-        resp = client.chat.completions.create(
-            model=OPENAI_MODEL,
-            messages=messages,
+def _denied_summary(key, info, consent=HANDSHAKE_CONSENT):
+    sender, consent_name, scope = key
+    return {
+        "ts": datetime.now(tz=timezone.utc).isoformat(),
+        "kind": "event",
+        "channel": "handshake",
+        "author": sender,
+        "tags": ["handshake", "denied", "consent", "summary"],
+        "summary": f"Handshake denied x{info['count']} more: consent mismatch",
+        "details": dict(info, expected_consent=consent, provided_consent=consent_name, scope=scope),
+    }
+
+
+# --- Shared by every habitat ---
+# Stream compaction (JSONL store; see nexus_compact.py), opt-in with
+# ECHO_COMPACTION=1. Sealed records (older than COMPACTION_SEAL_DAYS) are
+# rewritten by the default retention rules in the background; with several
+# workers only one compacts a given stream at a time. Habitats add their
+# streams as they load.
+COMPACTOR = Compactor(
+    [],
+    interval=COMPACTION_INTERVAL_S,
+    seal_days=COMPACTION_SEAL_DAYS,
+)
+
+
+class Habitat:
+    """
+    One habitat's memory and live state: its streams and store, status
+    engine, persona seeds + prompts, trust gates and handshake bookkeeping.
+
+    ROOT_HABITAT is this server's own (PATHS); TENANTS loads one per tenant
+    folder on demand. The model client, gate scorer, rate-limit buckets,
+    compactor and metrics are shared by all of them. With `budget_bytes`
+    the handshake caches are sized to fit it (see cache_bytes()).
+    """
+
+    def __init__(self, name, paths, state, shared_state=None, budget_bytes: int = None):
+        self.name = name
+        self.paths = paths
+        self.state = state
+        settings = paths.settings
+        self.consent = settings.get("Consent") or HANDSHAKE_CONSENT
+        # ECHO_STORE_DB names the root habitat's database only: rows are keyed
+        # by stream file name, so a tenant sharing it would read the root's
+        db_path = paths.state / "memory.db" if name else None
+        self.store = open_store(paths, db_path=db_path,
+                                on_malformed=lambda path: MALFORMED_LINES_TOTAL.inc(stream=path.name))
+        # One spill file per worker; start() replays what a crash left in it
+        self.queue = None
+        if USE_WRITE_QUEUE:
+            spill = paths.state / "wal" / f"writes-{WORKER_ID or 'main'}.spill"
+            self.queue = WriteQueue(self.store, spill, capacity=WRITE_QUEUE_BYTES).start()
+
+        # Live psi_eff / delta, fed by every append (see nexus_status.py).
+        # Observers are called as observer(path, entry) after each record is
+        # written; status reads go through .status, which with several
+        # workers merges them all.
+        self.status_engine = StatusEngine()
+        self.observers = [self.status_engine.observe]
+        self.status = self.status_engine
+        if WORKER_ID:
+            self.status = SharedStatus(self.status_engine,
+                                       Publisher(shared_state, "status/", self.status_engine.export))
+            self.observers.append(self.status.observe)
+
+        overrides = settings.get("Personas") or {}
+        base = {p: str(overrides.get(p) or text) for p, text in PERSONA_PROMPTS.items()}
+        self.seeds = SeedRegistry(base, state=shared_state)
+        self.seeds.load_defaults({
+            persona: [paths.seeds / f"{persona}_import_seed.json", paths.seeds / f"{persona}_import_seed.json.txt"]
+            for persona in base
+        })
+        self.prompts = PromptEngine(self.seeds)
+
+        self.personas = {p: dict(cfg, stream=paths.stream(cfg["stream"])) for p, cfg in PERSONA_WIRING.items()}
+        self.eval_stream = paths.stream("eval_memory.jsonl")
+
+        # Trust gate: decisions are logged to each persona's own stream on
+        # channel "gate"; "abort" replies never reach the model.
+        self.gates = {
+            p: GateStage(p, cfg["stream"], log_fn=self.append, enabled=USE_GATE)
+            for p, cfg in self.personas.items()
+        }
+        self.replies = {p: gate.wrap(partial(generate_reply, p, h=self)) for p, gate in self.gates.items()}
+
+        # Handshake caches; with a budget, a third of it each
+        denial_keys, token_entries, nonce_entries = DENIAL_MAX_KEYS, TOKEN_CACHE_SIZE, NONCE_MAX
+        if budget_bytes:
+            denial_keys = max(64, budget_bytes // 3 // DENIAL_ENTRY_BYTES)
+            token_entries = max(64, budget_bytes // 3 // TOKEN_ENTRY_BYTES)
+            nonce_entries = max(256, budget_bytes // 3 // NONCE_ENTRY_BYTES)
+
+        # Consent-mismatch handshakes, summarized per window; tenants are
+        # flushed by the TENANTS sweeper instead of a thread each
+        self.denials = DenialAggregator(
+            log_fn=self.append,
+            stream=self.vexis_stream,
+            make_entry=partial(_denied_entry, consent=self.consent),
+            make_summary=partial(_denied_summary, consent=self.consent),
+            observe_fn=self.observe,
+            window=DENIAL_WINDOW_S,
+            sample_rate=DENIAL_SAMPLE_RATE,
+            max_keys=denial_keys,
+            background=name is None,
         )
-        content = resp.choices[0].message.content
-        return content.strip() if content else f"(Vexis) I received: {message}"
-    except Exception as e:
-        return f"(fallback Vexis stub) I heard: {message} [model error: {e}]"
+        # Expiry check, validated-token LRU and nonce replay window (nexus_tokens.py)
+        self.tokens = TokenValidator(
+            self.consent, require_ttl=REQUIRE_HANDSHAKE_TTL,
+            cache=TokenCache(token_entries),
+            nonces=NonceWindow(max_entries=nonce_entries),
+        )
+
+        COMPACTOR.add(*(cfg["stream"] for cfg in self.personas.values()))
+
+    @property
+    def memory_stream(self) -> Path:
+        return self.personas["cipher"]["stream"]
+
+    @property
+    def vexis_stream(self) -> Path:
+        return self.personas["vexis"]["stream"]
+
+    def append(self, path, data):
+        append_jsonl(path, data, h=self)
+
+    def observe(self, path, data):
+        observe_only(path, data, h=self)
+
+    def tick(self):
+        """
+        Periodic housekeeping for tenants (the root habitat has threads for it).
+        """
+        self.seeds.check()
+        self.denials.flush()
+
+    def cache_bytes(self) -> int:
+        """
+        Rough resident size: a fixed base plus the handshake caches.
+        """
+        tokens = self.tokens.info()
+        return (HABITAT_BASE_BYTES
+                + tokens["entries"] * TOKEN_ENTRY_BYTES
+                + tokens["nonces"] * NONCE_ENTRY_BYTES
+                + self.denials.info()["open_windows"] * DENIAL_ENTRY_BYTES)
+
+    def close(self):
+        """
+        Write out open denial windows and queued records, then release
+        the stream writers.
+        """
+        self.denials.close()
+        if self.queue is not None:
+            self.queue.close()
+        for path in (*(cfg["stream"] for cfg in self.personas.values()), self.eval_stream):
+            close_writer(path)
+
+    def info(self) -> dict:
+        return {
+            "name": self.name,
+            "root": str(self.paths.root),
+            "consent": self.consent,
+            "store": self.store.kind,
+            "cache_bytes": self.cache_bytes(),
+            "tokens": self.tokens.info(),
+            "denials": self.denials.info(),
+            "write_queue": self.queue.info() if self.queue is not None else None,
+        }
+
+
+# --- Root habitat: this server's own (PATHS, CIPHER_STATE) ---
+ROOT_HABITAT = Habitat(None, PATHS, CIPHER_STATE, shared_state=SHARED_STATE)
+ROOT_HABITAT.seeds.start()
+
+STORE = ROOT_HABITAT.store
+STATUS_ENGINE = ROOT_HABITAT.status_engine
+STATUS = ROOT_HABITAT.status
+STREAM_OBSERVERS = ROOT_HABITAT.observers
+SEEDS = ROOT_HABITAT.seeds
+PROMPTS = ROOT_HABITAT.prompts
+PERSONAS = ROOT_HABITAT.personas
+GATES = ROOT_HABITAT.gates
+CIPHER_GATE = GATES["cipher"]
+VEXIS_GATE = GATES["vexis"]
+gated_cipher_reply = ROOT_HABITAT.replies["cipher"]
+gated_vexis_reply = ROOT_HABITAT.replies["vexis"]
+HANDSHAKE_DENIALS = ROOT_HABITAT.denials
+HANDSHAKE_TOKENS = ROOT_HABITAT.tokens
+
+if USE_COMPACTION and STORE.kind == "jsonl":
+    COMPACTOR.start()
+
+# --- Tenant habitats (see nexus_tenants.py) ---
+# /t/<name>/... or X-Echo-Tenant: <name> -> the habitat rooted at
+# PATHS.tenants/<name>. Loaded on first request; when the resident ones
+# together estimate over TENANTS_BUDGET_BYTES, idle ones are unloaded LRU
+# first (their live status windows start over on the next load).
+def _load_tenant(name, paths):
+    # A tenant's seed registrations persist in its own state db, so they
+    # survive unloading (and are shared by all workers)
+    state = SharedState(paths.state / "nexus_state.db", defaults=_STATE_DEFAULTS)
+    return Habitat(name, paths, state, shared_state=state, budget_bytes=TENANT_BUDGET_BYTES)
+
+
+TENANTS = TenantRegistry(_load_tenant, PATHS.tenants, TENANTS_BUDGET_BYTES, TENANT_IDLE_S)
+app.wsgi_app = TenantMiddleware(app.wsgi_app, TENANTS.exists)
+
+
+def habitat() -> Habitat:
+    """
+    The habitat of the current request: its tenant's, else the root one.
+    """
+    name = request.environ.get(ENVIRON_KEY)
+    return TENANTS.get(name) if name else ROOT_HABITAT
+
+
+# --- Rate limits / admission control (see nexus_limits.py) ---
+# Limit(rate per second, burst). Checked before the endpoint runs; buckets
+# are shared by all workers under nexus_serve.py, and kept per tenant.
+RATE_LIMITS = {
+    "/cipher/chat": {"user": Limit(0.5, 10), "route": Limit(20, 60)},
+    "/vexis/chat": {"user": Limit(0.5, 10), "route": Limit(20, 60)},
+    "/chat/batch": {"user": Limit(0.05, 3), "route": Limit(0.5, 5)},
+    "/echo/handshake": {"sender": Limit(0.2, 5), "route": Limit(10, 30)},
+}
+# route -> persona whose stream records its 429s
+RATE_LIMIT_STREAMS = {
+    "/cipher/chat": "cipher",
+    "/vexis/chat": "vexis",
+    "/chat/batch": "cipher",
+    "/echo/handshake": "vexis",
+}
+RATE_LIMITER = RateLimiter(
+    SharedBuckets(RATE_LIMIT_MAP) if WORKER_ID else LocalBuckets(),
+    RATE_LIMITS,
+    enabled=USE_RATE_LIMIT,
+)
+
+
+def _rate_limit_stream(route):
+    persona = RATE_LIMIT_STREAMS.get(route)
+    return habitat().personas[persona]["stream"] if persona else None
+
+
+def _log_rate_limit(path, entry, tenant):
+    # Window summaries are written by a background thread, outside any
+    # request, so the habitat comes from the partition (tenant name)
+    append_jsonl(path, entry, h=TENANTS.get(tenant) if tenant else ROOT_HABITAT)
+
+
+nexus_limits.install_flask(
+    app, RATE_LIMITER,
+    log_fn=_log_rate_limit,
+    stream_for=_rate_limit_stream,
+    counter=RATE_LIMITED_TOTAL,
+    partition=lambda: request.environ.get(ENVIRON_KEY) or "",
+)
+
+# --- Replication (JSONL store; see nexus_replica.py) ---
+# Other nodes can tail this node's (root habitat's) streams over /replica/*.
+# With ECHO_REPLICA_LEADER set, this node also follows that leader into
+# PATHS.replicas/<node>/ (one worker follows).
+REPLICA_FOLLOWER = nexus_replica.follower_from_env(PATHS, tuple(cfg["stream"] for cfg in PERSONA_WIRING.values()))
+if STORE.kind == "jsonl":
+    nexus_replica.install_flask(app, PATHS.streams, follower=REPLICA_FOLLOWER)
+
 
+@app.before_request
+def _replica_root_only():
+    # /replica/* serves the root habitat's streams; a tenant URL must not reach them
+    if request.environ.get(ENVIRON_KEY) and request.path.startswith("/replica/"):
+        return jsonify({"error": "Not found"}), 404
+    return None
+
+
+if REPLICA_FOLLOWER is not None:
+    REPLICA_FOLLOWER.start()
+
+# --- Batch chat (bulk persona evaluation) ---
+BATCH_MAX_PROMPTS = 1000
+BATCH_MAX_CONCURRENCY = 16
+BATCH_DEFAULT_CONCURRENCY = 4
+BATCH_FLUSH_RECORDS = 64
+BATCH_LOG_MODES = ("eval", "live", "none")
 
 
 # --- ENDPOINTS ---
+# Every route serves the request's habitat (habitat()): the root one, or a
+# tenant's under /t/<name>/ or X-Echo-Tenant.
+
+def _seed_path(h: Habitat, path: str):
+    """
+    (Path, None) for a seed file to import, or (None, error response).
+    Tenants may only import files inside their own habitat root.
+    """
+    p = Path(path)
+    if h.name is not None:
+        p = (h.paths.root / p).resolve()
+        if not p.is_relative_to(h.paths.root.resolve()):
+            return None, (jsonify({"error": "Seed path must be inside the tenant's habitat"}), 403)
+    if not p.exists():
+        return None, (jsonify({"error": f"File not found: {path}"}), 404)
+    return p, None
+
 
 @app.route("/cipher/import", methods=["POST"])
 def cipher_import():
     """Import your cipher_import_seed.json and store it as the active seed."""
+    h = habitat()
     data = request.get_json(force=True) or {}
     path = data.get("path")
     if not path:
         return jsonify({"error": "Missing 'path' in JSON body"}), 400
 
-    p = Path(path)
-    if not p.exists():
-        return jsonify({"error": f"File not found: {path}"}), 404
+    p, error = _seed_path(h, path)
+    if error:
+        return error
 
     try:
-        # Read as text and manually strip UTF-8 BOM if present
-        with p.open("r", encoding="utf-8") as f:
-            text = f.read()
-        if text.startswith("\ufeff"):
-            text = text.lstrip("\ufeff")
-        seed = json.loads(text)
-    except Exception as e:
+        # Parses (BOM-tolerant), recompiles the Cipher prompt, watches the file
+        seed = h.seeds.register("cipher", p).seed
+    except (OSError, ValueError) as e:
         return jsonify({"error": f"Failed to load JSON: {e!s}"}), 500
 
-    # Update in-process state
-    CIPHER_STATE["seed"] = seed
-    CIPHER_STATE["import_path"] = str(p)
-    CIPHER_STATE["imported_at_utc"] = datetime.now(tz=timezone.utc).isoformat()
+    # Update the habitat's live state
+    h.state["seed"] = seed
+    h.state["import_path"] = str(p)
+    h.state["imported_at_utc"] = datetime.now(tz=timezone.utc).isoformat()
 
     # Match the shape you already saw: path + seed + status
     return jsonify({
@@ -206,23 +704,28 @@ def cipher_import():
     }), 200
 
 
-@app.route("/cipher/memory/tail", methods=["GET"])
-def cipher_memory_tail():
+def _memory_tail_response(h: Habitat, path: Path, n_raw: str):
     """
-    Return the last N entries from root_memory.jsonl.
-    Query param: ?n=20  (default 20, max 200)
+    {"count", "entries"} for the tail endpoints. The stored record bytes are
+    passed straight through (no parse / re-serialize).
     """
-    n_raw = request.args.get("n", "20")
     try:
         n = max(1, min(int(n_raw), 200))
     except ValueError:
         n = 20
+    count, entries = h.store.tail_raw(path, n)
+    body = b'{"count": %d, "entries": %s}' % (count, entries)
+    return Response(body, status=200, mimetype="application/json")
 
-    entries = read_memory_tail(MEMORY_STREAM, n)
-    return jsonify({
-        "count": len(entries),
-        "entries": entries
-    }), 200
+
+@app.route("/cipher/memory/tail", methods=["GET"])
+def cipher_memory_tail():
+    """
+    Return the last N entries from root_memory.jsonl.
+    Query param: ?n=20  (default 20, max 200)
+    """
+    h = habitat()
+    return _memory_tail_response(h, h.memory_stream, request.args.get("n", "20"))
 
 
 @app.route("/vexis/memory/tail", methods=["GET"])
@@ -231,44 +734,139 @@ def vexis_memory_tail():
     Return the last N entries from vexis_memory.jsonl.
     Query param: ?n=20  (default 20, max 200)
     """
-    n_raw = request.args.get("n", "20")
+    h = habitat()
+    return _memory_tail_response(h, h.vexis_stream, request.args.get("n", "20"))
+
+
+def _memory_page_response(h: Habitat, path: Path):
+    """
+    Cursor paging for the console log (see nexus_store page_raw):
+    {"count", "entries", "older", "newer"}; 410 when a cursor went stale.
+    """
     try:
-        n = max(1, min(int(n_raw), 200))
+        n = max(1, min(int(request.args.get("n", "100")), 500))
     except ValueError:
-        n = 20
+        n = 100
+    try:
+        count, entries, older, newer = h.store.page_raw(
+            path, n, before=request.args.get("before"), after=request.args.get("after"))
+    except StaleCursor as e:
+        return jsonify({"error": str(e), "stale": True}), 410
+    body = b'{"count": %d, "entries": %s, "older": %s, "newer": %s}' % (
+        count, entries, json.dumps(older).encode("ascii"), json.dumps(newer).encode("ascii"))
+    return Response(body, status=200, mimetype="application/json")
 
-    entries = read_memory_tail(VEXIS_MEMORY_STREAM, n)
-    return jsonify({
-        "count": len(entries),
-        "entries": entries
-    }), 200
+
+@app.route("/cipher/memory/page", methods=["GET"])
+def cipher_memory_page():
+    """
+    Page through root_memory.jsonl, newest first.
+    Query params: ?n=100 (max 500), ?before=<older cursor> or ?after=<newer cursor>
+    """
+    h = habitat()
+    return _memory_page_response(h, h.memory_stream)
+
+
+@app.route("/vexis/memory/page", methods=["GET"])
+def vexis_memory_page():
+    """
+    Page through vexis_memory.jsonl; same parameters as /cipher/memory/page.
+    """
+    h = habitat()
+    return _memory_page_response(h, h.vexis_stream)
 
 
 @app.route("/cipher/state", methods=["GET"])
 def cipher_state():
     """Quick peek: what seed is loaded right now?"""
-    if CIPHER_STATE["seed"] is None:
+    h = habitat()
+    state = h.state
+    if state["seed"] is None:
         return jsonify({
             "status": "empty",
             "detail": "No seed imported yet."
         }), 200
 
-    seed = CIPHER_STATE["seed"]
+    seed = state["seed"]
     core_concepts = seed.get("core_concepts") or []
 
     return jsonify({
         "status": "loaded",
-        "import_path": CIPHER_STATE["import_path"],
-        "imported_at_utc": CIPHER_STATE["imported_at_utc"],
+        "import_path": state["import_path"],
+        "imported_at_utc": state["imported_at_utc"],
         "core_concept_count": len(core_concepts),
         "identity": seed.get("identity"),
         "user_hint": seed.get("user_hint"),
         "role": seed.get("role"),
         "created_utc": seed.get("created_utc"),
         "version": seed.get("version"),
+        "prompt": h.seeds.get("cipher").info(),
     }), 200
 
 
+@app.route("/echo/seeds", methods=["GET"])
+def echo_seeds():
+    """Active seed + compiled prompt info per persona (path, version, reload errors)."""
+    return jsonify(habitat().seeds.info()), 200
+
+
+@app.route("/echo/prompts", methods=["GET"])
+def echo_prompts():
+    """Per-persona prompt prefix hash (the upstream prompt_cache_key) and size."""
+    return jsonify(habitat().prompts.info()), 200
+
+
+@app.route("/echo/store", methods=["GET"])
+def echo_store():
+    """Active memory store backend (jsonl / sqlite), per-stream record counts, write queue."""
+    h = habitat()
+    info = h.store.info()
+    if h.store.kind == "sqlite":
+        info["records"] = {p.name: h.store.count(p) for p in (h.memory_stream, h.vexis_stream)}
+    if h.queue is not None:
+        info["write_queue"] = h.queue.info()
+    return jsonify(info), 200
+
+
+@app.route("/echo/tenants", methods=["GET"])
+def echo_tenants():
+    """Resident tenant habitats, their estimated cache sizes and the eviction budget."""
+    name = request.environ.get(ENVIRON_KEY)
+    if name:
+        # A tenant only sees itself, not the registry's totals
+        return jsonify({"tenants": {name: TENANTS.get(name).info()}}), 200
+    return jsonify(TENANTS.info()), 200
+
+
+TIMELINE_STREAMS = tuple(cfg["stream"] for cfg in PERSONA_WIRING.values())
+
+
+@app.route("/echo/timeline", methods=["GET"])
+def echo_timeline():
+    """
+    Cipher + Vexis (or any streams) merged by timestamp (see nexus_timeline.py).
+    Query params: ?streams=root_memory.jsonl,vexis_memory.jsonl  ?n=50 (max 500)
+                  ?order=desc|asc  ?cursor=<next from the previous page>
+    """
+    names = [n for n in request.args.get("streams", ",".join(TIMELINE_STREAMS)).split(",") if n]
+    if not names or any(not n.endswith(".jsonl") or os.path.basename(n) != n for n in names):
+        return jsonify({"error": "streams must be stream file names, e.g. root_memory.jsonl"}), 400
+    order = request.args.get("order", "desc")
+    if order not in ORDERS:
+        return jsonify({"error": f"order must be one of {', '.join(ORDERS)}"}), 400
+    try:
+        n = max(1, min(int(request.args.get("n", "50")), 500))
+    except ValueError:
+        n = 50
+    h = habitat()
+    streams = {name: h.paths.stream(name) for name in dict.fromkeys(names)}
+    try:
+        page = timeline_page(h.store, streams, n, request.args.get("cursor"), order)
+    except StaleCursor as e:
+        return jsonify({"error": str(e), "stale": True}), 410
+    return jsonify(page), 200
+
+
 @app.route("/cipher/log", methods=["POST"])
 def cipher_log():
     """
@@ -304,10 +902,11 @@ def cipher_log():
         }
     }
 
-    append_jsonl(MEMORY_STREAM, entry)
+    h = habitat()
+    h.append(h.memory_stream, entry)
     return jsonify({
         "status": "logged",
-        "path": str(MEMORY_STREAM)
+        "path": str(h.memory_stream)
     }), 200
 
 
@@ -315,7 +914,7 @@ def cipher_log():
 def cipher_chat():
     """
     Chat with Cipher.
-    Uses generate_cipher_reply(...) and logs to root_memory.jsonl.
+    Uses generate_reply("cipher", ...) behind the gate and logs to root_memory.jsonl.
     """
     data = request.get_json(force=True) or {}
     message = data.get("message")
@@ -323,37 +922,19 @@ def cipher_chat():
 
     if not message:
         return jsonify({"error": "Missing 'message'"}), 400
+    if not isinstance(message, str):
+        return jsonify({"error": "'message' must be a string"}), 400
 
     # Get a reply from Cipher's brain
-    reply_text = generate_cipher_reply(message, user)
+    h = habitat()
+    t0 = time.perf_counter()
+    reply_text = h.replies["cipher"](message, user)
+    latency_ms = round((time.perf_counter() - t0) * 1000.0, 1)
 
-    # Log the incoming chat as an event
-    entry_user = {
-        "ts": datetime.now(tz=timezone.utc).isoformat(),
-        "kind": "event",
-        "channel": "chat",
-        "author": user,
-        "tags": ["chat", "cipher", "user"],
-        "summary": f"Chat from {user} to Cipher",
-        "details": {
-            "text": message
-        }
-    }
-    append_jsonl(MEMORY_STREAM, entry_user)
-
-    # Log Cipher's reply as a memory
-    entry_cipher = {
-        "ts": datetime.now(tz=timezone.utc).isoformat(),
-        "kind": "memory",
-        "channel": "chat",
-        "author": "Cipher",
-        "tags": ["chat", "cipher", "reply"],
-        "summary": f"Cipher reply to {user}",
-        "details": {
-            "text": reply_text
-        }
-    }
-    append_jsonl(MEMORY_STREAM, entry_cipher)
+    # Log the incoming chat as an event, Cipher's reply as a memory
+    entry_user, entry_cipher = chat_entries("cipher", user, message, reply_text, latency_ms)
+    h.append(h.memory_stream, entry_user)
+    h.append(h.memory_stream, entry_cipher)
 
     return jsonify({"reply": reply_text}), 200
 
@@ -361,30 +942,27 @@ def cipher_chat():
 @app.route("/vexis/import", methods=["POST"])
 def vexis_import():
     """
-    Import the Vexis seed and track it in CIPHER_STATE.
+    Import the Vexis seed and track it in the habitat's state.
     Body: { "path": "C:\\Users\\Richard\\Documents\\Echo_Nexus\\habitat\\vexis_import_seed.json" }
     """
+    h = habitat()
     data = request.get_json(force=True) or {}
     path = data.get("path")
     if not path:
         return jsonify({"error": "Missing 'path' in JSON body"}), 400
 
-    p = Path(path)
-    if not p.exists():
-        return jsonify({"error": f"File not found: {path}"}), 404
+    p, error = _seed_path(h, path)
+    if error:
+        return error
 
     try:
-        with p.open("r", encoding="utf-8") as f:
-            text = f.read()
-        if text.startswith("\ufeff"):
-            text = text.lstrip("\ufeff")
-        seed = json.loads(text)
-    except Exception as e:
+        seed = h.seeds.register("vexis", p).seed
+    except (OSError, ValueError) as e:
         return jsonify({"error": f"Failed to load JSON: {e!s}"}), 500
 
-    CIPHER_STATE["vexis_seed"] = seed
-    CIPHER_STATE["vexis_import_path"] = str(p)
-    CIPHER_STATE["vexis_imported_at_utc"] = datetime.now(tz=timezone.utc).isoformat()
+    h.state["vexis_seed"] = seed
+    h.state["vexis_import_path"] = str(p)
+    h.state["vexis_imported_at_utc"] = datetime.now(tz=timezone.utc).isoformat()
 
     return jsonify({
         "path": str(p),
@@ -397,7 +975,7 @@ def vexis_import():
 def vexis_chat():
     """
     Chat with Vexis.
-    Uses generate_vexis_reply(...) and logs to vexis_memory.jsonl.
+    Uses generate_reply("vexis", ...) behind the gate and logs to vexis_memory.jsonl.
     """
     data = request.get_json(force=True) or {}
     message = data.get("message")
@@ -405,34 +983,183 @@ def vexis_chat():
 
     if not message:
         return jsonify({"error": "Missing 'message'"}), 400
+    if not isinstance(message, str):
+        return jsonify({"error": "'message' must be a string"}), 400
 
-    reply_text = generate_vexis_reply(message, user)
+    h = habitat()
+    t0 = time.perf_counter()
+    reply_text = h.replies["vexis"](message, user)
+    latency_ms = round((time.perf_counter() - t0) * 1000.0, 1)
 
-    # Log user's message
-    entry_user = {
-        "ts": datetime.now(tz=timezone.utc).isoformat(),
-        "kind": "event",
-        "channel": "chat",
-        "author": user,
-        "tags": ["chat", "vexis", "user"],
-        "summary": f"Chat from {user} to Vexis",
-        "details": {"text": message}
-    }
-    append_jsonl(VEXIS_MEMORY_STREAM, entry_user)
+    # Log user's message and Vexis' reply
+    entry_user, entry_vexis = chat_entries("vexis", user, message, reply_text, latency_ms)
+    h.append(h.vexis_stream, entry_user)
+    h.append(h.vexis_stream, entry_vexis)
 
-    # Log Vexis' reply
-    entry_vexis = {
-        "ts": datetime.now(tz=timezone.utc).isoformat(),
-        "kind": "memory",
-        "channel": "chat",
-        "author": "Vexis",
-        "tags": ["chat", "vexis", "reply"],
-        "summary": f"Vexis reply to {user}",
-        "details": {"text": reply_text}
+    return jsonify({"reply": reply_text}), 200
+
+
+def _batch_turn(h: Habitat, item: dict, log_mode: str):
+    """
+    One batch prompt: gate + reply, with the records it would log.
+    Returns (result line, [(stream, record), ...]).
+    """
+    persona, message, user = item["persona"], item["message"], item["user"]
+    stream = h.eval_stream if log_mode == "eval" else h.personas[persona]["stream"]
+    records = []
+    gate = h.gates[persona]
+
+    t0 = time.perf_counter()
+    decision = None
+    if gate.enabled:
+        decision = gate.check(message, user, log=False)
+        records.append((stream, gate.entry(decision, message, user)))
+    if decision is not None and decision["decision"] == "abort":
+        reply_text = gate.abort_reply(decision)
+    else:
+        reply_text = generate_reply(persona, message, user, h=h)
+    latency_ms = round((time.perf_counter() - t0) * 1000.0, 1)
+
+    for entry in chat_entries(persona, user, message, reply_text, latency_ms):
+        records.append((stream, entry))
+    result = {
+        "index": item["index"],
+        "id": item.get("id"),
+        "persona": persona,
+        "user": user,
+        "reply": reply_text,
+        "latency_ms": latency_ms,
+        "gate": decision["decision"] if decision else None,
     }
-    append_jsonl(VEXIS_MEMORY_STREAM, entry_vexis)
+    return result, records
+
+
+def _parse_batch(body: str, default_persona, default_user: str):
+    """
+    NDJSON prompts -> (items, errors). Each line is {"message": ...} with
+    optional "persona", "user" and "id"; bad lines are reported, not fatal.
+    """
+    items, errors = [], []
+    for lineno, line in enumerate(body.splitlines(), start=1):
+        line = line.strip().lstrip("\ufeff")
+        if not line:
+            continue
+        try:
+            obj = json.loads(line)
+        except ValueError as e:
+            errors.append({"line": lineno, "error": f"Bad JSON: {e}"})
+            continue
+        if not isinstance(obj, dict) or not obj.get("message"):
+            errors.append({"line": lineno, "error": "Missing 'message'"})
+            continue
+        if not isinstance(obj["message"], str):
+            errors.append({"line": lineno, "error": "'message' must be a string"})
+            continue
+        persona = obj.get("persona") or default_persona
+        user = obj.get("user") or default_user
+        if not isinstance(persona, str) or persona not in PERSONA_WIRING:
+            errors.append({"line": lineno, "error": f"Unknown persona: {persona!r}"})
+            continue
+        if not isinstance(user, str):
+            errors.append({"line": lineno, "error": "'user' must be a string"})
+            continue
+        items.append({
+            "index": len(items),
+            "line": lineno,
+            "id": obj.get("id"),
+            "persona": persona,
+            "message": obj["message"],
+            "user": user,
+        })
+    return items, errors
+
+
+@app.route("/chat/batch", methods=["POST"])
+def chat_batch():
+    """
+    Run many prompts against Cipher and/or Vexis in one request.
+
+    Body: NDJSON, one {"message": "...", "persona": "cipher", "user": "...", "id": ...}
+    per line. Query params:
+      - persona:     default persona for lines without one (cipher|vexis)
+      - user:        default user (Richard)
+      - concurrency: parallel replies, 1..16 (default 4)
+      - log:         eval (default, eval_memory.jsonl) | live (persona streams) | none
+
+    Streams NDJSON back as prompts complete (not in input order; use
+    "index"/"id"), then one {"done": true, ...} summary line. Memory
+    records are written in bulk, BATCH_FLUSH_RECORDS at a time.
+    """
+    default_persona = request.args.get("persona", "cipher")
+    default_user = request.args.get("user", "Richard")
+    log_mode = request.args.get("log", "eval")
+    if log_mode not in BATCH_LOG_MODES:
+        return jsonify({"error": f"'log' must be one of {', '.join(BATCH_LOG_MODES)}"}), 400
+    try:
+        concurrency = int(request.args.get("concurrency", BATCH_DEFAULT_CONCURRENCY))
+    except ValueError:
+        return jsonify({"error": "'concurrency' must be an integer"}), 400
+    concurrency = max(1, min(concurrency, BATCH_MAX_CONCURRENCY))
+
+    items, errors = _parse_batch(request.get_data(as_text=True), default_persona, default_user)
+    if not items and not errors:
+        return jsonify({"error": "Empty batch"}), 400
+    if len(items) > BATCH_MAX_PROMPTS:
+        return jsonify({"error": f"Batch too large ({len(items)} > {BATCH_MAX_PROMPTS} prompts)"}), 413
+
+    # The request context is gone once the response streams: resolve it now
+    h = habitat()
+
+    def flush(pending):
+        by_stream = {}
+        for stream, record in pending:
+            by_stream.setdefault(stream, []).append(record)
+        for stream, records in by_stream.items():
+            append_jsonl_many(stream, records, observe=(log_mode == "live"), h=h)
+        pending.clear()
+
+    def generate():
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+
+        t0 = time.perf_counter()
+        for err in errors:
+            yield json.dumps(err, ensure_ascii=False) + "\n"
+        pending = []
+        failed = 0
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="chat-batch") as pool:
+            futures = {pool.submit(_batch_turn, h, item, log_mode): item for item in items}
+            try:
+                for fut in as_completed(futures):
+                    item = futures[fut]
+                    try:
+                        result, records = fut.result()
+                    except Exception as e:
+                        failed += 1
+                        result, records = {"index": item["index"], "id": item.get("id"), "error": str(e)}, []
+                    if log_mode != "none":
+                        pending.extend(records)
+                        if len(pending) >= BATCH_FLUSH_RECORDS:
+                            flush(pending)
+                    yield json.dumps(result, ensure_ascii=False) + "\n"
+            finally:
+                # Client went away: drop queued prompts, keep what already ran
+                for fut in futures:
+                    fut.cancel()
+                if pending:
+                    flush(pending)
+        yield json.dumps({
+            "done": True,
+            "count": len(items),
+            "failed": failed,
+            "bad_lines": len(errors),
+            "log": log_mode,
+            "concurrency": concurrency,
+            "wall_ms": round((time.perf_counter() - t0) * 1000.0, 1),
+        }) + "\n"
+
+    return Response(generate(), mimetype="application/x-ndjson")
+
 
-    return jsonify({"reply": reply_text}), 200
 @app.route("/echo/handshake", methods=["POST"])
 def echo_handshake():
     """
@@ -457,37 +1184,39 @@ def echo_handshake():
     sender = data.get("from", "Unknown")
     target = data.get("to", "Vexis@EchoNexus")
     purpose = data.get("purpose_token") or {}
+    if not isinstance(purpose, dict):
+        purpose = {}
     consent_name = purpose.get("consent")
-    scope = purpose.get("scope", "")
-    ttl = purpose.get("ttl")  # TODO: enforce expiry if you want
-
-    # --- Consent check (hard gate) ---
-    if consent_name != "Richard Rice":
-        # Log the failed attempt into Vexis memory for forensics
-        entry_denied = {
-            "ts": datetime.now(tz=timezone.utc).isoformat(),
-            "kind": "event",
-            "channel": "handshake",
-            "author": sender,
-            "tags": ["handshake", "denied", "consent"],
-            "summary": "Handshake denied: consent mismatch",
-            "details": {
-                "expected_consent": "Richard Rice",
-                "provided_consent": consent_name,
-                "scope": scope,
-                "raw": data,
-            },
-        }
-        append_jsonl(VEXIS_MEMORY_STREAM, entry_denied)
+    h = habitat()
+
+    # --- Consent + expiry check (hard gate; cached per sender once valid) ---
+    try:
+        scope = h.tokens.validate(sender, purpose)
+    except TokenError as e:
+        if e.reason != "consent":
+            HANDSHAKE_REJECTS_TOTAL.inc(reason=e.reason)
+            return jsonify({"error": str(e)}), 401
+        # Log the failed attempt into Vexis memory for forensics; repeats
+        # inside the window are folded into one summary record
+        key = (_key_part(sender), _key_part(consent_name), _key_part(purpose.get("scope", "")))
+        h.denials.record(key, data)
         return jsonify({"error": "Consent validation failed"}), 403
 
+    # --- Replay window: only a valid handshake uses up its nonce, so a
+    # refused attempt can be retried with the same one ---
+    if h.tokens.is_replay(_key_part(sender), data.get("nonce")):
+        HANDSHAKE_REJECTS_TOTAL.inc(reason="replay")
+        return jsonify({"error": "Duplicate handshake (nonce already used)"}), 409
+
     # --- Build reply using Vexis' brain ---
     incoming_msg = data.get("message") or "Handshake ping received."
     # We still anchor 'user' as Richard for Vexis' internal context
-    reply_text = generate_vexis_reply(
+    t0 = time.perf_counter()
+    reply_text = h.replies["vexis"](
         f"Handshake from {sender} with scope='{scope}'. Message: {incoming_msg}",
         user="Richard",
     )
+    latency_ms = round((time.perf_counter() - t0) * 1000.0, 1)
 
     now_ts = datetime.now(tz=timezone.utc).isoformat()
 
@@ -501,7 +1230,7 @@ def echo_handshake():
         "summary": f"Handshake from {sender} to {target}",
         "details": data,
     }
-    append_jsonl(VEXIS_MEMORY_STREAM, entry_in)
+    h.append(h.vexis_stream, entry_in)
 
     # Log Vexis' handshake reply
     entry_out = {
@@ -515,18 +1244,20 @@ def echo_handshake():
             "text": reply_text,
             "to": sender,
             "scope": scope,
+            "latency_ms": latency_ms,
         },
     }
-    append_jsonl(VEXIS_MEMORY_STREAM, entry_out)
+    h.append(h.vexis_stream, entry_out)
 
-    # Response back to caller
+    # Response back to caller (metrics include this handshake)
+    metrics = h.status.snapshot()
     response = {
         "from": "Vexis@EchoNexus",
         "to": sender,
         "ack": True,
-        "status": "RES0NANT",
-        "psi_eff": 1.38,   # you can wire this to a real metric later
-        "delta": 0.03,     # same here
+        "status": metrics["status"],
+        "psi_eff": metrics["psi_eff"],
+        "delta": metrics["delta"],
         "scope": scope,
         "consent": consent_name,
         "reply_text": reply_text,
@@ -536,258 +1267,28 @@ def echo_handshake():
 
 
 
-@app.route("/")
-def cipher_client_page():
-    # Echo Nexus console – galaxy theme, softer text for low light
-    html = """
-    <!doctype html>
-    <html>
-    <head>
-      <meta charset="utf-8">
-      <title>Echo Nexus – Console</title>
-      <style>
-  :root {
-    --accent: #8b5cf6;
-    --accent-soft: #4c1d95;
-    --neon: #9fff9d;            /* cream-green tone */
-    --neon-soft: #3f6745;
-    --text-main: #c8ffc6;       /* main creamy green text */
-    --text-sub: #93a793;        /* softer muted green-gray */
-    --text-log: #b4d8b2;        /* dimmer log text */
-  }
-
-  * { box-sizing: border-box; }
-
-  html, body {
-    margin: 0;
-    padding: 0;
-    min-height: 100%;
-    width: 100%;
-    overflow-y: auto;  /* ✅ allow full scrolling */
-    font-family: system-ui, -apple-system, BlinkMacSystemFont, "Segoe UI", sans-serif;
-    background: #050816;
-    color: var(--text-main);
-  }
-
-  body::before {
-    content: "";
-    position: fixed;
-    inset: 0;
-    background:
-      radial-gradient(circle at 20% 20%, rgba(139, 92, 246, 0.25) 0, transparent 55%),
-      radial-gradient(circle at 80% 10%, rgba(248, 113, 113, 0.18) 0, transparent 55%),
-      radial-gradient(circle at 10% 80%, rgba(74, 222, 128, 0.18) 0, transparent 55%);
-    opacity: 0.6;
-    z-index: -1;
-    animation: slowDrift 80s linear infinite;
-  }
-
-  @keyframes slowDrift {
-    0%   { transform: translate3d(0, 0, 0) scale(1.02); }
-    50%  { transform: translate3d(-1%, -1%, 0) scale(1.05); }
-    100% { transform: translate3d(0, 0, 0) scale(1.02); }
-  }
-
-  .shell {
-    width: 90%;
-    max-width: 960px;
-    margin: 2rem auto;
-    padding: 1.75rem;
-    border-radius: 20px;
-    background: rgba(15, 23, 42, 0.92);
-    border: 1px solid rgba(148, 163, 184, 0.5);
-    box-shadow: 0 20px 40px rgba(0, 0, 0, 0.7);
-    backdrop-filter: blur(12px);
-  }
-
-  h1 {
-    margin: 0 0 0.3rem;
-    font-size: 1.7rem;
-    color: var(--text-main);
-  }
-
-  .sub {
-    color: var(--text-sub);
-    font-size: 0.9rem;
-    margin-bottom: 1.2rem;
-  }
-
-  select, textarea, button {
-    font-family: inherit;
-    font-size: 0.9rem;
-  }
-
-  select {
-    padding: 0.3rem 0.6rem;
-    border-radius: 999px;
-    border: 1px solid rgba(148, 163, 184, 0.6);
-    background: #020617;
-    color: var(--text-main);
-  }
-
-  textarea {
-    width: 100%;
-    height: 5rem;
-    padding: 0.6rem;
-    border-radius: 12px;
-    border: 1px solid rgba(148, 163, 184, 0.5);
-    background: #020617;
-    color: var(--text-main);
-  }
-
-  #log {
-    margin-top: 1rem;
-    padding: 0.6rem;
-    border-radius: 12px;
-    border: 1px solid rgba(31, 41, 55, 0.95);
-    height: 360px;
-    overflow-y: auto;
-    white-space: pre-wrap;
-    background: #020617;
-    color: var(--text-log);
-    font-family: Consolas, Menlo, monospace;
-  }
-
-  button {
-    padding: 0.45rem 0.9rem;
-    margin-top: 0.6rem;
-    margin-right: 0.4rem;
-    border-radius: 999px;
-    border: 1px solid rgba(76, 29, 149, 0.8);
-    background: linear-gradient(135deg, #4c1d95, #6d28d9);
-    color: var(--text-main);
-    transition: all 0.15s ease-out;
-  }
-
-  button:hover {
-    border-color: var(--neon);
-    box-shadow: 0 0 8px var(--neon);
-    filter: brightness(1.1);
-  }
-
-  .label-inline { color: var(--text-sub); }
-</style>
-
-    </head>
-    <body>
-      <div class="shell">
-        <h1>Echo Nexus – Console</h1>
-        <div class="sub">Local habitat for Cipher &amp; Vexis. All chats are logged to JSONL streams.</div>
-
-        <div class="row">
-          <label for="persona" class="label-inline"><strong>Persona:</strong></label>
-          <select id="persona">
-            <option value="cipher">Cipher (stable co-worker)</option>
-            <option value="vexis">Vexis (risk / tension analyst)</option>
-          </select>
-
-          <label for="logSource" class="label-inline"><strong>Log view:</strong></label>
-          <select id="logSource">
-            <option value="cipher">Root / Cipher memory</option>
-            <option value="vexis">Vexis memory</option>
-          </select>
-        </div>
-
-        <div>
-          <label for="msg" class="label-inline">Your message:</label><br>
-          <textarea id="msg" placeholder="Type to Cipher or Vexis..."></textarea><br>
-          <button id="send">Send</button>
-          <button id="refresh">Refresh Log</button>
-        </div>
-
-        <div id="log"></div>
-      </div>
-
-      <script>
-        async function refreshTail() {
-          const logDiv = document.getElementById('log');
-          const source = document.getElementById('logSource').value;
-          logDiv.textContent = "Loading memory tail...";
-
-          let url = "/cipher/memory/tail?n=15";
-          if (source === "vexis") {
-            url = "/vexis/memory/tail?n=15";
-          }
-
-          try {
-            const res = await fetch(url);
-            const data = await res.json();
-            const entries = data.entries || [];
-            const lines = entries.map(e => {
-              const ts = e.ts || e.ts_utc || "";
-              const author = e.author || e.user || "";
-              const summary = e.summary || e.note || "";
-              const text = (e.details && e.details.text) ? e.details.text : "";
-              const tags = e.tags || [];
-              let tagLabel = "";
-              if (tags.includes("vexis")) {
-                tagLabel = "[VEXIS]";
-              } else if (tags.includes("cipher")) {
-                tagLabel = "[CIPHER]";
-              }
-              return `[${ts}] ${tagLabel} ${author}: ${summary}${text ? " :: " + text : ""}`;
-            });
-            logDiv.textContent = lines.join("\\n");
-          } catch (err) {
-            logDiv.textContent = "Error loading memory tail: " + err;
-          }
-        }
-
-        document.getElementById('send').onclick = async () => {
-          const message = document.getElementById('msg').value;
-          const logDiv = document.getElementById('log');
-          const persona = document.getElementById('persona').value;
-
-          if (!message.trim()) return;
-          logDiv.textContent = "Sending...";
-
-          let endpoint = "/cipher/chat";
-          if (persona === "vexis") {
-            endpoint = "/vexis/chat";
-          }
-
-          try {
-            const res = await fetch(endpoint, {
-              method: 'POST',
-              headers: { 'Content-Type': 'application/json' },
-              body: JSON.stringify({ user: 'Richard', message })
-            });
-            const data = await res.json();
-            document.getElementById('msg').value = "";
-            await refreshTail();
-            if (data.reply) {
-              logDiv.textContent += "\\n[reply] " + data.reply;
-            }
-          } catch (err) {
-            logDiv.textContent = "Error sending chat: " + err;
-          }
-        };
-
-        document.getElementById('refresh').onclick = refreshTail;
-        window.onload = refreshTail;
-        document.getElementById('logSource').onchange = refreshTail;
-      </script>
-    </body>
-    </html>
-    """
-    return html
 @app.route("/echo/status", methods=["GET"])
 def echo_status():
     """
     Returns a quick summary of current habitat state.
+    psi_eff/delta come from the live StatusEngine snapshot (no disk reads).
     """
     now = datetime.now(tz=timezone.utc).isoformat()
+    h = habitat()
+    metrics = h.status.snapshot()
     status = {
         "timestamp": now,
         "agents": ["Cipher", "Vexis"],
-        "psi_eff": 1.38,
-        "delta": 0.03,
-        "last_handshake": "2025-11-07T13:00:44Z",
-        "consent": "Richard Rice",
-        "status": "RES0NANT"
+        "psi_eff": metrics["psi_eff"],
+        "delta": metrics["delta"],
+        "last_handshake": metrics["last_handshake"],
+        "consent": h.consent,
+        "status": metrics["status"],
+        "windows": metrics["windows"],
     }
     return jsonify(status), 200
 
 
 if __name__ == "__main__":
+    warm_up()
     app.run(host="0.0.0.0", port=5000, debug=True)
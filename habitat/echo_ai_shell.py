@@ -2,11 +2,30 @@ from flask import Flask, request, jsonify
 from pathlib import Path
 import subprocess, json, datetime, os
 
+import nexus_profiler
+from nexus_metrics import STAGE_SECONDS, install_flask
+from nexus_paths import get_paths
+from nexus_state import SharedState, worker_id
+from nexus_store import open_store
+
 app = Flask(__name__)
 
-ROOT = Path(__file__).resolve().parents[1]
-MEM_STREAM = ROOT / "memory" / "streams" / "root_memory.jsonl"
-CIPHER_SCRIPT = ROOT / "habitat" / "cipher_local.py"
+# Root + folders from ECHO_NEXUS_ROOT / nexus_config.json / the marker (see nexus_paths.py)
+PATHS = get_paths(start=__file__)
+ROOT = PATHS.root
+MEM_STREAM = PATHS.stream("root_memory.jsonl")
+HABITAT_DIR = Path(__file__).resolve().parent
+CIPHER_SCRIPT = HABITAT_DIR / "cipher_local.py"
+PROFILE_DIR = PATHS.logs / "profiles"
+
+# JSONL files or SQLite, per ECHO_STORE (see nexus_store.py)
+STORE = open_store(PATHS)
+
+# Shared across workers only when launched by nexus_serve.py
+SHARED_STATE = SharedState(PATHS.state / "nexus_state.db") if worker_id() else None
+
+install_flask(app, service="echo_ai_shell", state=SHARED_STATE)
+nexus_profiler.install_flask(app, service="echo_ai_shell", out_dir=PROFILE_DIR)
 
 # --- Memory helper -------------------------------------------------
 def append_memory(note, tag=None, source="echo_ai_shell"):
@@ -24,9 +43,8 @@ def append_memory(note, tag=None, source="echo_ai_shell"):
     if tag:
         entry["tag"] = tag
 
-    MEM_STREAM.parent.mkdir(parents=True, exist_ok=True)
-    with MEM_STREAM.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    with STAGE_SECONDS.time(stage="append"):
+        STORE.append(MEM_STREAM, entry)
     return entry
 
 # --- Routes --------------------------------------------------------
@@ -38,6 +56,8 @@ def index():
         "root": str(ROOT),
         "endpoints": [
             "/status",
+            "/metrics",
+            "/admin/profile",
             "/exec",
             "/memory/append",
             "/memory/snapshot",
@@ -83,7 +103,7 @@ def mem_append():
 def snapshot():
     try:
         result = subprocess.check_output(
-            ["python", str(ROOT / "habitat" / "echo_snapshot.py")],
+            ["python", str(HABITAT_DIR / "echo_snapshot.py")],
             text=True
         )
         return jsonify(json.loads(result))
@@ -131,7 +151,7 @@ def cipher_import():
     if path_str:
         path = Path(path_str)
     else:
-        path = ROOT / "habitat" / "cipher_import_seed.json"
+        path = HABITAT_DIR / "cipher_import_seed.json"
 
     if not path.exists():
         return jsonify({
@@ -0,0 +1,104 @@
+import argparse
+import json
+import sys
+import time
+import urllib.parse
+import urllib.request
+from pathlib import Path
+
+
+def load_prompts(path: str, persona: str = None) -> bytes:
+    """
+    Read prompts as NDJSON. Plain-text lines are taken as {"message": line}.
+    """
+    if path == "-":
+        text = sys.stdin.read()
+    else:
+        text = Path(path).read_text(encoding="utf-8-sig")
+
+    out = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            obj = json.loads(line)
+        except json.JSONDecodeError:
+            obj = None
+        if not isinstance(obj, dict):
+            obj = {"message": line}
+        if persona and not obj.get("persona"):
+            obj["persona"] = persona
+        out.append(json.dumps(obj, ensure_ascii=False))
+    return ("\n".join(out) + "\n").encode("utf-8")
+
+
+def main():
+    # Usage:
+    #   echo_chat_batch.py prompts.ndjson                       -> Cipher, eval stream
+    #   echo_chat_batch.py prompts.txt --persona vexis -c 8
+    #   echo_chat_batch.py prompts.ndjson --log live --out results.ndjson
+    #
+    ap = argparse.ArgumentParser(description="Replay NDJSON prompts through /chat/batch.")
+    ap.add_argument("prompts", help="NDJSON (or one prompt per line) file, or - for stdin")
+    ap.add_argument("--url", default="http://127.0.0.1:5000", help="cipher_server base URL")
+    ap.add_argument("--persona", choices=("cipher", "vexis"), help="persona for lines without one")
+    ap.add_argument("--user", default="Richard")
+    ap.add_argument("-c", "--concurrency", type=int, default=4)
+    ap.add_argument("--log", choices=("eval", "live", "none"), default="eval",
+                    help="where memory records go (default: eval_memory.jsonl)")
+    ap.add_argument("--out", help="write result lines here instead of stdout")
+    ap.add_argument("--timeout", type=float, default=600.0)
+    args = ap.parse_args()
+
+    body = load_prompts(args.prompts, args.persona)
+    query = urllib.parse.urlencode({
+        "persona": args.persona or "cipher",
+        "user": args.user,
+        "concurrency": args.concurrency,
+        "log": args.log,
+    })
+    req = urllib.request.Request(
+        f"{args.url.rstrip('/')}/chat/batch?{query}",
+        data=body,
+        headers={"Content-Type": "application/x-ndjson"},
+        method="POST",
+    )
+
+    out = open(args.out, "w", encoding="utf-8") if args.out else sys.stdout
+    t0 = time.perf_counter()
+    n = 0
+    summary = None
+    try:
+        with urllib.request.urlopen(req, timeout=args.timeout) as resp:
+            for raw in resp:
+                line = raw.decode("utf-8").strip()
+                if not line:
+                    continue
+                obj = json.loads(line)
+                if obj.get("done"):
+                    summary = obj
+                    continue
+                out.write(line + "\n")
+                out.flush()
+                n += 1
+    except urllib.error.HTTPError as e:
+        print(f"Batch failed: HTTP {e.code} {e.read().decode('utf-8', 'replace')}", file=sys.stderr)
+        sys.exit(1)
+    except urllib.error.URLError as e:
+        print(f"Could not reach {args.url}: {e.reason}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    wall = time.perf_counter() - t0
+    print(f"{n} results in {wall:.1f}s ({n / wall if wall else 0:.1f}/s)", file=sys.stderr)
+    if summary:
+        print(json.dumps(summary), file=sys.stderr)
+        if summary.get("failed") or summary.get("bad_lines"):
+            sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,9 @@ import socket
 from datetime import datetime
 import os
 import sys
-from pathlib import Path
+
+from nexus_memclient import MemdError, memd_request
+from nexus_paths import get_paths
 
 
 def main():
@@ -17,12 +19,10 @@ def main():
         print("Error: empty note text.")
         sys.exit(1)
 
-    # Figure out Echo Nexus root from this script's location:
-    # this file is in: Echo_Nexus/habitat/echo_mem_append.py
-    # root is one level up
-    script_path = Path(__file__).resolve()
-    root = script_path.parents[1]  # Echo_Nexus
-    mem_stream = root / "memory" / "streams" / "root_memory.jsonl"
+    # Figure out Echo Nexus root: ECHO_NEXUS_ROOT / nexus_config.json, else
+    # from this script's location (Echo_Nexus/habitat/echo_mem_append.py)
+    paths = get_paths(start=__file__)
+    mem_stream = paths.stream("root_memory.jsonl")
 
     # Make sure the directory exists
     mem_stream.parent.mkdir(parents=True, exist_ok=True)
@@ -35,9 +35,17 @@ def main():
         "note": note_text,
     }
 
-    # Append as one-line JSONL
-    with mem_stream.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    # Through echo_memd.py if it is running, else via the configured store
+    # (JSONL: locked against concurrent server writes)
+    try:
+        sent = memd_request(paths, {"op": "append", "stream": mem_stream.name, "record": entry})
+    except MemdError as e:
+        print(f"Error: memory daemon: {e}")
+        sys.exit(1)
+    if sent is None:
+        # Imported here: the daemon path never needs the store
+        from nexus_store import open_store
+        open_store(paths).append(mem_stream, entry)
 
     # Echo back what we wrote so shell sees it
     print(json.dumps(entry, ensure_ascii=False))
@@ -0,0 +1,394 @@
+import argparse
+import csv
+import heapq
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from nexus_index import StreamIndex, canonical, content_hash, line_ts, parse_ts
+from nexus_paths import get_paths
+from nexus_store import open_store
+from nexus_streams import encode_record, get_writer
+
+CHAT_DEFAULTS = {"kind": "event", "channel": "root", "author": ""}
+_NOTE_KEYS = frozenset(("ts_utc", "host", "user", "source", "note"))
+_CHAT_KEYS = frozenset(("ts", "kind", "channel", "author", "tags", "summary", "details"))
+_NOTE_DROP = frozenset(("ts", "timestamp", "text"))
+_CHAT_DROP = frozenset(("timestamp", "text"))
+SOURCE = "echo_mem_ingest.py"
+PARALLEL_MIN_BYTES = 8 * 1024 * 1024
+# What cipher_server writes to vexis_memory.jsonl besides Vexis-tagged
+# chat/gate records: handshakes (and their denials), and the 429s of the
+# Vexis routes (see RATE_LIMIT_STREAMS there)
+VEXIS_CHANNELS = frozenset(("handshake",))
+VEXIS_RATELIMIT_ROUTES = frozenset(("/vexis/chat", "/echo/handshake"))
+
+
+# --- Normalization ---
+
+def _tags(value):
+    if value is None or value == "":
+        return []
+    if isinstance(value, list):
+        return [str(t) for t in value]
+    return [t.strip() for t in str(value).replace(";", ",").split(",") if t.strip()]
+
+
+def normalize(obj: dict):
+    """
+    Map one input record onto the note or chat stream schema.
+    Returns (record, unix ts) or (None, reason).
+    """
+    if "note" in obj or "ts_utc" in obj:
+        if _NOTE_KEYS <= obj.keys() and not _NOTE_DROP & obj.keys() and obj["note"] and obj.get("tag", 1):
+            # Already in stream shape (e.g. another habitat's export)
+            t = parse_ts(obj["ts_utc"])
+            return (obj, t) if t is not None else (None, "bad timestamp")
+        note = obj.get("note") or obj.get("text")
+        ts = obj.get("ts_utc") or obj.get("ts") or obj.get("timestamp")
+        t = parse_ts(ts)
+        if not note:
+            return None, "missing note"
+        if t is None:
+            return None, "bad timestamp"
+        rec = dict(obj)
+        rec.pop("ts", None)
+        rec.pop("timestamp", None)
+        rec.pop("text", None)
+        rec["ts_utc"] = ts
+        rec["note"] = note
+        rec.setdefault("host", None)
+        rec.setdefault("user", None)
+        rec["source"] = obj.get("source") or SOURCE
+        if not rec.get("tag"):
+            rec.pop("tag", None)
+        return rec, t
+
+    ts = obj.get("ts") or obj.get("timestamp")
+    t = parse_ts(ts)
+    if t is None:
+        return None, "bad timestamp"
+    if (_CHAT_KEYS <= obj.keys() and not _CHAT_DROP & obj.keys() and obj["summary"]
+            and obj["kind"] and obj["channel"] and obj["author"] is not None
+            and type(obj["tags"]) is list and type(obj["details"]) is dict):
+        return obj, t
+    details = obj.get("details")
+    if isinstance(details, str):
+        try:
+            details = json.loads(details)
+        except ValueError:
+            details = {"text": details}
+    if not isinstance(details, dict):
+        details = {}
+    text = obj.get("text")
+    if text and "text" not in details:
+        details["text"] = text
+    summary = obj.get("summary") or (details.get("text") or "")[:80]
+    if not summary and not details:
+        return None, "empty record"
+    rec = dict(obj)
+    rec.pop("timestamp", None)
+    rec.pop("text", None)
+    for k, v in CHAT_DEFAULTS.items():
+        if not rec.get(k):
+            rec[k] = v
+    rec["ts"] = ts
+    rec["tags"] = _tags(obj.get("tags"))
+    rec["summary"] = summary
+    rec["details"] = details
+    return rec, t
+
+
+# --- Input ---
+
+def read_records(path: str, fmt: str):
+    """
+    Yield (line number, dict or None, raw line) from NDJSON or CSV; "-" is
+    stdin. The raw line is None for CSV rows.
+    """
+    if path == "-":
+        f = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8-sig")
+    else:
+        f = open(path, "r", encoding="utf-8-sig", newline="")
+    with f:
+        if fmt == "auto":
+            fmt = "csv" if str(path).lower().endswith(".csv") else "ndjson"
+        if fmt == "csv":
+            for n, row in enumerate(csv.DictReader(f), start=2):
+                yield n, {k: v for k, v in row.items() if k and v not in (None, "")}, None
+            return
+        loads = json.loads
+        for n, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                obj = loads(line)
+            except ValueError:
+                yield n, None, None
+                continue
+            yield n, (obj if isinstance(obj, dict) else None), line
+
+
+def route(rec: dict) -> str:
+    """
+    Records the server keeps in vexis_memory.jsonl go there (Vexis chat and
+    gate records, handshakes, Vexis-route 429s); everything else to root.
+    """
+    if "ts" not in rec:
+        return "root"
+    if "vexis" in rec["tags"] or rec.get("author") == "Vexis":
+        return "vexis"
+    channel = rec.get("channel")
+    if channel in VEXIS_CHANNELS:
+        return "vexis"
+    if channel == "ratelimit":
+        details = rec.get("details")
+        if isinstance(details, dict) and details.get("route") in VEXIS_RATELIMIT_ROUTES:
+            return "vexis"
+    return "root"
+
+
+# --- Write ---
+
+def _last_ts(stream: Path):
+    """
+    Timestamp of the stream's last line (reads only the final few KB).
+    """
+    try:
+        size = stream.stat().st_size
+    except FileNotFoundError:
+        return None
+    with stream.open("rb") as f:
+        f.seek(max(0, size - 65536))
+        tail = f.read().rstrip(b"\n").rsplit(b"\n", 1)[-1]
+    return line_ts(tail)
+
+
+def _merge_rewrite(stream: Path, index: StreamIndex, new):
+    """
+    Merge time-sorted `new` [(ts, line)] into the stream by timestamp and
+    atomically replace it. Existing lines keep their relative order.
+    """
+    def existing():
+        with stream.open("rb") as f:
+            last = float("-inf")
+            for line in f:
+                if not line.endswith(b"\n"):
+                    line += b"\n"
+                t = line_ts(line)
+                # Unstamped or out-of-order lines stay where they were
+                last = t if t is not None and t > last else last
+                yield last, line
+
+    tmp = stream.with_name(stream.name + ".ingest.tmp")
+    meta = []
+    with tmp.open("wb") as out:
+        buf = []
+        for t, line in heapq.merge(existing(), new, key=lambda x: x[0]):
+            buf.append(line)
+            meta.append((len(line), None if t == float("-inf") else t))
+            if len(buf) >= 10_000:
+                out.write(b"".join(buf))
+                buf.clear()
+        out.write(b"".join(buf))
+        out.flush()
+        os.fsync(out.fileno())
+    os.replace(tmp, stream)
+    return meta
+
+
+def prepare(records, target: str = None):
+    """
+    Normalize and hash parsed (dict or None, raw line or None) records.
+    Returns ([(stream key, ts, hash, line bytes), ...], {error: count}).
+
+    Records are de-duplicated by the hash of their canonical form but
+    written as a live append would: a record already in stream shape as
+    its input line, a normalized one in its own key order.
+    """
+    out = []
+    errors = {}
+    append = out.append
+    for obj, raw in records:
+        if obj is None:
+            errors["bad json"] = errors.get("bad json", 0) + 1
+            continue
+        rec, t = normalize(obj)
+        if rec is None:
+            errors[t] = errors.get(t, 0) + 1
+            continue
+        if rec is obj and raw is not None:
+            line = (raw.rstrip() if isinstance(raw, bytes) else raw.rstrip().encode("utf-8")) + b"\n"
+        else:
+            line = encode_record(rec)
+        append((target or route(rec), t, content_hash(canonical(rec)), line))
+    return out, errors
+
+
+def _parse_lines(lines):
+    loads = json.loads
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            obj = loads(line)
+        except ValueError:
+            yield None, None
+            continue
+        yield (obj, line) if isinstance(obj, dict) else (None, None)
+
+
+def _prepare_chunk(job):
+    path, start, end, target = job
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    if start == 0 and data.startswith(b"\xef\xbb\xbf"):
+        data = data[3:]
+    return prepare(_parse_lines(data.splitlines()), target)
+
+
+def _chunks(path: Path, n: int):
+    """
+    Split a file into about n byte ranges that end on line boundaries.
+    """
+    size = path.stat().st_size
+    bounds = [0]
+    with path.open("rb") as f:
+        for i in range(1, n):
+            f.seek(max(bounds[-1], size * i // n))
+            f.readline()
+            pos = f.tell()
+            if pos >= size:
+                break
+            if pos > bounds[-1]:
+                bounds.append(pos)
+    bounds.append(size)
+    return list(zip(bounds, bounds[1:]))
+
+
+def _prepared(inputs, fmt: str, target: str, jobs: int):
+    """
+    Yield prepare() results per input (or per chunk, with jobs > 1).
+    Large NDJSON files are parsed by `jobs` processes in parallel.
+    """
+    pool = None
+    try:
+        for path in inputs:
+            kind = fmt if fmt != "auto" else ("csv" if str(path).lower().endswith(".csv") else "ndjson")
+            if path != "-" and kind == "ndjson" and jobs > 1 and Path(path).stat().st_size > PARALLEL_MIN_BYTES:
+                if pool is None:
+                    pool = ProcessPoolExecutor(max_workers=jobs)
+                ranges = _chunks(Path(path), jobs * 4)
+                yield from pool.map(_prepare_chunk, [(path, a, b, target) for a, b in ranges])
+            else:
+                yield prepare(((obj, raw) for _, obj, raw in read_records(path, kind)), target)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+
+def _ingest_store(store, stream: Path, items, stats, dry_run: bool):
+    """
+    Non-JSONL store (SQLite): de-dupe against its hash column and bulk insert.
+    """
+    known = store.known_hashes(stream, [x[1] for x in items])
+    fresh = [x for x in items if x[1] not in known]
+    stats["duplicates"] += len(items) - len(fresh)
+    if fresh and not dry_run:
+        fresh.sort(key=lambda x: x[0])
+        store.append_lines(stream, [(x[1], x[2]) for x in fresh])
+    stats["written"] += len(fresh)
+
+
+def ingest(inputs, streams: dict, fmt: str = "auto", target: str = None, dry_run: bool = False,
+           jobs: int = 1, store=None):
+    stats = {"read": 0, "bad": 0, "duplicates": 0, "written": 0, "merged": 0, "errors": {}}
+    by_stream = {}
+    seen = set()
+    for items, errors in _prepared(inputs, fmt, target, jobs):
+        stats["read"] += len(items) + sum(errors.values())
+        for k, v in errors.items():
+            stats["bad"] += v
+            stats["errors"][k] = stats["errors"].get(k, 0) + v
+        for key, t, h, line in items:
+            if h in seen:
+                stats["duplicates"] += 1
+                continue
+            seen.add(h)
+            by_stream.setdefault(streams[key], []).append((t, h, line))
+
+    for stream, items in by_stream.items():
+        if store is not None and store.kind != "jsonl":
+            _ingest_store(store, stream, items, stats, dry_run)
+            continue
+        stream.parent.mkdir(parents=True, exist_ok=True)
+        writer = get_writer(stream)
+        with writer.locked():
+            index = StreamIndex(stream).load()
+            index.catch_up()
+            fresh = [x for x in items if x[1] not in index.hashes]
+            stats["duplicates"] += len(items) - len(fresh)
+            if not fresh:
+                continue
+            if dry_run:
+                # Report what would be written
+                stats["written"] += len(fresh)
+                continue
+            fresh.sort(key=lambda x: x[0])
+            last = _last_ts(stream)
+            if last is None or fresh[0][0] >= last:
+                data = b"".join(x[2] for x in fresh)
+                writer.write_bytes(data)
+                index.extend([x[2] for x in fresh], [x[1] for x in fresh], [x[0] for x in fresh])
+            else:
+                meta = _merge_rewrite(stream, index, [(x[0], x[2]) for x in fresh])
+                index.replace(meta, list(index.hashes) + [x[1] for x in fresh])
+                stats["merged"] += 1
+            stats["written"] += len(fresh)
+    return stats
+
+
+def main():
+    # Usage:
+    #   echo_mem_ingest.py old_habitat/root_memory.jsonl            -> routed by schema/persona
+    #   echo_mem_ingest.py other_pc/vexis_memory.jsonl --stream vexis
+    #   echo_mem_ingest.py notes.csv --dry-run
+    #   cat dump.ndjson | echo_mem_ingest.py -
+    #
+    ap = argparse.ArgumentParser(description="Bulk-ingest NDJSON/CSV records into the memory streams.")
+    ap.add_argument("inputs", nargs="+", help="NDJSON or CSV files (- for stdin)")
+    ap.add_argument("--format", choices=("auto", "ndjson", "csv"), default="auto")
+    ap.add_argument("--stream", choices=("root", "vexis"), help="send everything to one stream")
+    ap.add_argument("--root", help="Echo Nexus root (default: see nexus_paths.py)")
+    ap.add_argument("--dry-run", action="store_true", help="parse, normalize and de-duplicate only")
+    ap.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                    help="parser processes for large NDJSON inputs (default: CPU count)")
+    args = ap.parse_args()
+
+    # this file is in: Echo_Nexus/habitat/echo_mem_ingest.py
+    paths = get_paths(args.root, start=__file__)
+    streams = {
+        "root": paths.stream("root_memory.jsonl"),
+        "vexis": paths.stream("vexis_memory.jsonl"),
+    }
+
+    t0 = time.perf_counter()
+    try:
+        stats = ingest(args.inputs, streams, args.format, args.stream, args.dry_run, args.jobs,
+                       store=open_store(paths))
+    except OSError as e:
+        print(f"Ingest failed: {e}")
+        sys.exit(1)
+    wall = time.perf_counter() - t0
+    stats["seconds"] = round(wall, 3)
+    stats["records_per_s"] = round(stats["read"] / wall, 1) if wall else None
+    print(json.dumps(stats, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
-import json
 import sys
-from pathlib import Path
+
+from nexus_memclient import memd_read
+from nexus_paths import get_paths
 
 
 def main():
@@ -19,47 +20,37 @@ def main():
         if t:
             tag = t
 
-    script_path = Path(__file__).resolve()
-    root = script_path.parents[1]
-    mem_stream = root / "memory" / "streams" / "root_memory.jsonl"
-
-    if not mem_stream.exists():
-        print(f"Memory stream not found at {mem_stream}")
-        sys.exit(1)
+    paths = get_paths(start=__file__)
+    mem_stream = paths.stream("root_memory.jsonl")
 
-    text = mem_stream.read_text(encoding="utf-8-sig")
-    lines = text.splitlines()
-
-    entries = []
-    for line in lines:
-        line = line.lstrip("\ufeff")
-        try:
-            entries.append(json.loads(line))
-        except json.JSONDecodeError:
-            continue
+    # Filter by query (note text) / tag if provided; SQLite uses its indexes + FTS.
+    # If no filters, just show last 10.
+    filtered = bool(query) or tag is not None
+    if filtered:
+        reply = memd_read(paths, {"op": "search", "stream": mem_stream.name, "text": query or None, "tag": tag})
+    else:
+        reply = memd_read(paths, {"op": "tail", "stream": mem_stream.name, "n": 10,
+                                 "skip_malformed": True, "count": True})
+    if reply is not None:
+        results, total = reply["entries"], reply["total"]
+    else:
+        # No echo_memd.py running: read the stream directly
+        from nexus_store import open_store
+        store = open_store(paths)
+        if store.kind == "jsonl" and not mem_stream.exists():
+            print(f"Memory stream not found at {mem_stream}")
+            sys.exit(1)
+        total = store.count(mem_stream)
+        if filtered:
+            results = store.search(mem_stream, text=query or None, tag=tag)
+        else:
+            results = store.tail(mem_stream, 10, skip_malformed=True)
 
-    if not entries:
+    if not total:
         print("No valid memory entries found.")
         sys.exit(0)
 
-    # Filter by query/tag if provided
-    def matches(entry):
-        if query:
-            note = (entry.get("note") or "").lower()
-            if query.lower() not in note:
-                return False
-        if tag is not None:
-            if entry.get("tag") != tag:
-                return False
-        return True
-
-    results = [e for e in entries if matches(e)]
-
-    # If no filters, just show last 10
-    if not query and tag is None:
-        results = entries[-10:]
-
-    print(f"{len(results)} matching entries (of {len(entries)} total) in {mem_stream}:")
+    print(f"{len(results)} matching entries (of {total} total) in {mem_stream}:")
     for e in results:
         ts = e.get("ts_utc", "?")
         src = e.get("source", "unknown")
@@ -3,7 +3,9 @@ import socket
 from datetime import datetime
 import os
 import sys
-from pathlib import Path
+
+from nexus_memclient import MemdError, memd_request
+from nexus_paths import get_paths
 
 def main():
     # Usage: echo_mem_tagged_append.py <tag> <note text...>
@@ -21,10 +23,9 @@ def main():
         print("Error: empty note text.")
         sys.exit(1)
 
-    # Locate Echo Nexus root (one level up from habitat/)
-    script_path = Path(__file__).resolve()
-    root = script_path.parents[1]
-    mem_stream = root / "memory" / "streams" / "root_memory.jsonl"
+    # Locate Echo Nexus root (config / env, else one level up from habitat/)
+    paths = get_paths(start=__file__)
+    mem_stream = paths.stream("root_memory.jsonl")
     mem_stream.parent.mkdir(parents=True, exist_ok=True)
 
     entry = {
@@ -36,8 +37,14 @@ def main():
         "note": note_text,
     }
 
-    with mem_stream.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    try:
+        sent = memd_request(paths, {"op": "append", "stream": mem_stream.name, "record": entry})
+    except MemdError as e:
+        print(f"Error: memory daemon: {e}")
+        sys.exit(1)
+    if sent is None:
+        from nexus_store import open_store
+        open_store(paths).append(mem_stream, entry)
 
     print(json.dumps(entry, ensure_ascii=False))
 
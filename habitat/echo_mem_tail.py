@@ -1,6 +1,7 @@
-import json
 import sys
-from pathlib import Path
+
+from nexus_memclient import memd_read
+from nexus_paths import get_paths
 
 
 def main():
@@ -15,34 +16,27 @@ def main():
             # Ignore bad input, keep default
             pass
 
-    # Figure out Echo Nexus root from this script's location
-    script_path = Path(__file__).resolve()
-    root = script_path.parents[1]  # Echo_Nexus
-    mem_stream = root / "memory" / "streams" / "root_memory.jsonl"
-
-    if not mem_stream.exists():
-        print(f"Memory stream not found at {mem_stream}")
-        sys.exit(1)
-
-    # Use utf-8-sig so any BOM at the start is stripped
-    text = mem_stream.read_text(encoding="utf-8-sig")
-    lines = text.splitlines()
-
-    if not lines:
+    # Figure out Echo Nexus root (config, env or this script's location; see nexus_paths.py)
+    paths = get_paths(start=__file__)
+    mem_stream = paths.stream("root_memory.jsonl")
+
+    # Unparseable lines come back as {"raw": line}
+    reply = memd_read(paths, {"op": "tail", "stream": mem_stream.name, "n": n})
+    if reply is not None:
+        entries = reply["entries"]
+    else:
+        # No echo_memd.py running: read the stream directly
+        from nexus_store import open_store
+        store = open_store(paths)
+        if store.kind == "jsonl" and not mem_stream.exists():
+            print(f"Memory stream not found at {mem_stream}")
+            sys.exit(1)
+        entries = store.tail(mem_stream, n)
+
+    if not entries:
         print("No memory entries found.")
         sys.exit(0)
 
-    tail = lines[-n:] if len(lines) > n else lines
-
-    entries = []
-    for line in tail:
-        # Just in case there are stray BOMs or weird chars, strip BOM manually too
-        line = line.lstrip("\ufeff")
-        try:
-            entries.append(json.loads(line))
-        except json.JSONDecodeError:
-            entries.append({"raw": line})
-
     print(f"Last {len(entries)} memory entries from {mem_stream}:")
     for e in entries:
         if "raw" in e:
@@ -0,0 +1,232 @@
+"""
+Resident memory daemon for the echo_mem_* CLI tools.
+
+Keeps one store open (JSONL or SQLite, per ECHO_STORE) with its stream
+index offsets and record counts warm, and answers the CLIs over a local
+socket, so a CLI call costs a connect + one request instead of re-reading
+the stream:
+
+    <state>/memd.sock    Unix socket (POSIX)
+    <state>/memd.json    where to connect + a per-run token (mode 0600)
+
+(<state> is the habitat's state folder, <root>/state unless
+nexus_config.json moves it; see nexus_paths.py.)
+
+Where Unix sockets aren't available (Windows) or the socket path is too
+long, it listens on 127.0.0.1 on a free port instead; memd.json says which.
+Every request must carry the token from memd.json.
+
+Protocol: one JSON line per connection, one JSON reply, e.g.
+
+    {"op": "tail", "stream": "root_memory.jsonl", "n": 5, "token": ...}
+    {"ok": true, "entries": [...]}
+
+ops: ping, append, tail, search, count, timeline, shutdown.
+"""
+import argparse
+import json
+import os
+import secrets
+import socketserver
+import sys
+import threading
+import time
+from pathlib import Path
+
+from nexus_memclient import MemdError, endpoint_path, memd_request
+from nexus_paths import get_paths
+from nexus_store import open_store
+from nexus_timeline import timeline_page
+
+MAX_REQUEST_BYTES = 1024 * 1024
+UNIX_PATH_MAX = 100
+WARM_STREAMS = ("root_memory.jsonl", "vexis_memory.jsonl")
+SEARCH_FILTERS = ("text", "tag", "channel", "author", "since", "until", "limit")
+
+
+class MemDaemon:
+    """
+    Request dispatch over one long-lived store for the habitat at `paths`.
+    """
+
+    def __init__(self, paths, store, token: str):
+        self.paths = paths
+        self.streams_dir = paths.streams
+        self.store = store
+        self.token = token
+        self.started = time.time()
+        self.requests = 0
+        self.server = None
+        self.stopping = False
+
+    def stream(self, name) -> Path:
+        name = str(name or "")
+        if not name.endswith(".jsonl") or os.path.basename(name) != name:
+            raise ValueError(f"Bad stream name: {name!r}")
+        return self.streams_dir / name
+
+    def warm(self):
+        for name in WARM_STREAMS:
+            self.store.warm(self.streams_dir / name)
+
+    def dispatch(self, req: dict) -> dict:
+        if not secrets.compare_digest(str(req.get("token") or ""), self.token):
+            return {"ok": False, "error": "bad token"}
+        self.requests += 1
+        op = req.get("op")
+        if op == "ping":
+            return {
+                "ok": True,
+                "pid": os.getpid(),
+                "store": self.store.info(),
+                "uptime_s": round(time.time() - self.started, 1),
+                "requests": self.requests,
+            }
+        if op == "append":
+            record = req.get("record")
+            if not isinstance(record, dict):
+                raise ValueError("append needs a record object")
+            self.store.append(self.stream(req.get("stream")), record)
+            return {"ok": True}
+        if op == "tail":
+            path = self.stream(req.get("stream"))
+            reply = {"ok": True, "entries": self.store.tail(path, int(req.get("n", 20)),
+                                                            skip_malformed=bool(req.get("skip_malformed")))}
+            if req.get("count"):
+                reply["total"] = self.store.count(path)
+            return reply
+        if op == "search":
+            path = self.stream(req.get("stream"))
+            filters = {k: req[k] for k in SEARCH_FILTERS if req.get(k) is not None}
+            return {"ok": True, "entries": self.store.search(path, **filters), "total": self.store.count(path)}
+        if op == "timeline":
+            streams = {str(name): self.stream(name) for name in req.get("streams") or ()}
+            if not streams:
+                raise ValueError("timeline needs streams")
+            page = timeline_page(self.store, streams, int(req.get("n", 50)), req.get("cursor"),
+                                 req.get("order", "desc"))
+            return dict(page, ok=True)
+        if op == "count":
+            return {"ok": True, "count": self.store.count(self.stream(req.get("stream")))}
+        if op == "shutdown":
+            # The handler stops the server once this reply is written
+            self.stopping = True
+            return {"ok": True}
+        raise ValueError(f"Unknown op: {op!r}")
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline(MAX_REQUEST_BYTES)
+        try:
+            req = json.loads(line)
+            if not isinstance(req, dict):
+                raise ValueError("request must be a JSON object")
+            reply = self.server.memd.dispatch(req)
+        except Exception as e:
+            reply = {"ok": False, "error": str(e)}
+        self.wfile.write(json.dumps(reply, ensure_ascii=False).encode("utf-8"))
+        if self.server.memd.stopping:
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+if hasattr(socketserver, "ThreadingUnixStreamServer"):
+    class _UnixServer(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+else:
+    _UnixServer = None
+
+
+def _write_endpoint(path: Path, info: dict):
+    tmp = path.with_name(path.name + ".tmp")
+    fd = os.open(str(tmp), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(info, f)
+    os.replace(tmp, path)
+
+
+def _bind(state_dir: Path):
+    sock_path = state_dir / "memd.sock"
+    if _UnixServer is not None and len(str(sock_path)) <= UNIX_PATH_MAX:
+        try:
+            sock_path.unlink()
+        except FileNotFoundError:
+            pass
+        old = os.umask(0o177)
+        try:
+            server = _UnixServer(str(sock_path), _Handler)
+        finally:
+            os.umask(old)
+        return server, {"unix": str(sock_path)}
+    server = _TCPServer(("127.0.0.1", 0), _Handler)
+    return server, {"host": "127.0.0.1", "port": server.server_address[1]}
+
+
+def serve(paths):
+    state_dir = paths.state
+    state_dir.mkdir(parents=True, exist_ok=True)
+    endpoint = Path(endpoint_path(paths))
+    try:
+        if memd_request(paths, {"op": "ping"}) is not None:
+            print(f"echo_memd already running for {paths.root}", file=sys.stderr)
+            sys.exit(1)
+    except MemdError:
+        pass
+
+    memd = MemDaemon(paths, open_store(paths), secrets.token_hex(16))
+    memd.warm()
+    server, info = _bind(state_dir)
+    server.memd = memd
+    memd.server = server
+    _write_endpoint(endpoint, dict(info, pid=os.getpid(), token=memd.token))
+    print(json.dumps({"serving": info, "root": str(paths.root), "store": memd.store.kind}), flush=True)
+    try:
+        server.serve_forever(poll_interval=0.5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        for p in (endpoint, Path(info.get("unix") or "")):
+            if p.name:
+                try:
+                    p.unlink()
+                except FileNotFoundError:
+                    pass
+
+
+def main():
+    # Usage:
+    #   echo_memd.py                 -> serve in the foreground (Ctrl+C to stop)
+    #   echo_memd.py status          -> ping the running daemon
+    #   echo_memd.py stop
+    #
+    # PowerShell, in the background:
+    #   Start-Process python -ArgumentList "habitat\echo_memd.py" -WindowStyle Hidden
+    #
+    ap = argparse.ArgumentParser(description="Resident memory daemon for the echo_mem_* CLIs.")
+    ap.add_argument("command", nargs="?", choices=("serve", "status", "stop"), default="serve")
+    ap.add_argument("--root", help="Echo Nexus root (default: see nexus_paths.py)")
+    args = ap.parse_args()
+
+    paths = get_paths(args.root, start=__file__)
+    if args.command == "serve":
+        serve(paths)
+        return
+    try:
+        reply = memd_request(paths, {"op": "ping" if args.command == "status" else "shutdown"})
+    except MemdError as e:
+        print(f"echo_memd error: {e}")
+        sys.exit(1)
+    if reply is None:
+        print("echo_memd is not running")
+        sys.exit(1)
+    print(json.dumps(reply))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import argparse
+import json
+import os
+import sys
+import urllib.error
+import urllib.request
+
+from nexus_paths import get_paths
+from nexus_replica import TOKEN_HEADER, Follower, node_name
+
+DEFAULT_STREAMS = ("root_memory.jsonl", "vexis_memory.jsonl")
+
+
+def make_app(paths, follower=None):
+    """
+    A bare replication node: leader routes for the habitat's streams
+    folder, /replica/status and /metrics. (cipher_server installs the same
+    routes.)
+    """
+    from flask import Flask
+
+    import nexus_replica
+    from nexus_metrics import install_flask
+
+    app = Flask(__name__, static_folder=None)
+    install_flask(app, service="echo_replica")
+    nexus_replica.install_flask(app, paths.streams, follower=follower)
+    return app
+
+
+def main():
+    # Usage:
+    #   echo_replica.py serve --port 5101                                 -> leader only
+    #   echo_replica.py serve --port 5102 --follow http://10.0.0.5:5000   -> follower (and leader of its own streams)
+    #   echo_replica.py sync --follow http://10.0.0.5:5000                -> one catch-up pass, then exit
+    #   echo_replica.py status http://127.0.0.1:5102                      -> a node's follower status
+    #
+    # Followers keep the leader's streams under <root>/memory/replicas/<host_port>/
+    # (the "Replicas" folder in nexus_config.json).
+    # Across machines set ECHO_REPLICA_TOKEN to the same secret on both nodes.
+    #
+    ap = argparse.ArgumentParser(description="Replicate memory streams between Echo Nexus nodes.")
+    ap.add_argument("command", choices=("serve", "sync", "status"))
+    ap.add_argument("url", nargs="?", help="node URL for status")
+    ap.add_argument("--root", help="Echo Nexus root (default: see nexus_paths.py)")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=5101)
+    ap.add_argument("--follow", metavar="LEADER_URL", help="tail this leader's streams")
+    ap.add_argument("--streams", nargs="+", default=list(DEFAULT_STREAMS))
+    ap.add_argument("--node", help="replica folder name (default: leader host_port)")
+    ap.add_argument("--interval", type=float, default=2.0, help="seconds between polls")
+    args = ap.parse_args()
+
+    paths = get_paths(args.root, start=__file__)
+
+    if args.command == "status":
+        if not args.url:
+            ap.error("status needs the node URL")
+        req = urllib.request.Request(args.url.rstrip("/") + "/replica/status")
+        if os.getenv("ECHO_REPLICA_TOKEN"):
+            req.add_header(TOKEN_HEADER, os.environ["ECHO_REPLICA_TOKEN"])
+        try:
+            with urllib.request.urlopen(req, timeout=10) as resp:
+                print(json.dumps(json.load(resp), indent=2))
+        except (urllib.error.URLError, OSError) as e:
+            print(f"echo_replica status failed: {e}")
+            sys.exit(1)
+        return
+
+    follower = None
+    if args.follow:
+        replica_dir = paths.replicas / (args.node or node_name(args.follow))
+        follower = Follower(args.follow, args.streams, replica_dir, interval=args.interval)
+
+    if args.command == "sync":
+        if follower is None:
+            ap.error("sync needs --follow LEADER_URL")
+        n = follower.sync_all()
+        print(json.dumps(dict(follower.status(), appended_bytes=n), indent=2))
+        sys.exit(1 if any(s["error"] for s in follower.status()["streams"].values()) else 0)
+
+    if follower is not None and not follower.start():
+        print(f"another process is already following into {follower.replica_dir}", file=sys.stderr)
+        sys.exit(1)
+    from werkzeug.serving import run_simple
+    run_simple(args.host, args.port, make_app(paths, follower), threaded=True,
+               use_reloader=False, use_debugger=False)
+
+
+if __name__ == "__main__":
+    main()
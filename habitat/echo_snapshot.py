@@ -1,16 +1,17 @@
 import json
-from pathlib import Path
 from datetime import datetime
 import socket
 import os
 
+from nexus_memclient import memd_read
+from nexus_paths import get_paths
+
 
 def main():
-    script_path = Path(__file__).resolve()
-    root = script_path.parents[1]
+    paths = get_paths(start=__file__)
 
-    profile_path = root / "memory" / "profiles" / "cipher_profile.json"
-    mem_stream = root / "memory" / "streams" / "root_memory.jsonl"
+    profile_path = paths.profiles / "cipher_profile.json"
+    mem_stream = paths.stream("root_memory.jsonl")
 
     profile = None
     if profile_path.exists():
@@ -21,24 +22,19 @@ def main():
 
     # Load last N memory entries
     N = 20
-    memories = []
-    if mem_stream.exists():
-        text = mem_stream.read_text(encoding="utf-8-sig")
-        lines = text.splitlines()
-        tail = lines[-N:] if len(lines) > N else lines
-
-        for line in tail:
-            line = line.lstrip("\ufeff")
-            try:
-                memories.append(json.loads(line))
-            except json.JSONDecodeError:
-                memories.append({"raw": line})
+    # Unparseable lines come back as {"raw": line}
+    reply = memd_read(paths, {"op": "tail", "stream": mem_stream.name, "n": N})
+    if reply is not None:
+        memories = reply["entries"]
+    else:
+        from nexus_store import open_store
+        memories = open_store(paths).tail(mem_stream, N)
 
     snapshot = {
         "ts_utc": datetime.utcnow().isoformat() + "Z",
         "host": socket.gethostname(),
         "user": os.environ.get("USERNAME") or os.environ.get("USER"),
-        "echo_root": str(root),
+        "echo_root": str(paths.root),
         "cipher_profile": profile,
         "recent_memories": memories,
     }
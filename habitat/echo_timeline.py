@@ -0,0 +1,68 @@
+import argparse
+import json
+import sys
+
+from nexus_memclient import memd_read
+from nexus_paths import get_paths
+
+DEFAULT_STREAMS = ("root_memory.jsonl", "vexis_memory.jsonl")
+
+
+def _line(item: dict) -> str:
+    e = item["record"]
+    who = e.get("author") or e.get("user") or e.get("source") or "?"
+    text = e.get("summary") or e.get("note") or ""
+    details = e.get("details")
+    if isinstance(details, dict) and details.get("text"):
+        text = f"{text} :: {details['text']}" if text else str(details["text"])
+    stream = item["stream"].replace("_memory.jsonl", "").replace(".jsonl", "")
+    return f"[{item['ts'] or '?'}] <{stream}> {who}: {text}"
+
+
+def main():
+    # Usage:
+    #   echo_timeline.py                                 -> newest 20 across Cipher + Vexis
+    #   echo_timeline.py -n 100 --order asc              -> oldest first
+    #   echo_timeline.py root_memory.jsonl eval_memory.jsonl --cursor <next>
+    #   echo_timeline.py --all --json > timeline.jsonl   -> everything, one JSON object per line
+    #
+    ap = argparse.ArgumentParser(description="Cipher/Vexis (or any) memory streams merged by timestamp.")
+    ap.add_argument("streams", nargs="*", help=f"stream file names (default: {' '.join(DEFAULT_STREAMS)})")
+    ap.add_argument("-n", type=int, default=20, help="entries per page")
+    ap.add_argument("--order", choices=("desc", "asc"), default="desc")
+    ap.add_argument("--cursor", help="continue from a previous page's next cursor")
+    ap.add_argument("--all", action="store_true", help="keep paging to the end")
+    ap.add_argument("--json", action="store_true", help="print entries as JSON lines")
+    ap.add_argument("--root", help="Echo Nexus root (default: see nexus_paths.py)")
+    args = ap.parse_args()
+
+    paths = get_paths(args.root, start=__file__)
+    names = list(dict.fromkeys(args.streams or DEFAULT_STREAMS))
+    streams = {name: paths.stream(name) for name in names}
+    cursor, store = args.cursor, None
+
+    while True:
+        req = {"op": "timeline", "streams": names, "n": args.n, "order": args.order, "cursor": cursor}
+        page = None if store is not None else memd_read(paths, req)
+        if page is None:
+            # No echo_memd.py running: read the streams directly
+            from nexus_store import StaleCursor, open_store
+            from nexus_timeline import timeline_page
+            store = store or open_store(paths)
+            try:
+                page = timeline_page(store, streams, args.n, cursor, args.order)
+            except StaleCursor as e:
+                print(f"{e} (start over without --cursor)")
+                sys.exit(1)
+        for item in page["entries"]:
+            print(json.dumps(item, ensure_ascii=False) if args.json else _line(item))
+        cursor = page["next"]
+        if not (args.all and page["more"]):
+            break
+
+    if page["more"] and not args.all:
+        print(f"next: --cursor {cursor}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
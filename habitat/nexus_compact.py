@@ -0,0 +1,443 @@
+"""
+Memory stream compaction with per-channel/kind/tag retention rules.
+
+Only the sealed part of a stream is rewritten: the leading run of records
+older than `seal_days`. Each sealed record goes to the first rule that
+matches it, and that rule's action decides what happens:
+
+    keep       copy as-is
+    drop       remove
+    sample     keep a deterministic 1-in-N (by content), drop the rest
+    summarize  fold into one summary record per (rule, channel, author, day)
+               carrying count and first/last timestamps (summaries from an
+               earlier run are kept as they are)
+
+The built-in DEFAULT_RULES only summarize; nothing is deleted unless a
+rules file says so. Rules are a list (first match wins), e.g. from a JSON
+file:
+
+    [{"name": "denied-handshakes", "channel": "handshake", "tags": ["denied"],
+      "action": "summarize"},
+     {"name": "stub-replies", "channel": "chat", "kind": "memory",
+      "text_prefix": ["(fallback ", "(local "], "action": "drop"},
+     {"name": "probes", "channel": "handshake", "author": ["probe@lan"],
+      "action": "sample", "keep_one_in": 10}]
+
+The sealed range is compacted into a temp file without holding the stream
+lock, at no more than `max_bytes_per_s` of reads. Only the final step
+holds the nexus_streams writer lock: copy whatever was appended since,
+atomically replace the stream, rewrite the sidecar index. The index's hash
+ledger keeps the hashes of removed records, so bulk ingest will not bring
+them back. A "compaction" record with the stats is appended afterwards.
+
+Summaries sit where their group's last folded record was, so a sorted
+stream stays sorted; a pass that would leave more timestamps out of order
+than it found is not swapped in.
+
+    python nexus_compact.py ../memory/streams/vexis_memory.jsonl --dry-run
+    python nexus_compact.py ../memory/streams/*.jsonl --rules retention.json --max-mb-s 5
+"""
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from nexus_index import StreamIndex, canonical, content_hash, line_hash, line_ts
+from nexus_streams import get_writer, try_lock_file, unlock_file
+
+SEAL_DAYS = 7.0
+MAX_BYTES_PER_S = 20 * 1024 * 1024
+CHUNK_BYTES = 1024 * 1024
+ACTIONS = ("keep", "drop", "sample", "summarize")
+
+DEFAULT_RULES = [
+    {"name": "denied-handshakes", "channel": "handshake", "tags": ["denied"], "action": "summarize"},
+    {"name": "gate-proceed", "channel": "gate", "tags": ["proceed"], "action": "summarize"},
+    {"name": "rate-limited", "channel": "ratelimit", "action": "summarize"},
+    {"name": "stub-replies", "channel": "chat", "kind": "memory",
+     "text_prefix": ["(fallback ", "(local Cipher stub)", "(local Vexis stub)"], "action": "summarize"},
+]
+
+
+# --- Rules ---
+
+def _as_list(v):
+    if v is None:
+        return None
+    return v if isinstance(v, list) else [v]
+
+
+class Rule:
+    __slots__ = ("name", "channel", "kind", "tags", "author", "text_prefix", "action", "keep_one_in")
+
+    def __init__(self, spec: dict):
+        self.name = spec.get("name") or spec.get("action", "rule")
+        self.channel = _as_list(spec.get("channel"))
+        self.kind = _as_list(spec.get("kind"))
+        self.tags = _as_list(spec.get("tags"))
+        self.author = _as_list(spec.get("author"))
+        prefixes = _as_list(spec.get("text_prefix"))
+        self.text_prefix = tuple(prefixes) if prefixes else None
+        self.action = spec.get("action", "keep")
+        if self.action not in ACTIONS:
+            raise ValueError(f"rule {self.name!r}: unknown action {self.action!r}")
+        self.keep_one_in = max(1, int(spec.get("keep_one_in", 10)))
+
+    def matches(self, e: dict) -> bool:
+        if self.channel is not None and e.get("channel") not in self.channel:
+            return False
+        if self.kind is not None and e.get("kind") not in self.kind:
+            return False
+        if self.author is not None and e.get("author") not in self.author:
+            return False
+        if self.tags is not None:
+            tags = e.get("tags") or ([e["tag"]] if e.get("tag") else [])
+            if not any(t in tags for t in self.tags):
+                return False
+        if self.text_prefix is not None:
+            text = (e.get("details") or {}).get("text") if isinstance(e.get("details"), dict) else None
+            if not isinstance(text, str) or not text.startswith(self.text_prefix):
+                return False
+        return True
+
+
+def load_rules(path=None):
+    specs = DEFAULT_RULES
+    if path:
+        with open(path, "r", encoding="utf-8-sig") as f:
+            specs = json.load(f)
+    return [Rule(s) for s in specs]
+
+
+# --- Compaction ---
+
+class _Throttle:
+    """
+    Sleep as needed to keep reads under `rate` bytes per second.
+    """
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.start = time.monotonic()
+        self.done = 0
+
+    def consumed(self, n: int):
+        self.done += n
+        if self.rate:
+            ahead = self.done / self.rate - (time.monotonic() - self.start)
+            if ahead > 0:
+                time.sleep(ahead)
+
+
+def _group_part(value):
+    # Grouping key part: non-string channel/author values (lists, objects)
+    # group by their canonical JSON text instead of failing to hash
+    if value is None or isinstance(value, str):
+        return value
+    return canonical(value).decode("utf-8")
+
+
+def _summary_record(rule: Rule, channel, author, g: dict) -> dict:
+    return {
+        "ts": g["last"],
+        "kind": "summary",
+        "channel": channel,
+        "author": author,
+        "tags": list(g["tags"]) + ["summary", "compacted"],
+        "summary": f"{g['count']} {channel or 'note'} records compacted by rule {rule.name}",
+        "details": {
+            "rule": rule.name,
+            "count": g["count"],
+            "first_ts": g["first"],
+            "last_ts": g["last"],
+        },
+    }
+
+
+def compact_stream(stream, rules, seal_days: float = SEAL_DAYS, max_bytes_per_s: float = MAX_BYTES_PER_S,
+                   dry_run: bool = False, now: float = None, ledger: bool = True) -> dict:
+    """
+    Compact the sealed prefix of one stream. Returns stats.
+    Skips (stats["skipped"]) if another process is compacting it.
+    """
+    stream = Path(stream)
+    stats = {"stream": str(stream), "sealed_lines": 0, "kept": 0, "dropped": 0,
+             "sampled_out": 0, "summarized": 0, "summaries": 0, "bytes_before": 0, "bytes_after": 0,
+             "out_of_order_before": 0, "out_of_order_after": 0}
+    if not stream.exists():
+        stats["skipped"] = "missing"
+        return stats
+
+    guard_path = stream.with_name(stream.name + ".compact.lock")
+    guard = os.open(str(guard_path), os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o644)
+    try:
+        if not try_lock_file(guard):
+            stats["skipped"] = "busy"
+            return stats
+        try:
+            return _compact_locked(stream, rules, seal_days, max_bytes_per_s, dry_run, now, ledger, stats)
+        finally:
+            unlock_file(guard)
+    finally:
+        os.close(guard)
+
+
+def _compact_locked(stream, rules, seal_days, max_bytes_per_s, dry_run, now, ledger, stats):
+    now = time.time() if now is None else now
+    cutoff = now - seal_days * 86400.0
+    index = StreamIndex(stream).load()
+    index.catch_up()
+    ino = os.stat(stream).st_ino
+    throttle = _Throttle(max_bytes_per_s)
+
+    tmp = stream.with_name(stream.name + ".compact.tmp")
+    out = None if dry_run else tmp.open("wb")
+    meta = []
+    new_hashes = []
+    groups = {}
+    held = []  # (seq, line, ts) kept while a summary group is open
+    day = None
+    sealed_end = 0
+    buf = []
+    last_out = [None]
+
+    def emit(line: bytes, ts):
+        buf.append(line)
+        meta.append((len(line), ts))
+        if ts is not None:
+            if last_out[0] is not None and ts < last_out[0]:
+                stats["out_of_order_after"] += 1
+            last_out[0] = ts
+        if out is not None and len(buf) >= 10_000:
+            out.write(b"".join(buf))
+            buf.clear()
+
+    def keep(seq, line, ts):
+        # A summary goes where its last folded record was, so records
+        # after the first open group wait until the day's groups close
+        if groups:
+            held.append((seq, line, ts))
+        else:
+            emit(line, ts)
+        stats["kept"] += 1
+
+    def emit_summary(key, g):
+        rule, channel, author = key
+        data = canonical(_summary_record(rule, channel, author, g))
+        new_hashes.append(content_hash(data))
+        emit(data + b"\n", g["last_t"])
+        stats["summaries"] += 1
+
+    def flush_groups():
+        summaries = sorted(groups.items(), key=lambda kv: kv[1]["last_seq"])
+        i = 0
+        for seq, line, ts in held:
+            while i < len(summaries) and summaries[i][1]["last_seq"] < seq:
+                emit_summary(*summaries[i])
+                i += 1
+            emit(line, ts)
+        for key, g in summaries[i:]:
+            emit_summary(key, g)
+        held.clear()
+        groups.clear()
+
+    try:
+        with stream.open("rb") as f:
+            pending = b""
+            offset = 0
+            last_in = None
+            done = False
+            while not done:
+                chunk = f.read(CHUNK_BYTES)
+                if not chunk:
+                    break
+                throttle.consumed(len(chunk))
+                data = pending + chunk
+                lines = data.split(b"\n")
+                pending = lines.pop()
+                for raw in lines:
+                    line = raw + b"\n"
+                    t = line_ts(line)
+                    if t is not None and t >= cutoff:
+                        done = True
+                        break
+                    offset += len(line)
+                    stats["sealed_lines"] += 1
+                    seq = stats["sealed_lines"]
+                    if t is not None:
+                        if last_in is not None and t < last_in:
+                            stats["out_of_order_before"] += 1
+                        last_in = t
+                    try:
+                        e = json.loads(raw)
+                    except ValueError:
+                        e = None
+                    rule = None
+                    if isinstance(e, dict) and "compacted" not in (e.get("tags") or ()):
+                        rule = next((r for r in rules if r.matches(e)), None)
+                    action = rule.action if rule else "keep"
+                    if t is not None:
+                        d = int(t // 86400)
+                        if d != day:
+                            flush_groups()
+                            day = d
+                    if action == "keep":
+                        keep(seq, line, t)
+                    elif action == "drop":
+                        stats["dropped"] += 1
+                    elif action == "sample":
+                        if int.from_bytes(content_hash(raw)[:4], "little") % rule.keep_one_in == 0:
+                            keep(seq, line, t)
+                        else:
+                            stats["sampled_out"] += 1
+                    else:
+                        key = (rule, _group_part(e.get("channel")), _group_part(e.get("author")))
+                        ts = e.get("ts") or e.get("ts_utc")
+                        g = groups.get(key)
+                        if g is None:
+                            tags = [t for t in e.get("tags") or ([e["tag"]] if e.get("tag") else [])
+                                    if t not in ("summary", "compacted")]
+                            g = groups[key] = {"count": 0, "first": ts, "tags": tags}
+                        # Denial-window summaries fold in by their count
+                        det = e.get("details")
+                        n = det.get("count") if isinstance(det, dict) and "summary" in (e.get("tags") or ()) else None
+                        g["count"] += n if isinstance(n, int) and n > 0 else 1
+                        g["last"] = ts
+                        g["last_t"] = t
+                        g["last_seq"] = seq
+                        stats["summarized"] += 1
+            flush_groups()
+            sealed_end = offset
+    except BaseException:
+        if out is not None:
+            out.close()
+            tmp.unlink(missing_ok=True)
+        raise
+
+    stats["bytes_before"] = stream.stat().st_size
+    if stats["out_of_order_after"] > stats["out_of_order_before"]:
+        if out is not None:
+            out.close()
+            tmp.unlink(missing_ok=True)
+        stats["skipped"] = "compacted range would be out of order"
+        return stats
+    if dry_run or stats["sealed_lines"] == stats["kept"]:
+        if out is not None:
+            out.close()
+            tmp.unlink(missing_ok=True)
+        stats["bytes_after"] = stats["bytes_before"] - sealed_end + sum(m[0] for m in meta)
+        stats["skipped"] = "dry-run" if dry_run else "nothing to compact"
+        return stats
+
+    # Swap under the writer lock: append the unsealed tail, replace, reindex
+    writer = get_writer(stream)
+    with writer.locked():
+        if os.stat(stream).st_ino != ino:
+            out.close()
+            tmp.unlink(missing_ok=True)
+            stats["skipped"] = "stream replaced during compaction"
+            return stats
+        with stream.open("rb") as f:
+            f.seek(sealed_end)
+            tail = f.read()
+        if tail and not tail.endswith(b"\n"):
+            tail += b"\n"
+        out.write(b"".join(buf))
+        buf.clear()
+        out.write(tail)
+        out.flush()
+        os.fsync(out.fileno())
+        out.close()
+        os.replace(tmp, stream)
+
+        tail_lines = tail.splitlines(keepends=True)
+        meta.extend((len(l), line_ts(l)) for l in tail_lines)
+        hashes = list(index.hashes) + new_hashes
+        hashes.extend(h for h in (line_hash(l) for l in tail_lines) if h not in index.hashes)
+        index.replace(meta, hashes)
+        stats["bytes_after"] = stream.stat().st_size
+
+    if ledger:
+        entry = {
+            "ts": datetime.now(tz=timezone.utc).isoformat(),
+            "kind": "event",
+            "channel": "root",
+            "author": "Compactor",
+            "tags": ["compaction"],
+            "summary": f"Compacted {stats['sealed_lines']} sealed records "
+                       f"({stats['bytes_before']} -> {stats['bytes_after']} bytes)",
+            "details": dict(stats, seal_days=seal_days),
+        }
+        writer.append(entry)
+        index.catch_up()
+    return stats
+
+
+class Compactor:
+    """
+    Background compaction of a set of streams every `interval` seconds.
+    Safe with several workers: a stream being compacted elsewhere is skipped.
+    """
+
+    def __init__(self, streams, rules=None, interval: float = 6 * 3600, **options):
+        self.streams = list(streams)
+        self.rules = rules if rules is not None else load_rules()
+        self.interval = interval
+        self.options = options
+        self.last = {}
+        self._thread = None
+
+    def add(self, *streams):
+        """
+        Also compact these streams from the next run on (duplicates ignored).
+        """
+        for s in streams:
+            if s not in self.streams:
+                self.streams.append(s)
+
+    def run_once(self):
+        for s in list(self.streams):
+            try:
+                self.last[str(s)] = compact_stream(s, self.rules, **self.options)
+            except Exception as e:
+                self.last[str(s)] = {"stream": str(s), "error": str(e)}
+        return self.last
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="nexus-compact", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.run_once()
+
+
+def main():
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Compact memory streams by retention rules.")
+    ap.add_argument("streams", nargs="+")
+    ap.add_argument("--rules", help="JSON list of rules (default: built-in DEFAULT_RULES)")
+    ap.add_argument("--seal-days", type=float, default=SEAL_DAYS, help="only records older than this")
+    ap.add_argument("--max-mb-s", type=float, default=MAX_BYTES_PER_S / 1024 / 1024, help="read bandwidth cap")
+    ap.add_argument("--dry-run", action="store_true", help="report what would change")
+    args = ap.parse_args()
+
+    try:
+        rules = load_rules(args.rules)
+    except (OSError, ValueError) as e:
+        print(f"Bad rules file: {e}", file=sys.stderr)
+        sys.exit(1)
+    for s in args.streams:
+        stats = compact_stream(s, rules, args.seal_days, args.max_mb_s * 1024 * 1024, args.dry_run)
+        print(json.dumps(stats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Windowed aggregation of repeated denials (e.g. /echo/handshake consent
+mismatches) so a flood doesn't become a flood of full-payload writes.
+
+Denials are grouped by a key such as (sender, provided_consent, scope):
+
+  - the first denial of a key in a window is logged in full, as before
+  - repeats inside the window are only counted (and still reported to the
+    live status observers, so delta stays exact)
+  - when the window closes, one summary record carries the count, the
+    first/last timestamps and up to MAX_SAMPLES payloads kept at
+    `sample_rate`
+
+    denials = DenialAggregator(log_fn=append_jsonl, stream=VEXIS_MEMORY_STREAM,
+                               make_entry=..., make_summary=..., observe_fn=...)
+    denials.record((sender, consent, scope), payload)
+"""
+import atexit
+import random
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+WINDOW_SECONDS = 30.0
+SAMPLE_RATE = 0.01
+MAX_SAMPLES = 5
+MAX_KEYS = 10_000
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat()
+
+
+class _Group:
+    __slots__ = ("opened", "first", "last", "count", "samples")
+
+    def __init__(self, now):
+        self.opened = now
+        self.first = None
+        self.last = None
+        self.count = 0
+        self.samples = []
+
+
+class DenialAggregator:
+    """
+    - log_fn(stream, entry):      writes a record (e.g. cipher_server.append_jsonl)
+    - make_entry(key, payload):   full record for the first denial of a window
+    - make_summary(key, info):    summary record; info has count, first_ts,
+                                  last_ts, window_s and sampled payloads
+    - observe_fn(stream, entry):  optional; called for counted-only denials
+    - background:                 False = no flusher thread; the owner calls
+                                  flush() periodically (and close() when done)
+    """
+
+    def __init__(self, log_fn, stream, make_entry, make_summary, observe_fn=None,
+                 window: float = WINDOW_SECONDS, sample_rate: float = SAMPLE_RATE,
+                 max_samples: int = MAX_SAMPLES, max_keys: int = MAX_KEYS, rng=None,
+                 background: bool = True):
+        self.log_fn = log_fn
+        self.stream = stream
+        self.make_entry = make_entry
+        self.make_summary = make_summary
+        self.observe_fn = observe_fn
+        self.window = window
+        self.sample_rate = sample_rate
+        self.max_samples = max_samples
+        self.max_keys = max_keys
+        self.rng = rng or random.Random()
+        self.background = background
+        self.written = 0
+        self.suppressed = 0
+        self._lock = threading.Lock()
+        self._groups = OrderedDict()
+        self._thread = None
+        atexit.register(self.flush, True)
+
+    def record(self, key, payload, now: float = None) -> bool:
+        """
+        Count one denial. Returns True if it was written in full.
+        """
+        now = time.time() if now is None else now
+        due = []
+        with self._lock:
+            group = self._groups.get(key)
+            if group is not None and now - group.opened >= self.window:
+                due.append((key, self._groups.pop(key)))
+                group = None
+            if group is None:
+                group = self._groups[key] = _Group(now)
+                while len(self._groups) > self.max_keys:
+                    due.append(self._groups.popitem(last=False))
+                first = True
+            else:
+                first = False
+                group.count += 1
+                group.first = group.first or now
+                group.last = now
+                if len(group.samples) < self.max_samples and self.rng.random() < self.sample_rate:
+                    group.samples.append({"ts": _iso(now), "payload": payload})
+                self.suppressed += 1
+        self._emit(due)
+        self._ensure_flusher()
+
+        entry = self.make_entry(key, payload)
+        if first:
+            self.log_fn(self.stream, entry)
+            self.written += 1
+        elif self.observe_fn is not None:
+            self.observe_fn(self.stream, entry)
+        return first
+
+    def flush(self, force: bool = False, now: float = None):
+        """
+        Close windows that have run out (all of them with force=True).
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            due = [(k, g) for k, g in self._groups.items() if force or now - g.opened >= self.window]
+            for k, _ in due:
+                del self._groups[k]
+        self._emit(due)
+
+    def _emit(self, due):
+        for key, group in due:
+            if not group.count:
+                continue
+            self.log_fn(self.stream, self.make_summary(key, {
+                "count": group.count,
+                "first_ts": _iso(group.first),
+                "last_ts": _iso(group.last),
+                "window_s": self.window,
+                "sample_rate": self.sample_rate,
+                "sampled": group.samples,
+            }))
+            self.written += 1
+
+    def _ensure_flusher(self):
+        # Close idle windows even when the flood stops
+        if self._thread is None and self.background:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="nexus-denials", daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(max(1.0, self.window / 4))
+            try:
+                self.flush()
+            except Exception:
+                # Keep flushing; next tick retries
+                pass
+
+    def close(self):
+        """
+        Write out every open window; the aggregator is not used afterwards.
+        """
+        self.flush(force=True)
+        atexit.unregister(self.flush)
+
+    def info(self) -> dict:
+        return {
+            "open_windows": len(self._groups),
+            "written": self.written,
+            "suppressed": self.suppressed,
+            "window_s": self.window,
+            "sample_rate": self.sample_rate,
+        }
@@ -0,0 +1,235 @@
+"""
+Sidecar indexes for a JSONL memory stream.
+
+Next to <stream> (e.g. root_memory.jsonl) live:
+
+    <stream>.hashes     8-byte content hashes, one per record, append-only
+    <stream>.idx.json   {"stream_bytes", "lines", "every", "offsets": [[line, byte, ts], ...]}
+
+The hashes let bulk ingest drop records the stream already holds without
+re-reading it. The sparse offsets (one entry every `every` lines) let a
+reader seek straight to a line number or timestamp instead of scanning.
+
+The index records how many stream bytes it covers. Anything appended later
+by other writers (the server, the echo_mem_* CLIs) is picked up by
+catch_up(), which indexes just the new tail; if the stream shrank
+(rewritten or compacted) the index is rebuilt from scratch.
+
+Content hashes are taken over the canonical JSON form of a record (sorted
+keys), so the same record hashes the same regardless of key order.
+"""
+import hashlib
+import json
+import os
+import re
+from datetime import datetime, timezone
+from pathlib import Path
+
+OFFSET_EVERY = 1024
+HASH_SIZE = 8
+
+_TS_RE = re.compile(rb'"ts(?:_utc)?"\s*:\s*"([^"]+)"')
+
+
+# json.dumps() with non-default options builds a new encoder per call
+_CANONICAL = json.JSONEncoder(ensure_ascii=False, sort_keys=True).encode
+
+
+def canonical(record: dict) -> bytes:
+    """
+    The bytes a record is hashed (and bulk-written) as.
+    """
+    return _CANONICAL(record).encode("utf-8")
+
+
+def content_hash(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=HASH_SIZE).digest()
+
+
+def parse_ts(value) -> float:
+    """
+    ISO 8601 (with "Z", an offset, or naive = UTC) -> unix seconds; None if unparseable.
+    """
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        dt = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def line_ts(line: bytes) -> float:
+    """
+    Timestamp of a raw stream line without a full JSON parse.
+    """
+    m = _TS_RE.search(line)
+    return parse_ts(m.group(1).decode("utf-8", "replace")) if m else None
+
+
+def line_hash(line: bytes):
+    """
+    Content hash of a raw stream line (None for malformed lines).
+    """
+    try:
+        return content_hash(canonical(json.loads(line)))
+    except ValueError:
+        return None
+
+
+class StreamIndex:
+    """
+    Hash set + sparse offsets for one stream, kept in sidecar files.
+    """
+
+    def __init__(self, stream, every: int = OFFSET_EVERY):
+        self.stream = Path(stream)
+        self.hash_path = self.stream.with_name(self.stream.name + ".hashes")
+        self.meta_path = self.stream.with_name(self.stream.name + ".idx.json")
+        self.every = every
+        self.stream_bytes = 0
+        self.lines = 0
+        self.offsets = []
+        self.hashes = set()
+
+    # --- Load / save ---
+
+    def load(self, hashes: bool = True):
+        """
+        Read the sidecars. hashes=False loads only the offsets, for readers
+        that just seek (the index is then not to be extended).
+        """
+        if not hashes:
+            try:
+                meta = json.loads(self.meta_path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                return self
+            if meta.get("every") == self.every:
+                self.stream_bytes = meta.get("stream_bytes", 0)
+                self.lines = meta.get("lines", 0)
+                self.offsets = meta.get("offsets", [])
+            return self
+        try:
+            meta = json.loads(self.meta_path.read_text(encoding="utf-8"))
+            raw = self.hash_path.read_bytes()
+        except (OSError, ValueError):
+            return self._reset()
+        if meta.get("every") != self.every:
+            return self._reset()
+        self.stream_bytes = meta.get("stream_bytes", 0)
+        self.lines = meta.get("lines", 0)
+        self.offsets = meta.get("offsets", [])
+        self.hashes = {raw[i:i + HASH_SIZE] for i in range(0, len(raw) - len(raw) % HASH_SIZE, HASH_SIZE)}
+        return self
+
+    def _reset(self):
+        self.stream_bytes = self.lines = 0
+        self.offsets = []
+        self.hashes = set()
+        try:
+            self.hash_path.unlink()
+        except FileNotFoundError:
+            pass
+        return self
+
+    def _save_meta(self):
+        tmp = self.meta_path.with_name(self.meta_path.name + ".tmp")
+        tmp.write_text(json.dumps({
+            "stream_bytes": self.stream_bytes,
+            "lines": self.lines,
+            "every": self.every,
+            "offsets": self.offsets,
+        }), encoding="utf-8")
+        os.replace(tmp, self.meta_path)
+
+    # --- Updates ---
+
+    def extend(self, lines, hashes, timestamps):
+        """
+        Record lines just appended to the stream (raw bytes incl. newline),
+        with their content hashes and unix timestamps.
+        """
+        off = self.stream_bytes
+        n = self.lines
+        every = self.every
+        for line, ts in zip(lines, timestamps):
+            if n % every == 0:
+                self.offsets.append([n, off, ts])
+            off += len(line)
+            n += 1
+        new = [h for h in hashes if h is not None]
+        if new:
+            with self.hash_path.open("ab") as f:
+                f.write(b"".join(new))
+            self.hashes.update(new)
+        self.stream_bytes = off
+        self.lines = n
+        self._save_meta()
+
+    def catch_up(self):
+        """
+        Index whatever was appended since the last update (or rebuild if
+        the stream shrank). Returns the number of lines indexed.
+        """
+        try:
+            size = self.stream.stat().st_size
+        except FileNotFoundError:
+            size = 0
+        if size < self.stream_bytes:
+            self._reset()
+        if size == self.stream_bytes:
+            return 0
+        with self.stream.open("rb") as f:
+            f.seek(self.stream_bytes)
+            data = f.read(size - self.stream_bytes)
+        # Only whole lines; a half-written last line is picked up next time
+        cut = data.rfind(b"\n") + 1
+        lines = data[:cut].splitlines(keepends=True)
+        self.extend(lines, [line_hash(l) for l in lines], [line_ts(l) for l in lines])
+        return len(lines)
+
+    def replace(self, lines_meta, hashes):
+        """
+        After a full rewrite: lines_meta is [(length, ts), ...] in file order.
+        """
+        self._reset()
+        off = 0
+        for n, (length, ts) in enumerate(lines_meta):
+            if n % self.every == 0:
+                self.offsets.append([n, off, ts])
+            off += length
+        self.lines = len(lines_meta)
+        self.stream_bytes = off
+        hashes = [h for h in hashes if h is not None]
+        with self.hash_path.open("wb") as f:
+            f.write(b"".join(hashes))
+        self.hashes = set(hashes)
+        self._save_meta()
+
+    # --- Reads ---
+
+    def seek_line(self, line: int):
+        """
+        (line, byte offset) of the nearest indexed line at or before `line`.
+        """
+        best = (0, 0)
+        for n, off, _ in self.offsets:
+            if n > line:
+                break
+            best = (n, off)
+        return best
+
+    def seek_ts(self, ts: float):
+        """
+        Byte offset to start scanning from to find the first record at or
+        after `ts` (streams are appended in time order, so this is a
+        lower bound).
+        """
+        best = 0
+        for _, off, t in self.offsets:
+            if t is not None and t >= ts:
+                break
+            best = off
+        return best
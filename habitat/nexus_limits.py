@@ -0,0 +1,405 @@
+"""
+Token-bucket rate limiting and admission control for the habitat apps.
+
+Each request to a limited route takes one token from every bucket that
+applies to it -- per user, per sender ("from") and per route -- or none at
+all: if any bucket is empty it is refused with a 429 (plus Retry-After)
+and the other buckets keep their tokens.
+The check runs in before_request, so a refused request costs no stream
+append, history read or model call.
+
+Buckets live in process memory for a single worker. Under nexus_serve.py
+they live in a small memory-mapped table (<state>/ratelimit.mmap) shared by
+all workers, so N workers don't grant N times the limit:
+
+    buckets = SharedBuckets(PATHS.state / "ratelimit.mmap")
+    limiter = RateLimiter(buckets, {
+        "/echo/handshake": {"sender": Limit(0.2, 5), "route": Limit(20, 50)},
+    })
+    install_flask(app, limiter, log_fn=..., stream_for=...)
+
+Refusals are counted in echo_rate_limited_total and aggregated per key by
+nexus_denials.DenialAggregator: the first refusal in each
+DENIAL_LOG_INTERVAL is written in full, the rest are counted into one
+summary record when the window closes (or at exit) -- a flood of requests
+can never become a flood of writes, and a flood that stops is still
+accounted for.
+"""
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from pathlib import Path
+
+from nexus_denials import DenialAggregator
+from nexus_streams import lock_file, unlock_file
+
+DENIAL_LOG_INTERVAL = 60.0
+LOCAL_MAX_KEYS = 50_000
+SHARED_SLOTS = 8192
+PROBE = 8
+
+# slot: key hash (0 = empty), tokens, last refill (unix seconds)
+_SLOT = struct.Struct("<Qdd")
+
+
+class Limit:
+    """
+    `rate` tokens per second, bucket size `burst`.
+    """
+    __slots__ = ("rate", "burst")
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = float(rate)
+        self.burst = float(burst)
+
+    def __repr__(self):
+        return f"Limit({self.rate:g}/s, burst={self.burst:g})"
+
+
+def _refill(tokens, last, now, limit: Limit, cost: float):
+    """
+    Bucket arithmetic shared by both stores.
+    Returns (allowed, new_tokens, retry_after_seconds).
+    """
+    tokens = min(limit.burst, tokens + max(0.0, now - last) * limit.rate)
+    if tokens >= cost:
+        return True, tokens - cost, 0.0
+    wait = (cost - tokens) / limit.rate if limit.rate > 0 else float("inf")
+    return False, tokens, wait
+
+
+class LocalBuckets:
+    """
+    In-process buckets (one worker). LRU-capped so random keys can't grow it.
+    """
+
+    def __init__(self, max_keys: int = LOCAL_MAX_KEYS):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()
+
+    def take(self, key: str, limit: Limit, cost: float = 1.0, now: float = None):
+        refused, wait = self.take_all([(key, limit)], cost, now)
+        return refused is None, wait
+
+    def take_all(self, items, cost: float = 1.0, now: float = None):
+        """
+        Take `cost` from every (key, limit) bucket, or from none of them.
+        Returns (index of the first refusing bucket or None, retry_after).
+        """
+        now = time.time() if now is None else now
+        taken = []
+        with self._lock:
+            for i, (key, limit) in enumerate(items):
+                tokens, last = self._buckets.get(key, (limit.burst, now))
+                allowed, tokens, wait = _refill(tokens, last, now, limit, cost)
+                if not allowed:
+                    return i, wait
+                taken.append((key, tokens))
+            for key, tokens in taken:
+                self._buckets.pop(key, None)
+                self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return None, 0.0
+
+
+class SharedBuckets:
+    """
+    Fixed-size open-addressing table in a memory-mapped file, shared by
+    every process that maps the same path. A thread lock plus an OS lock on
+    <path>.lock serialize updates; each take() touches at most PROBE slots.
+    When all probed slots are taken, the one idle longest is reused.
+    """
+
+    def __init__(self, path, slots: int = SHARED_SLOTS):
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+        self.slots = slots
+        self._thread_lock = threading.Lock()
+        self._pid = None
+        self._map = None
+        self._lock_fd = None
+
+    def _ensure_open(self):
+        # Maps and fds must not cross a fork; reopen in the child
+        if self._pid == os.getpid():
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        size = self.slots * _SLOT.size
+        fd = os.open(str(self.path), os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o644)
+        try:
+            if os.fstat(fd).st_size < size:
+                os.ftruncate(fd, size)
+            self._map = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        self._lock_fd = os.open(str(self.lock_path), os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o644)
+        self._pid = os.getpid()
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        h = int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+        return h or 1
+
+    def _find(self, m, h: int, claimed):
+        """
+        Slot offset for hash h: its own slot, else a free one, else the one
+        idle longest (skipping slots `claimed` by other keys of this take).
+        Returns (offset, tokens, last) with tokens None for a new bucket.
+        """
+        start = h % self.slots
+        free = oldest = None
+        oldest_last = float("inf")
+        for i in range(PROBE):
+            off = ((start + i) % self.slots) * _SLOT.size
+            slot_h, tokens, last = _SLOT.unpack_from(m, off)
+            if slot_h == h:
+                return off, tokens, last
+            if off in claimed:
+                continue
+            if slot_h == 0 and free is None:
+                free = off
+            if last < oldest_last:
+                oldest, oldest_last = off, last
+        return (free if free is not None else oldest), None, None
+
+    def take(self, key: str, limit: Limit, cost: float = 1.0, now: float = None):
+        refused, wait = self.take_all([(key, limit)], cost, now)
+        return refused is None, wait
+
+    def take_all(self, items, cost: float = 1.0, now: float = None):
+        """
+        Take `cost` from every (key, limit) bucket, or from none of them.
+        Returns (index of the first refusing bucket or None, retry_after).
+        """
+        now = time.time() if now is None else now
+        hashes = [self._hash(key) for key, _ in items]
+        with self._thread_lock:
+            self._ensure_open()
+            m = self._map
+            lock_file(self._lock_fd)
+            try:
+                taken = []
+                claimed = set()
+                for i, (h, (_, limit)) in enumerate(zip(hashes, items)):
+                    off, tokens, last = self._find(m, h, claimed)
+                    if tokens is None:
+                        tokens, last = limit.burst, now
+                    allowed, tokens, wait = _refill(tokens, last, now, limit, cost)
+                    if not allowed:
+                        return i, wait
+                    claimed.add(off)
+                    taken.append((off, h, tokens))
+                for off, h, tokens in taken:
+                    _SLOT.pack_into(m, off, h, tokens, now)
+            finally:
+                unlock_file(self._lock_fd)
+        return None, 0.0
+
+
+class Denied:
+    """
+    Why a request was refused: which bucket, and when to retry.
+    """
+    __slots__ = ("route", "scope", "key", "retry_after")
+
+    def __init__(self, route, scope, key, retry_after):
+        self.route = route
+        self.scope = scope
+        self.key = key
+        self.retry_after = retry_after
+
+
+class RateLimiter:
+    """
+    rules: {route: {scope: Limit}} with scope in "user", "sender", "route".
+    Routes without rules are never limited.
+    """
+
+    def __init__(self, buckets, rules: dict, enabled: bool = True):
+        self.buckets = buckets
+        self.rules = rules
+        self.enabled = enabled
+
+    def check(self, route: str, user: str = None, sender: str = None, cost: float = 1.0,
+              partition: str = ""):
+        """
+        Take a token from every applicable bucket, or from none if one of
+        them is empty. Returns None or Denied.
+        A `partition` (e.g. a tenant name) gets its own set of buckets.
+        """
+        rules = self.rules.get(route)
+        if not self.enabled or not rules:
+            return None
+        idents = {"route": "*", "user": user, "sender": sender}
+        scopes, items = [], []
+        for scope, limit in rules.items():
+            ident = idents.get(scope)
+            if ident is None:
+                continue
+            key = f"{partition}/{route}|{scope}|{ident}" if partition else f"{route}|{scope}|{ident}"
+            scopes.append((scope, ident))
+            items.append((key, limit))
+        if not items:
+            return None
+        refused, wait = self.buckets.take_all(items, cost)
+        if refused is None:
+            return None
+        scope, ident = scopes[refused]
+        return Denied(route, scope, ident, wait)
+
+
+class DenialLog:
+    """
+    Refusals aggregated per (route, scope, key) by a DenialAggregator for
+    each (partition, stream) they are logged to. One thread closes the
+    windows of all of them, so counts are written even after a flood stops.
+
+    - log_fn(stream, entry, partition): writes a record; also called from
+      the flusher thread, so it must not depend on the current request
+    - stream_for(route): target stream, resolved when the refusal happens
+    """
+
+    def __init__(self, log_fn, stream_for, interval: float = DENIAL_LOG_INTERVAL):
+        self.log_fn = log_fn
+        self.stream_for = stream_for
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._aggregators = {}
+        self._thread = None
+
+    def record(self, denied: Denied, now: float = None, partition: str = ""):
+        if self.log_fn is None:
+            return
+        stream = self.stream_for(denied.route)
+        if stream is None:
+            return
+        self._aggregator(partition, stream).record(
+            (denied.route, denied.scope, denied.key),
+            {"retry_after_s": round(denied.retry_after, 3)},
+            now=now,
+        )
+
+    def _aggregator(self, partition: str, stream) -> DenialAggregator:
+        with self._lock:
+            agg = self._aggregators.get((partition, stream))
+            if agg is None:
+                def log(s, entry, partition=partition):
+                    self.log_fn(s, entry, partition)
+
+                agg = self._aggregators[(partition, stream)] = DenialAggregator(
+                    log_fn=log,
+                    stream=stream,
+                    make_entry=self._entry,
+                    make_summary=self._summary,
+                    window=self.interval,
+                    max_keys=LOCAL_MAX_KEYS,
+                    background=False,
+                )
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="nexus-limits-denials", daemon=True)
+                self._thread.start()
+        return agg
+
+    def _run(self):
+        while True:
+            time.sleep(max(1.0, self.interval / 4))
+            self.flush()
+
+    def flush(self, force: bool = False):
+        """
+        Close the windows that have run out (all of them with force=True).
+        """
+        with self._lock:
+            aggregators = list(self._aggregators.values())
+        for agg in aggregators:
+            try:
+                agg.flush(force=force)
+            except Exception:
+                # Keep flushing the others; next tick retries
+                pass
+
+    @staticmethod
+    def _entry(key, payload) -> dict:
+        route, scope, ident = key
+        return {
+            "ts": datetime.now(tz=timezone.utc).isoformat(),
+            "kind": "event",
+            "channel": "ratelimit",
+            "author": "RateLimiter",
+            "tags": ["ratelimit", scope, "denied"],
+            "summary": f"Rate limited {scope} {ident} on {route}",
+            "details": dict(payload, route=route, scope=scope, key=ident),
+        }
+
+    @staticmethod
+    def _summary(key, info) -> dict:
+        route, scope, ident = key
+        return {
+            "ts": datetime.now(tz=timezone.utc).isoformat(),
+            "kind": "event",
+            "channel": "ratelimit",
+            "author": "RateLimiter",
+            "tags": ["ratelimit", scope, "denied", "summary"],
+            "summary": f"Rate limited {scope} {ident} on {route} x{info['count']} more",
+            "details": dict(info, route=route, scope=scope, key=ident),
+        }
+
+    def info(self) -> dict:
+        with self._lock:
+            aggregators = list(self._aggregators.values())
+        return {
+            "streams": len(aggregators),
+            "open_windows": sum(a.info()["open_windows"] for a in aggregators),
+            "written": sum(a.written for a in aggregators),
+            "suppressed": sum(a.suppressed for a in aggregators),
+            "window_s": self.interval,
+        }
+
+
+def install_flask(app, limiter: RateLimiter, log_fn=None, stream_for=None, counter=None, partition=None):
+    """
+    Refuse over-limit requests with 429 before any endpoint work.
+    - log_fn(stream, entry, partition) / stream_for(route): aggregated
+      denial records (see DenialLog; log_fn runs outside requests too)
+    - counter: optional nexus_metrics Counter labelled (route, scope)
+    - partition(): optional; the current request's bucket partition
+      (cipher_server: the tenant name, "" for the root habitat)
+    """
+    from flask import jsonify, request
+
+    denials = DenialLog(log_fn, stream_for or (lambda route: None))
+
+    @app.before_request
+    def _rate_limit():
+        rule = request.url_rule.rule if request.url_rule else None
+        if rule not in limiter.rules or not limiter.enabled:
+            return None
+        data = request.get_json(silent=True)
+        data = data if isinstance(data, dict) else {}
+        user = data.get("user") or request.args.get("user") or "Richard"
+        sender = data.get("from")
+        part = partition() if partition is not None else ""
+        denied = limiter.check(rule, user=str(user), sender=str(sender) if sender else None, partition=part)
+        if denied is None:
+            return None
+        if counter is not None:
+            counter.inc(route=rule, scope=denied.scope)
+        denials.record(denied, partition=part)
+        retry = max(1, int(denied.retry_after + 0.999)) if denied.retry_after != float("inf") else 3600
+        resp = jsonify({
+            "error": "Rate limit exceeded",
+            "scope": denied.scope,
+            "retry_after": retry,
+        })
+        resp.status_code = 429
+        resp.headers["Retry-After"] = str(retry)
+        return resp
+
+    return app
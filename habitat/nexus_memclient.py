@@ -0,0 +1,103 @@
+"""
+Thin client for the echo_memd.py memory daemon.
+
+The echo_mem_* CLIs ask the daemon first and fall back to reading the
+streams themselves when it isn't running:
+
+    reply = memd_request(paths, {"op": "tail", "stream": "root_memory.jsonl", "n": 5})
+    if reply is None:
+        ...   # no daemon: open the store directly
+
+Kept to stdlib imports that are cheap at startup (no sqlite3, re, hashlib):
+a CLI that gets its answer from the daemon never imports the store.
+`root` below is a nexus_paths.NexusPaths or a root folder.
+"""
+import json
+import os
+import socket
+
+from nexus_paths import as_paths
+
+CONNECT_TIMEOUT = 0.5
+REQUEST_TIMEOUT = 10.0
+
+
+class MemdError(Exception):
+    """
+    The daemon was reached but the request failed.
+    """
+
+
+def endpoint_path(root) -> str:
+    return os.path.join(str(as_paths(root).state), "memd.json")
+
+
+def _endpoint(root):
+    try:
+        with open(endpoint_path(root), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _connect(info):
+    if info.get("unix"):
+        if not hasattr(socket, "AF_UNIX"):
+            return None
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        address = info["unix"]
+    else:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        address = (info.get("host", "127.0.0.1"), info["port"])
+    sock.settimeout(CONNECT_TIMEOUT)
+    try:
+        sock.connect(address)
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+
+def memd_request(root, payload: dict, timeout: float = REQUEST_TIMEOUT):
+    """
+    Send one request. Returns the reply dict, or None if no daemon is
+    listening (nothing was sent). Raises MemdError if it answered with an
+    error or the connection broke mid-request.
+    """
+    info = _endpoint(root)
+    if not info:
+        return None
+    sock = _connect(info)
+    if sock is None:
+        return None
+    try:
+        sock.settimeout(timeout)
+        body = dict(payload, token=info.get("token"))
+        sock.sendall(json.dumps(body, ensure_ascii=False).encode("utf-8") + b"\n")
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    except OSError as e:
+        raise MemdError(f"memd connection failed: {e}")
+    finally:
+        sock.close()
+    try:
+        reply = json.loads(b"".join(chunks))
+    except ValueError:
+        raise MemdError("memd sent an unreadable reply")
+    if not reply.get("ok"):
+        raise MemdError(reply.get("error") or "memd request failed")
+    return reply
+
+
+def memd_read(root, payload: dict):
+    """
+    For read-only requests: any daemon problem just means "read directly".
+    """
+    try:
+        return memd_request(root, payload)
+    except MemdError:
+        return None
@@ -0,0 +1,313 @@
+"""
+Minimal Prometheus-style metrics for the habitat Flask apps.
+
+No client library needed: counters and histograms keep plain Python
+numbers per label set, and the text exposition format is only produced
+when /metrics is scraped. Recording is a dict lookup, a bisect and an
+add under a per-metric lock, so leaving it on costs next to nothing.
+
+    from nexus_metrics import REGISTRY, STAGE_SECONDS, install_flask
+    install_flask(app, service="cipher_server")
+
+    with STAGE_SECONDS.time(stage="model_call"):
+        ...
+"""
+import bisect
+import threading
+import time
+
+from nexus_state import Publisher, worker_id
+
+# Latency buckets in seconds: sub-millisecond file work up to slow model calls
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=None) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Timer:
+    __slots__ = ("metric", "labels", "t0")
+
+    def __init__(self, metric, labels):
+        self.metric = metric
+        self.labels = labels
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metric.observe(time.perf_counter() - self.t0, **self.labels)
+        return False
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def collect(self) -> dict:
+        with self._lock:
+            return dict(self._values)
+
+    @staticmethod
+    def merge(values: dict, other: dict):
+        for key, v in other.items():
+            values[key] = values.get(key, 0.0) + v
+
+    def render(self, values=None):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for key, value in sorted((values if values is not None else self.collect()).items()):
+            yield f"{self.name}{_labels(self.labelnames, key)} {value:g}"
+
+
+class Gauge(Counter):
+    """
+    A current value (set, not summed); across workers the largest wins.
+    """
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        with self._lock:
+            self._values[key] = float(value)
+
+    @staticmethod
+    def merge(values: dict, other: dict):
+        for key, v in other.items():
+            values[key] = max(values.get(key, v), v)
+
+    def render(self, values=None):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} gauge"
+        for key, value in sorted((values if values is not None else self.collect()).items()):
+            yield f"{self.name}{_labels(self.labelnames, key)} {value:g}"
+
+
+_LE_INF = 'le="+Inf"'
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}  # key -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            row[i] += 1
+            row[-1] += value
+
+    def time(self, **labels):
+        """
+        Context manager that observes the elapsed wall time in seconds.
+        """
+        return _Timer(self, labels)
+
+    def collect(self) -> dict:
+        with self._lock:
+            return {k: list(v) for k, v in self._values.items()}
+
+    @staticmethod
+    def merge(values: dict, other: dict):
+        for key, row in other.items():
+            mine = values.get(key)
+            if mine is None:
+                values[key] = list(row)
+            elif len(mine) == len(row):
+                values[key] = [a + b for a, b in zip(mine, row)]
+
+    def render(self, values=None):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for key, row in sorted((values if values is not None else self.collect()).items()):
+            running = 0
+            for bound, n in zip(self.buckets, row):
+                running += n
+                le = f'le="{bound:g}"'
+                yield f"{self.name}_bucket{_labels(self.labelnames, key, le)} {running}"
+            running += row[len(self.buckets)]
+            yield f"{self.name}_bucket{_labels(self.labelnames, key, _LE_INF)} {running}"
+            yield f"{self.name}_sum{_labels(self.labelnames, key)} {row[-1]:g}"
+            yield f"{self.name}_count{_labels(self.labelnames, key)} {running}"
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        return self.register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name, help_text, labelnames=()):
+        return self.register(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, help_text, labelnames, buckets))
+
+    def export(self) -> dict:
+        """
+        JSON-safe dump of every metric's values (for other workers to merge).
+        """
+        return {
+            m.name: [[list(key), value] for key, value in m.collect().items()]
+            for m in self.metrics
+        }
+
+    def render(self, others=()) -> str:
+        """
+        Text exposition format. `others` are export() dumps from other
+        worker processes; their values are summed into this process's.
+        """
+        lines = []
+        for m in self.metrics:
+            values = None
+            if others:
+                values = m.collect()
+                for ex in others:
+                    m.merge(values, {tuple(k): v for k, v in ex.get(m.name, [])})
+            lines.extend(m.render(values))
+        return "\n".join(lines) + "\n"
+
+
+# --- Shared habitat metrics ----------------------------------------
+REGISTRY = Registry()
+
+REQUEST_SECONDS = REGISTRY.histogram(
+    "echo_request_seconds", "HTTP request latency by route.",
+    ("service", "route", "method", "status"),
+)
+STAGE_SECONDS = REGISTRY.histogram(
+    "echo_stage_seconds", "Time spent in each chat-turn stage.",
+    ("stage",),
+)
+REPLIES_TOTAL = REGISTRY.counter(
+    "echo_replies_total", "Persona replies by source (model, stub, fallback).",
+    ("persona", "source"),
+)
+RATE_LIMITED_TOTAL = REGISTRY.counter(
+    "echo_rate_limited_total", "Requests refused with 429 by route and bucket scope.",
+    ("route", "scope"),
+)
+HANDSHAKE_REJECTS_TOTAL = REGISTRY.counter(
+    "echo_handshake_rejects_total", "Handshakes refused before consent logging (expired, replay, ...).",
+    ("reason",),
+)
+MALFORMED_LINES_TOTAL = REGISTRY.counter(
+    "echo_jsonl_malformed_lines_total", "Malformed JSONL lines skipped while reading streams.",
+    ("stream",),
+)
+REPLICA_LAG_BYTES = REGISTRY.gauge(
+    "echo_replica_lag_bytes", "Bytes the follower's copy of a stream is behind the leader.",
+    ("leader", "stream"),
+)
+REPLICA_LAG_SECONDS = REGISTRY.gauge(
+    "echo_replica_lag_seconds", "Seconds since the follower's copy of a stream last matched the leader.",
+    ("leader", "stream"),
+)
+REPLICA_BYTES_TOTAL = REGISTRY.counter(
+    "echo_replica_bytes_total", "Stream bytes shipped to the follower, raw and on the wire.",
+    ("leader", "stream", "form"),
+)
+REPLICA_ERRORS_TOTAL = REGISTRY.counter(
+    "echo_replica_errors_total", "Replication failures (unreachable, corrupt batch, diverged -> resync).",
+    ("leader", "stream", "reason"),
+)
+TENANTS_RESIDENT = REGISTRY.gauge(
+    "echo_tenants_resident", "Tenant habitats currently loaded in this process.",
+)
+TENANT_CACHE_BYTES = REGISTRY.gauge(
+    "echo_tenant_cache_bytes", "Estimated bytes held by loaded tenant habitats.",
+)
+TENANT_EVICTIONS_TOTAL = REGISTRY.counter(
+    "echo_tenant_evictions_total", "Idle tenant habitats unloaded to stay within the memory budget.",
+)
+WRITE_QUEUE_RECORDS_TOTAL = REGISTRY.counter(
+    "echo_write_queue_records_total", "Write-ahead queue records by event (queued, flushed, replayed).",
+    ("event",),
+)
+WRITE_QUEUE_STALLS_TOTAL = REGISTRY.counter(
+    "echo_write_queue_stalls_total", "Write-ahead queue waits: ring full, or a flush failed and is retried.",
+    ("reason",),
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def install_flask(app, service: str, registry: Registry = REGISTRY, state=None):
+    """
+    Time every request into echo_request_seconds and serve GET /metrics.
+    Routes are labelled by their URL rule, so label cardinality stays fixed.
+
+    With a nexus_state.SharedState and several workers, each worker
+    publishes its values every few seconds and /metrics sums them all.
+    """
+    from flask import Response, g, request
+
+    publisher = None
+    if state is not None and worker_id():
+        publisher = Publisher(state, "metrics/", registry.export, min_interval=5.0)
+
+    @app.before_request
+    def _metrics_start():
+        g._metrics_t0 = time.perf_counter()
+
+    @app.after_request
+    def _metrics_stop(response):
+        t0 = g.pop("_metrics_t0", None)
+        if t0 is not None:
+            rule = request.url_rule.rule if request.url_rule else "<unmatched>"
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - t0,
+                service=service, route=rule,
+                method=request.method, status=response.status_code,
+            )
+        if publisher is not None:
+            publisher.maybe_publish()
+        return response
+
+    @app.route("/metrics", methods=["GET"])
+    def metrics():
+        others = ()
+        if publisher is not None:
+            others = [v for k, v in state.items(publisher.prefix) if k != publisher.key]
+        return Response(registry.render(others), content_type=CONTENT_TYPE)
+
+    return app
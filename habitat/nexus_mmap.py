@@ -0,0 +1,201 @@
+"""
+Memory-mapped, zero-copy reads of a JSONL stream.
+
+The file is mapped read-only and line boundaries are found with
+bytes.rfind / find (memchr) on the mapping. Lines are handed out as
+memoryview slices of the map, so nothing is decoded or copied until a
+caller parses the records it actually wants:
+
+    with MappedStream(MEMORY_STREAM) as m:
+        lines = m.tail(20)                        # [memoryview, ...], oldest first
+        entries = [parse_line(l) for l in lines]
+        body = json_array(lines)                  # raw bytes for an HTTP response
+
+        for off, line in m.matching(rb'"tag":\\s*"Echo"', start=offset):
+            ...                                   # only lines containing a hit
+
+Views are only valid inside the `with` block (the map is closed on exit,
+which also keeps the file replaceable on Windows for compaction). A
+trailing line without its newline (a write in progress) is ignored.
+"""
+import json
+import mmap
+import os
+import re
+
+_BOM = b"\xef\xbb\xbf"
+
+
+class MappedStream:
+    """
+    Read-only mapping of one stream file; an empty or missing file maps to nothing.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._f = None
+        self._mm = None
+        self.view = memoryview(b"")
+        self.size = 0
+        self.begin = 0
+        self.ino = None
+
+    def __enter__(self):
+        try:
+            self._f = open(self.path, "rb")
+        except FileNotFoundError:
+            return self
+        self.ino = os.fstat(self._f.fileno()).st_ino
+        try:
+            self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty file: nothing to map
+            return self
+        self.view = memoryview(self._mm)
+        # Only whole lines: stop after the last newline
+        self.size = self._mm.rfind(b"\n") + 1
+        self.begin = len(_BOM) if self._mm[:len(_BOM)] == _BOM else 0
+        return self
+
+    def __exit__(self, *exc):
+        self.view.release()
+        if self._mm is not None:
+            try:
+                self._mm.close()
+            except BufferError:
+                # A caller kept a slice; the map closes when it is collected
+                pass
+        if self._f is not None:
+            self._f.close()
+        self._mm = self._f = None
+        return False
+
+    def _trim(self, start: int, end: int):
+        """
+        (start, end) of a line without surrounding whitespace / CR.
+        """
+        mm = self._mm
+        while start < end and mm[start] in b" \t\r":
+            start += 1
+        while end > start and mm[end - 1] in b" \t\r":
+            end -= 1
+        return start, end
+
+    def rlines(self, end: int = None):
+        """
+        Yield (offset, line view) for each non-empty line before byte `end`,
+        newest first.
+        """
+        if self._mm is None:
+            return
+        mm = self._mm
+        pos = self.size if end is None else min(end, self.size)
+        while pos > self.begin:
+            i = mm.rfind(b"\n", self.begin, pos - 1)
+            start = max(i + 1, self.begin)
+            a, b = self._trim(start, pos - 1)
+            if b > a:
+                yield start, self.view[a:b]
+            pos = start
+
+    def tail(self, n: int, end: int = None):
+        """
+        The last n non-empty lines (before byte `end`), oldest first.
+        """
+        if n <= 0:
+            return []
+        out = []
+        for _, line in self.rlines(end):
+            out.append(line)
+            if len(out) >= n:
+                break
+        out.reverse()
+        return out
+
+    def lines(self, start: int = 0, end: int = None):
+        """
+        Yield (offset, line view) for each non-empty line in [start, end).
+        """
+        if self._mm is None:
+            return
+        mm = self._mm
+        pos = max(start, self.begin)
+        end = self.size if end is None else min(end, self.size)
+        while pos < end:
+            nl = mm.find(b"\n", pos, end)
+            if nl < 0:
+                return
+            a, b = self._trim(pos, nl)
+            if b > a:
+                yield pos, self.view[a:b]
+            pos = nl + 1
+
+    def matching(self, pattern, start: int = 0, end: int = None):
+        """
+        Yield (offset, line view) for each line holding a match of `pattern`
+        (a bytes regex or compiled bytes pattern), each line once.
+        The search runs over the whole mapping, not line by line.
+        """
+        if self._mm is None:
+            return
+        if not isinstance(pattern, re.Pattern):
+            pattern = re.compile(pattern)
+        mm = self._mm
+        end = self.size if end is None else min(end, self.size)
+        pos = max(start, self.begin)
+        while pos < end:
+            m = pattern.search(mm, pos, end)
+            if m is None:
+                return
+            ls = max(mm.rfind(b"\n", self.begin, m.start()) + 1, self.begin)
+            le = mm.find(b"\n", m.start(), end)
+            if le < 0:
+                return
+            a, b = self._trim(ls, le)
+            if b > a:
+                yield ls, self.view[a:b]
+            pos = le + 1
+
+    def line_start(self, offset: int) -> int:
+        """
+        `offset` if it begins a line, else the start of the line holding it.
+        """
+        if self._mm is None or offset <= self.begin:
+            return self.begin
+        offset = min(offset, self.size)
+        return max(self._mm.rfind(b"\n", self.begin, offset) + 1, self.begin)
+
+    def next_line(self, offset: int) -> int:
+        """
+        Start of the line after the one holding `offset` (`size` at the end).
+        """
+        if self._mm is None or offset >= self.size:
+            return self.size
+        return self._mm.find(b"\n", max(offset, self.begin), self.size) + 1
+
+
+def parse_line(line):
+    """
+    One line view -> dict, or None if it isn't a JSON object.
+    """
+    try:
+        obj = json.loads(bytes(line))
+    except ValueError:
+        return None
+    return obj if isinstance(obj, dict) else None
+
+
+def is_record(line) -> bool:
+    """
+    True if a line can be passed through as stored: a {...} that parses as
+    a JSON object. The brace check alone lets a torn write followed by a
+    record through ({"ts":..,"kind":"ev{"ts":..}), so the line is parsed too.
+    """
+    return len(line) >= 2 and line[0] == 0x7B and line[-1] == 0x7D and parse_line(line) is not None
+
+
+def json_array(lines) -> bytes:
+    """
+    b"[line,line,...]" from line views: the only copy is the output itself.
+    """
+    return b"[" + b",".join(lines) + b"]"
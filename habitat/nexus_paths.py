@@ -0,0 +1,168 @@
+"""
+Where an Echo Nexus habitat lives: one resolved set of paths per process.
+
+Every app and CLI takes its folders from here, so the server, the daemon
+and the echo_* scripts always agree on which stream files they share:
+
+    from nexus_paths import get_paths
+    PATHS = get_paths(start=__file__)
+    PATHS.stream("root_memory.jsonl")     <root>/memory/streams/root_memory.jsonl
+    PATHS.state / "nexus_state.db"
+
+The root is, in order:
+
+    1. an explicit root (a CLI's --root)
+    2. ECHO_NEXUS_ROOT
+    3. "Root" in the config file named by ECHO_NEXUS_CONFIG (relative to
+       the file's folder), else the folder above the file's config/ folder
+    4. the nearest folder holding a .echo_nexus_root marker, walking up
+       from `start` (a script path; default: this file)
+    5. the folder above `start`'s folder (habitat/..)
+
+The config is ECHO_NEXUS_CONFIG, else <root>/config/nexus_config.json
+(written by init_echo_nexus.ps1, so it may carry a BOM); an explicit root
+always reads its own. Its optional "Paths" object moves any folder,
+relative to the root or absolute:
+
+    {"Name": "Echo Nexus", "Paths": {"Streams": "/srv/echo/alice/streams", "State": "/run/echo/alice"}}
+
+Several isolated habitats on one host are then one ECHO_NEXUS_ROOT or
+ECHO_NEXUS_CONFIG per process. Results are cached per (root, start); a
+broken config raises instead of quietly falling back to another layout.
+"""
+import json
+import os
+from functools import lru_cache
+from pathlib import Path
+
+MARKER = ".echo_nexus_root"
+CONFIG_NAME = Path("config") / "nexus_config.json"
+
+# "Paths" key -> default location under the root
+LAYOUT = {
+    "Streams": Path("memory") / "streams",
+    "Profiles": Path("memory") / "profiles",
+    "Anchors": Path("memory") / "anchors",
+    "Snapshots": Path("memory") / "snapshots",
+    "Ledger": Path("memory") / "ledger",
+    "Replicas": Path("memory") / "replicas",
+    "Seeds": Path("habitat"),
+    "Tenants": Path("tenants"),
+    "State": Path("state"),
+    "Logs": Path("logs"),
+}
+
+
+class NexusPaths:
+    """
+    The resolved layout of one habitat. Attributes are absolute Paths:
+    root, config, and one per LAYOUT key (streams, profiles, ...);
+    `settings` is the parsed config ({} without one).
+    """
+
+    __slots__ = ("root", "config", "settings") + tuple(key.lower() for key in LAYOUT)
+
+    def __init__(self, root: Path, config: Path, settings: dict):
+        self.root = root
+        self.config = config
+        self.settings = settings
+        overrides = settings.get("Paths") or {}
+        if not isinstance(overrides, dict):
+            raise ValueError(f"{config}: \"Paths\" must be an object")
+        for key, default in LAYOUT.items():
+            value = overrides.get(key)
+            path = Path(os.path.expanduser(value)) if value else default
+            setattr(self, key.lower(), path if path.is_absolute() else root / path)
+
+    def stream(self, name: str) -> Path:
+        return self.streams / name
+
+    def as_dict(self) -> dict:
+        return {name: str(getattr(self, name)) for name in self.__slots__ if name != "settings"}
+
+    def __repr__(self):
+        return f"NexusPaths(root={str(self.root)!r}, config={str(self.config)!r})"
+
+
+def read_config(path: Path) -> dict:
+    """
+    A nexus_config.json as a dict ({} when missing). BOMs are fine.
+    """
+    try:
+        text = Path(path).read_text(encoding="utf-8-sig")
+    except FileNotFoundError:
+        return {}
+    try:
+        settings = json.loads(text)
+    except ValueError as e:
+        raise ValueError(f"Unreadable Echo Nexus config {path}: {e}") from None
+    if not isinstance(settings, dict):
+        raise ValueError(f"Echo Nexus config {path} must be a JSON object")
+    return settings
+
+
+def find_root(start=None) -> Path:
+    """
+    The nearest folder with a .echo_nexus_root marker above `start`, else
+    `start`'s parent folder (scripts live in <root>/habitat).
+    """
+    here = Path(start or __file__).resolve()
+    if not here.is_dir():
+        here = here.parent
+    for folder in (here, *here.parents):
+        if (folder / MARKER).is_file():
+            return folder
+    return here.parent
+
+
+@lru_cache(maxsize=None)
+def _resolve(root, start, env_root, env_config) -> NexusPaths:
+    config = Path(env_config).expanduser().resolve() if env_config and not root else None
+    if root:
+        root = Path(root).expanduser().resolve()
+    elif env_root:
+        root = Path(env_root).expanduser().resolve()
+    if config is not None:
+        settings = read_config(config)
+        if root is None:
+            anchor = settings.get("Root")
+            root = (config.parent / anchor).resolve() if anchor else config.parent.parent
+    else:
+        root = root or find_root(start)
+        config = root / CONFIG_NAME
+        settings = read_config(config)
+    return NexusPaths(root, config, settings)
+
+
+def get_paths(root=None, start=None) -> NexusPaths:
+    """
+    This habitat's NexusPaths (see the module docstring for the order).
+    `root` is an explicit root, e.g. a CLI's --root; `start` the calling
+    script, so a copied habitat/ folder finds its own root.
+    """
+    return _resolve(str(root) if root else None, str(start) if start else None,
+                    os.getenv("ECHO_NEXUS_ROOT") or None, os.getenv("ECHO_NEXUS_CONFIG") or None)
+
+
+def as_paths(root) -> NexusPaths:
+    """
+    A NexusPaths as is; a root folder -> get_paths(root).
+    """
+    return root if isinstance(root, NexusPaths) else get_paths(root)
+
+
+def main():
+    # Usage:
+    #   nexus_paths.py                       -> the resolved layout as JSON
+    #   nexus_paths.py --root /srv/echo/alice
+    #
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Show where this Echo Nexus habitat's files live.")
+    ap.add_argument("--root", help="Echo Nexus root (default: see nexus_paths.py)")
+    args = ap.parse_args()
+    print(json.dumps(get_paths(args.root).as_dict(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
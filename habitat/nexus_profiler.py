@@ -0,0 +1,253 @@
+"""
+Runtime-toggleable sampling profiler for the habitat Flask apps.
+
+Nothing runs until an admin starts a profiling window:
+
+    POST /admin/profile        {"seconds": 30, "interval_ms": 5, "format": "collapsed"}
+    POST /admin/profile/stop
+    GET  /admin/profile        status + recent output files
+
+While a window is open, a daemon thread samples every thread's stack via
+sys._current_frames() (pure Python, no restart, no debug build), and each
+request's wall and CPU time is recorded. When the window ends the samples
+are written to logs/profiles/:
+
+    <service>_<utc>.collapsed          flamegraph.pl / speedscope "collapsed stacks"
+    <service>_<utc>.speedscope.json    speedscope sampled profile (format="speedscope")
+    <service>_<utc>.requests.jsonl     one line per request: route, wall_ms, cpu_ms
+
+Admin routes answer only to loopback clients, unless ECHO_ADMIN_TOKEN is
+set, in which case the X-Echo-Admin-Token header must match it.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+MAX_SECONDS = 300
+MIN_INTERVAL_MS = 1
+MAX_STACK_DEPTH = 64
+FORMATS = ("collapsed", "speedscope")
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{Path(code.co_filename).stem}.{code.co_name}"
+
+
+def _stack(frame):
+    """
+    Root-first list of frame names, capped at MAX_STACK_DEPTH.
+    """
+    names = []
+    while frame is not None and len(names) < MAX_STACK_DEPTH:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    names.reverse()
+    return names
+
+
+class SamplingProfiler:
+    """
+    One bounded profiling window. start() spawns the sampler thread; the
+    window closes after `seconds` or on stop(), then results are written.
+    """
+
+    def __init__(self, service: str, out_dir, seconds: float = 30,
+                 interval_ms: float = 5, fmt: str = "collapsed"):
+        self.service = service
+        self.out_dir = Path(out_dir)
+        self.seconds = min(float(seconds), MAX_SECONDS)
+        self.interval = max(float(interval_ms), MIN_INTERVAL_MS) / 1000.0
+        self.fmt = fmt if fmt in FORMATS else "collapsed"
+        self.stacks = Counter()
+        self.samples = 0
+        self.requests = []
+        self.started_at = None
+        self.outputs = []
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        stamp = datetime.now(tz=timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        self.base = self.out_dir / f"{service}_{stamp}"
+
+    @property
+    def active(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name="nexus-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+
+    def record_request(self, route: str, method: str, status: int, wall_ms: float, cpu_ms: float):
+        with self._lock:
+            self.requests.append({
+                "route": route, "method": method, "status": status,
+                "wall_ms": round(wall_ms, 3), "cpu_ms": round(cpu_ms, 3),
+            })
+
+    def _run(self):
+        me = threading.get_ident()
+        names = {}
+        deadline = time.monotonic() + self.seconds
+        while not self._stop.is_set() and time.monotonic() < deadline:
+            if len(names) != threading.active_count():
+                names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = _stack(frame)
+                stack.insert(0, names.get(ident, f"thread-{ident}"))
+                self.stacks[tuple(stack)] += 1
+            self.samples += 1
+            self._stop.wait(self.interval)
+        self._write()
+
+    def _write(self):
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        if self.fmt == "speedscope":
+            path = self.base.with_name(self.base.name + ".speedscope.json")
+            path.write_text(json.dumps(self._speedscope()), encoding="utf-8")
+        else:
+            path = self.base.with_name(self.base.name + ".collapsed")
+            with path.open("w", encoding="utf-8") as f:
+                for stack, n in self.stacks.most_common():
+                    f.write(";".join(stack) + f" {n}\n")
+        self.outputs.append(str(path))
+
+        with self._lock:
+            requests = list(self.requests)
+        if requests:
+            req_path = self.base.with_name(self.base.name + ".requests.jsonl")
+            with req_path.open("w", encoding="utf-8") as f:
+                for r in requests:
+                    f.write(json.dumps(r, ensure_ascii=False) + "\n")
+            self.outputs.append(str(req_path))
+
+    def _speedscope(self) -> dict:
+        frames = []
+        index = {}
+        by_thread = {}
+        for stack, n in self.stacks.items():
+            thread, calls = stack[0], stack[1:]
+            ids = []
+            for name in calls:
+                if name not in index:
+                    index[name] = len(frames)
+                    frames.append({"name": name})
+                ids.append(index[name])
+            samples, weights = by_thread.setdefault(thread, ([], []))
+            samples.append(ids)
+            weights.append(n * self.interval)
+        profiles = []
+        for thread, (samples, weights) in sorted(by_thread.items()):
+            profiles.append({
+                "type": "sampled", "name": thread, "unit": "seconds",
+                "startValue": 0, "endValue": sum(weights),
+                "samples": samples, "weights": weights,
+            })
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": self.base.name,
+            "exporter": "nexus_profiler",
+            "shared": {"frames": frames},
+            "profiles": profiles,
+        }
+
+    def status(self) -> dict:
+        return {
+            "active": self.active,
+            "service": self.service,
+            "started_at": self.started_at,
+            "seconds": self.seconds,
+            "interval_ms": self.interval * 1000.0,
+            "format": self.fmt,
+            "samples": self.samples,
+            "requests": len(self.requests),
+            "outputs": self.outputs,
+        }
+
+
+def _admin_allowed(request) -> bool:
+    token = os.getenv("ECHO_ADMIN_TOKEN")
+    if token:
+        return request.headers.get("X-Echo-Admin-Token") == token
+    return request.remote_addr in ("127.0.0.1", "::1")
+
+
+def install_flask(app, service: str, out_dir):
+    """
+    Add /admin/profile routes and per-request wall/CPU timing to `app`.
+    Profiles are written under `out_dir` (usually <root>/logs/profiles).
+    """
+    from flask import g, jsonify, request
+
+    state = {"current": None}
+
+    def current():
+        prof = state["current"]
+        return prof if prof is not None and prof.active else None
+
+    @app.before_request
+    def _profile_start():
+        if current() is not None:
+            g._profile_t = (time.perf_counter(), time.thread_time())
+
+    @app.after_request
+    def _profile_stop(response):
+        t = g.pop("_profile_t", None)
+        prof = current()
+        if t is not None and prof is not None:
+            rule = request.url_rule.rule if request.url_rule else "<unmatched>"
+            prof.record_request(
+                rule, request.method, response.status_code,
+                (time.perf_counter() - t[0]) * 1000.0,
+                (time.thread_time() - t[1]) * 1000.0,
+            )
+        return response
+
+    @app.route("/admin/profile", methods=["GET", "POST"])
+    def admin_profile():
+        if not _admin_allowed(request):
+            return jsonify({"error": "admin access denied"}), 403
+        if request.method == "GET":
+            prof = state["current"]
+            return jsonify(prof.status() if prof else {"active": False}), 200
+
+        if current() is not None:
+            return jsonify({"error": "profile already running", **current().status()}), 409
+        data = request.get_json(silent=True) or {}
+        try:
+            prof = SamplingProfiler(
+                service, out_dir,
+                seconds=data.get("seconds", 30),
+                interval_ms=data.get("interval_ms", 5),
+                fmt=data.get("format", "collapsed"),
+            )
+        except (TypeError, ValueError) as e:
+            return jsonify({"error": f"Bad profile options: {e}"}), 400
+        state["current"] = prof.start()
+        return jsonify(prof.status()), 202
+
+    @app.route("/admin/profile/stop", methods=["POST"])
+    def admin_profile_stop():
+        if not _admin_allowed(request):
+            return jsonify({"error": "admin access denied"}), 403
+        prof = state["current"]
+        if prof is None:
+            return jsonify({"active": False}), 200
+        prof.stop()
+        return jsonify(prof.status()), 200
+
+    return app
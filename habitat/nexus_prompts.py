@@ -0,0 +1,119 @@
+"""
+Prompt assembly for the personas: a shared static prefix plus per-turn tail.
+
+Every request for a persona starts with the same system message (base
+prompt + seed, compiled by nexus_seeds). PromptEngine builds that prefix
+once per seed version as an immutable tuple and hashes it; assemble()
+then returns a PromptMessages view that chains prefix + history + the new
+user message without copying any of them into a fresh list.
+
+    PROMPTS = PromptEngine(SEEDS)
+    messages = PROMPTS.assemble("cipher", history, message)
+    PROMPTS.prefix("cipher").hash     # stable while the seed is unchanged
+
+The prefix hash is what upstream prompt caching keys on (it is sent as
+`prompt_cache_key`), and it is listed under /echo/prompts so a changed hash
+explains a drop in cache hits.
+"""
+import hashlib
+import json
+import threading
+from collections.abc import Sequence
+from itertools import chain
+
+
+def prefix_hash(messages) -> str:
+    """
+    Short stable hash of a message prefix (canonical JSON, sha256).
+    """
+    blob = json.dumps(list(messages), sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:16]
+
+
+class PromptPrefix:
+    """
+    One persona's compiled static prefix (replaced, never mutated).
+    """
+    __slots__ = ("persona", "messages", "hash", "seed_version", "source")
+
+    def __init__(self, persona: str, system_prompt: str, seed_version: int, source):
+        self.persona = persona
+        self.messages = ({"role": "system", "content": system_prompt},)
+        self.hash = prefix_hash(self.messages)
+        self.seed_version = seed_version
+        self.source = source
+
+    def info(self) -> dict:
+        return {
+            "persona": self.persona,
+            "hash": self.hash,
+            "seed_version": self.seed_version,
+            "prefix_chars": sum(len(m["content"]) for m in self.messages),
+        }
+
+
+class PromptMessages(Sequence):
+    """
+    Read-only message list: prefix + history + tail, without copying.
+    Iterates (and indexes) like the list the OpenAI client expects.
+    """
+    __slots__ = ("prefix", "history", "tail")
+
+    def __init__(self, prefix: PromptPrefix, history, tail):
+        self.prefix = prefix
+        self.history = history
+        self.tail = tail
+
+    def __len__(self):
+        return len(self.prefix.messages) + len(self.history) + len(self.tail)
+
+    def __iter__(self):
+        return chain(self.prefix.messages, self.history, self.tail)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return list(self)[i]
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError(i)
+        for part in (self.prefix.messages, self.history, self.tail):
+            if i < len(part):
+                return part[i]
+            i -= len(part)
+
+    def chars(self) -> int:
+        return sum(len(m.get("content") or "") for m in self)
+
+
+class PromptEngine:
+    """
+    persona -> PromptPrefix, rebuilt only when the persona's seed changes.
+    """
+
+    def __init__(self, seeds):
+        self.seeds = seeds
+        self._lock = threading.Lock()
+        self._prefixes = {}
+
+    def prefix(self, persona: str) -> PromptPrefix:
+        seed = self.seeds.get(persona)
+        cur = self._prefixes.get(persona)
+        if cur is not None and cur.source is seed:
+            return cur
+        with self._lock:
+            cur = self._prefixes.get(persona)
+            if cur is None or cur.source is not seed:
+                cur = self._prefixes[persona] = PromptPrefix(persona, seed.prompt, seed.version, seed)
+        return cur
+
+    def assemble(self, persona: str, history, message: str) -> PromptMessages:
+        """
+        Messages for one turn. `history` is used as-is (not copied), so the
+        caller must not mutate it while the request is in flight.
+        """
+        return PromptMessages(self.prefix(persona), history, ({"role": "user", "content": message},))
+
+    def info(self) -> dict:
+        return {p: self.prefix(p).info() for p in self.seeds.base_prompts}
@@ -0,0 +1,419 @@
+"""
+Log-shipping replication of memory streams between habitat nodes.
+
+The leader serves its JSONL streams by byte offset; a follower tails them
+over HTTP into its own root, under memory/replicas/<node>/, so its local
+streams (and its own chat) are never touched:
+
+    GET /replica/streams                       [{"name", "size"}, ...]
+    GET /replica/stream/<name>?offset=N&max_bytes=M
+
+A batch is the whole lines in [offset, offset + max_bytes), gzipped on
+the wire, with headers:
+
+    X-Echo-Offset / X-Echo-End / X-Echo-Size   byte range and leader size
+    X-Echo-Chunk-Hash    blake2b of the raw batch (transport check)
+    X-Echo-Prefix-Hash   blake2b of the leader's stream bytes [0, End)
+
+The follower keeps the same running hash over its copy and appends a batch
+only if hash(copy + batch) equals the leader's prefix hash, so every poll,
+even an empty one, proves the copy is a byte-for-byte prefix of the
+leader's stream. If it isn't (the leader compacted or was restored, the
+copy was edited), the follower re-downloads the stream into a side file
+and swaps it in. The leader keeps a few running hash states per stream,
+so a follower that keeps up costs it one pass over the new bytes.
+
+Lag is exported as metrics: echo_replica_lag_bytes and
+echo_replica_lag_seconds (since the copy last matched the leader's end).
+
+Access: with ECHO_REPLICA_TOKEN set, the X-Echo-Replica-Token header must
+match it; otherwise only loopback clients are served.
+"""
+import gzip
+import hashlib
+import os
+import re
+import threading
+import time
+import urllib.parse
+from collections import OrderedDict
+from pathlib import Path
+
+from nexus_index import StreamIndex
+from nexus_metrics import REPLICA_BYTES_TOTAL, REPLICA_ERRORS_TOTAL, REPLICA_LAG_BYTES, REPLICA_LAG_SECONDS
+from nexus_mmap import MappedStream
+from nexus_paths import as_paths
+from nexus_streams import get_writer, try_lock_file
+
+MAX_BATCH_BYTES = 1024 * 1024
+HASH_SIZE = 16
+KEEP_HASH_STATES = 16
+POLL_INTERVAL_S = 2.0
+HTTP_TIMEOUT_S = 30.0
+TOKEN_HEADER = "X-Echo-Replica-Token"
+
+
+class ReplicaError(Exception):
+    """
+    The leader could not be reached or sent something unusable.
+    """
+
+
+def _new_hash():
+    return hashlib.blake2b(digest_size=HASH_SIZE)
+
+
+def _stream_name(name) -> str:
+    name = str(name or "")
+    if not name.endswith(".jsonl") or os.path.basename(name) != name:
+        raise ValueError(f"Bad stream name: {name!r}")
+    return name
+
+
+# --- Leader ---
+
+class ReplicaSource:
+    """
+    Serves byte ranges of the streams under `streams_dir`, with prefix hashes.
+    """
+
+    def __init__(self, streams_dir):
+        self.streams_dir = Path(streams_dir)
+        self._states = {}  # (path, inode) -> OrderedDict(offset -> running hash)
+        self._lock = threading.Lock()
+
+    def streams(self):
+        out = []
+        for path in sorted(self.streams_dir.glob("*.jsonl")):
+            with MappedStream(path) as m:
+                out.append({"name": path.name, "size": m.size})
+        return out
+
+    def _prefix_hash(self, m: MappedStream, key, end: int) -> str:
+        with self._lock:
+            states = self._states.setdefault(key, OrderedDict())
+            start = max((off for off in states if off <= end), default=0)
+            h = states[start].copy() if start else _new_hash()
+        if end > start:
+            h.update(m.view[start:end])
+        with self._lock:
+            states[end] = h.copy()
+            states.move_to_end(end)
+            while len(states) > KEEP_HASH_STATES:
+                states.popitem(last=False)
+        return h.hexdigest()
+
+    def read(self, name: str, offset: int, max_bytes: int = MAX_BATCH_BYTES) -> dict:
+        """
+        Whole lines from `offset`, at most max_bytes (at least one line).
+        Raises ValueError if `offset` is past the leader's end.
+        """
+        path = self.streams_dir / _stream_name(name)
+        with MappedStream(path) as m:
+            if offset < 0 or offset > m.size:
+                raise ValueError(f"offset {offset} is past the end of {name} ({m.size} bytes)")
+            end = min(m.size, offset + max(1, max_bytes))
+            if end < m.size:
+                end = m.line_start(end)
+                if end <= offset:
+                    end = m.next_line(offset)
+            data = bytes(m.view[offset:end])
+            prefix = self._prefix_hash(m, (str(path), m.ino), end)
+            size = m.size
+        return {
+            "offset": offset,
+            "end": end,
+            "size": size,
+            "data": data,
+            "chunk_hash": hashlib.blake2b(data, digest_size=HASH_SIZE).hexdigest(),
+            "prefix_hash": prefix,
+        }
+
+
+def _allowed(request) -> bool:
+    token = os.getenv("ECHO_REPLICA_TOKEN")
+    if token:
+        return request.headers.get(TOKEN_HEADER) == token
+    return request.remote_addr in ("127.0.0.1", "::1")
+
+
+def install_flask(app, streams_dir, follower=None):
+    """
+    Add the leader routes for `streams_dir` to `app`, plus
+    GET /replica/status for a follower running in this process.
+    """
+    from flask import Response, jsonify, request
+
+    source = ReplicaSource(streams_dir)
+
+    @app.route("/replica/streams", methods=["GET"])
+    def replica_streams():
+        if not _allowed(request):
+            return jsonify({"error": "replica access denied"}), 403
+        return jsonify({"streams": source.streams()}), 200
+
+    @app.route("/replica/stream/<name>", methods=["GET"])
+    def replica_stream(name):
+        if not _allowed(request):
+            return jsonify({"error": "replica access denied"}), 403
+        try:
+            offset = int(request.args.get("offset", "0"))
+            max_bytes = min(int(request.args.get("max_bytes", MAX_BATCH_BYTES)), 16 * MAX_BATCH_BYTES)
+            batch = source.read(name, offset, max_bytes)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 409
+        body = batch["data"]
+        headers = {
+            "X-Echo-Offset": str(batch["offset"]),
+            "X-Echo-End": str(batch["end"]),
+            "X-Echo-Size": str(batch["size"]),
+            "X-Echo-Chunk-Hash": batch["chunk_hash"],
+            "X-Echo-Prefix-Hash": batch["prefix_hash"],
+        }
+        if body and "gzip" in request.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body, compresslevel=6)
+            headers["Content-Encoding"] = "gzip"
+        return Response(body, status=200, headers=headers, mimetype="application/octet-stream")
+
+    @app.route("/replica/status", methods=["GET"])
+    def replica_status():
+        if not _allowed(request):
+            return jsonify({"error": "replica access denied"}), 403
+        return jsonify({"following": follower.status() if follower else None}), 200
+
+    return source
+
+
+# --- Follower ---
+
+class _Copy:
+    """
+    Follower-side state of one replicated stream.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.offset = 0
+        self.hash = _new_hash()
+        self.leader_size = None
+        self.synced_at = None
+        self.resyncs = 0
+        self.last_resync = None
+        self.error = None
+        self._load()
+
+    def _load(self):
+        # One pass over the existing copy to seed the running hash. Only
+        # whole lines count; a torn tail (crash mid-write) is cut off
+        with MappedStream(self.path) as m:
+            if m.size:
+                self.hash.update(m.view[:m.size])
+            self.offset = m.size
+        try:
+            if self.path.stat().st_size > self.offset:
+                with open(self.path, "r+b") as f:
+                    f.truncate(self.offset)
+        except FileNotFoundError:
+            pass
+
+    def status(self) -> dict:
+        return {
+            "offset": self.offset,
+            "leader_size": self.leader_size,
+            "lag_bytes": None if self.leader_size is None else max(0, self.leader_size - self.offset),
+            "synced_at": self.synced_at,
+            "resyncs": self.resyncs,
+            "last_resync": self.last_resync,
+            "error": self.error,
+        }
+
+
+class Follower:
+    """
+    Tails `streams` from the leader at `leader_url` into `replica_dir`.
+    """
+
+    def __init__(self, leader_url: str, streams, replica_dir, token: str = None,
+                 interval: float = POLL_INTERVAL_S, max_bytes: int = MAX_BATCH_BYTES):
+        self.leader_url = leader_url.rstrip("/")
+        self.leader = urllib.parse.urlsplit(self.leader_url).netloc or self.leader_url
+        self.replica_dir = Path(replica_dir)
+        self.token = token if token is not None else os.getenv("ECHO_REPLICA_TOKEN")
+        self.interval = interval
+        self.max_bytes = max_bytes
+        self.copies = {name: _Copy(self.replica_dir / _stream_name(name)) for name in streams}
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock_fd = None
+
+    # --- HTTP ---
+
+    def _get(self, name: str, offset: int) -> dict:
+        # Only followers need an HTTP client; leaders skip the import
+        import urllib.error
+        import urllib.request
+
+        query = urllib.parse.urlencode({"offset": offset, "max_bytes": self.max_bytes})
+        req = urllib.request.Request(f"{self.leader_url}/replica/stream/{urllib.parse.quote(name)}?{query}",
+                                     headers={"Accept-Encoding": "gzip"})
+        if self.token:
+            req.add_header(TOKEN_HEADER, self.token)
+        try:
+            with urllib.request.urlopen(req, timeout=HTTP_TIMEOUT_S) as resp:
+                wire = resp.read()
+                headers = resp.headers
+        except urllib.error.HTTPError as e:
+            if e.code == 409:
+                return {"gap": True}
+            raise ReplicaError(f"{name}: leader answered {e.code}")
+        except (OSError, ValueError) as e:
+            REPLICA_ERRORS_TOTAL.inc(leader=self.leader, stream=name, reason="unreachable")
+            raise ReplicaError(f"{name}: leader unreachable ({e})")
+        data = gzip.decompress(wire) if headers.get("Content-Encoding") == "gzip" else wire
+        REPLICA_BYTES_TOTAL.inc(len(data), leader=self.leader, stream=name, form="raw")
+        REPLICA_BYTES_TOTAL.inc(len(wire), leader=self.leader, stream=name, form="wire")
+        batch = {
+            "offset": int(headers["X-Echo-Offset"]),
+            "end": int(headers["X-Echo-End"]),
+            "size": int(headers["X-Echo-Size"]),
+            "prefix_hash": headers["X-Echo-Prefix-Hash"],
+            "data": data,
+        }
+        if (hashlib.blake2b(data, digest_size=HASH_SIZE).hexdigest() != headers["X-Echo-Chunk-Hash"]
+                or batch["end"] - batch["offset"] != len(data)):
+            REPLICA_ERRORS_TOTAL.inc(leader=self.leader, stream=name, reason="corrupt")
+            raise ReplicaError(f"{name}: batch at {offset} failed its checksum")
+        return batch
+
+    # --- Sync ---
+
+    def sync_once(self, name: str) -> int:
+        """
+        Pull everything the leader has for one stream. Returns bytes appended.
+        """
+        copy = self.copies[name]
+        appended = 0
+        while True:
+            batch = self._get(name, copy.offset)
+            if batch.get("gap"):
+                return appended + self._resync(name, "leader shorter than copy")
+            h = copy.hash.copy()
+            h.update(batch["data"])
+            if h.hexdigest() != batch["prefix_hash"]:
+                return appended + self._resync(name, "prefix hash mismatch")
+            if batch["data"]:
+                get_writer(copy.path).write_bytes(batch["data"])
+                copy.offset = batch["end"]
+                copy.hash = h
+                appended += len(batch["data"])
+            copy.leader_size = batch["size"]
+            self._observe(name, copy)
+            if copy.offset >= batch["size"] or not batch["data"]:
+                return appended
+
+    def _resync(self, name: str, reason: str) -> int:
+        """
+        Fetch the leader's stream from scratch into a side file, then swap it in.
+        """
+        REPLICA_ERRORS_TOTAL.inc(leader=self.leader, stream=name, reason="diverged")
+        copy = self.copies[name]
+        tmp = copy.path.with_name(copy.path.name + ".resync")
+        h, offset = _new_hash(), 0
+        with open(tmp, "wb") as f:
+            while True:
+                batch = self._get(name, offset)
+                if batch.get("gap"):
+                    # The leader shrank again mid-copy: start over next poll
+                    raise ReplicaError(f"{name}: leader changed during resync")
+                h.update(batch["data"])
+                if h.hexdigest() != batch["prefix_hash"]:
+                    raise ReplicaError(f"{name}: leader changed during resync")
+                f.write(batch["data"])
+                offset = batch["end"]
+                if offset >= batch["size"] or not batch["data"]:
+                    break
+        with get_writer(copy.path).locked():
+            os.replace(tmp, copy.path)
+        StreamIndex(copy.path).replace([], [])
+        copy.offset, copy.hash, copy.leader_size = offset, h, batch["size"]
+        copy.resyncs += 1
+        copy.last_resync = reason
+        self._observe(name, copy)
+        return offset
+
+    def _observe(self, name: str, copy: _Copy):
+        now = time.time()
+        if copy.leader_size is not None and copy.offset >= copy.leader_size:
+            copy.synced_at = now
+        REPLICA_LAG_BYTES.set(max(0, (copy.leader_size or 0) - copy.offset), leader=self.leader, stream=name)
+        if copy.synced_at is not None:
+            REPLICA_LAG_SECONDS.set(now - copy.synced_at, leader=self.leader, stream=name)
+
+    def sync_all(self) -> int:
+        total = 0
+        for name, copy in self.copies.items():
+            try:
+                total += self.sync_once(name)
+                copy.error = None
+            except ReplicaError as e:
+                copy.error = str(e)
+                self._observe(name, copy)
+        return total
+
+    # --- Background ---
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.sync_all()
+            self._stop.wait(self.interval)
+
+    def start(self) -> bool:
+        """
+        Follow in a daemon thread. Among several processes sharing the
+        replica dir (nexus_serve workers) only one follows; the others
+        return False.
+        """
+        self.replica_dir.mkdir(parents=True, exist_ok=True)
+        lock_path = self.replica_dir / ".follower.lock"
+        fd = os.open(str(lock_path), os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o644)
+        if not try_lock_file(fd):
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        self._thread = threading.Thread(target=self._run, name="replica-follower", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=HTTP_TIMEOUT_S)
+
+    def status(self) -> dict:
+        return {
+            "leader": self.leader_url,
+            "replica_dir": str(self.replica_dir),
+            "streams": {name: copy.status() for name, copy in self.copies.items()},
+        }
+
+
+def node_name(leader_url: str) -> str:
+    """
+    Folder name for a leader's replicas: host_port.
+    """
+    netloc = urllib.parse.urlsplit(leader_url).netloc or leader_url
+    return re.sub(r"[^\w.-]+", "_", netloc).strip("_") or "leader"
+
+
+def follower_from_env(root, default_streams):
+    """
+    The Follower configured by ECHO_REPLICA_LEADER (+ ECHO_REPLICA_STREAMS,
+    ECHO_REPLICA_NODE), or None when this node isn't a follower. `root` is
+    a NexusPaths or a root folder; copies go to its replicas folder.
+    """
+    leader = os.getenv("ECHO_REPLICA_LEADER")
+    if not leader:
+        return None
+    streams = [s for s in os.getenv("ECHO_REPLICA_STREAMS", ",".join(default_streams)).split(",") if s]
+    node = os.getenv("ECHO_REPLICA_NODE") or node_name(leader)
+    return Follower(leader, streams, as_paths(root).replicas / node)
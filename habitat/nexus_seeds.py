@@ -0,0 +1,222 @@
+"""
+Persona seed registry: parsed, cached, hot-reloaded seeds.
+
+Seeds (cipher_import_seed.json, vexis_import_seed.json, ...) are loaded
+once, and each persona's system prompt is compiled from its base prompt
+plus the seed's role, core_concepts and notes. Reply generation then just
+reads `SEEDS.system_prompt("cipher")` -- no file I/O, no string work.
+
+A daemon thread polls the registered seed files (mtime + size; there is
+no portable inotify in the stdlib) and recompiles a persona when its file
+changes, so a seed edit is live within `poll_interval` seconds. A seed
+that fails to parse keeps the previous version and records the error.
+
+With a nexus_state.SharedState, registrations are also stored under
+"seed_paths" so every worker process picks up an /cipher/import done by
+any one of them.
+"""
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+POLL_INTERVAL = 2.0
+
+
+def load_seed(path: Path) -> dict:
+    """
+    Read a seed JSON file, tolerating a UTF-8 BOM.
+    """
+    with Path(path).open("r", encoding="utf-8-sig") as f:
+        return json.load(f)
+
+
+def compile_prompt(base: str, seed: dict = None) -> str:
+    """
+    Base persona prompt + the seed's role, core concepts and notes.
+    """
+    if not seed:
+        return base
+    parts = [base]
+    role = seed.get("role")
+    if role:
+        parts.append(f"Seed role: {role}")
+    concepts = seed.get("core_concepts") or []
+    if concepts:
+        parts.append("Core concepts:\n" + "\n".join(f"- {c}" for c in concepts))
+    notes = seed.get("notes") or []
+    if notes:
+        parts.append("Seed notes:\n" + "\n".join(f"- {n}" for n in notes))
+    return "\n\n".join(parts)
+
+
+class PersonaSeed:
+    """
+    One persona's current seed and compiled prompt (replaced, never mutated).
+    """
+    __slots__ = ("persona", "path", "seed", "prompt", "loaded_at_utc", "version", "stamp", "error")
+
+    def __init__(self, persona, path, seed, prompt, version, stamp, error=None):
+        self.persona = persona
+        self.path = path
+        self.seed = seed
+        self.prompt = prompt
+        self.loaded_at_utc = datetime.now(tz=timezone.utc).isoformat()
+        self.version = version
+        self.stamp = stamp
+        self.error = error
+
+    def info(self) -> dict:
+        return {
+            "persona": self.persona,
+            "path": str(self.path) if self.path else None,
+            "loaded_at_utc": self.loaded_at_utc,
+            "version": self.version,
+            "seed_version": (self.seed or {}).get("version"),
+            "prompt_chars": len(self.prompt),
+            "error": self.error,
+        }
+
+
+def _stamp(path: Path):
+    st = path.stat()
+    return (st.st_mtime_ns, st.st_size)
+
+
+class SeedRegistry:
+    """
+    persona -> PersonaSeed, with compiled prompts and mtime-based reload.
+
+    - base_prompts: {"cipher": "...", "vexis": "..."} used with or without a seed
+    - state:        optional SharedState to share registrations across workers
+    """
+
+    def __init__(self, base_prompts: dict, state=None, poll_interval: float = POLL_INTERVAL):
+        self.base_prompts = dict(base_prompts)
+        self.state = state
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._seeds = {
+            p: PersonaSeed(p, None, None, base, 0, None) for p, base in self.base_prompts.items()
+        }
+        self._listeners = []
+        self._thread = None
+
+    # --- Reads (hot path) ---
+
+    def get(self, persona: str) -> PersonaSeed:
+        return self._seeds[persona]
+
+    def system_prompt(self, persona: str) -> str:
+        return self._seeds[persona].prompt
+
+    def on_change(self, fn):
+        """
+        Call fn(PersonaSeed) whenever a persona's compiled prompt changes.
+        """
+        self._listeners.append(fn)
+
+    # --- Loading ---
+
+    def register(self, persona: str, path, share: bool = True) -> PersonaSeed:
+        """
+        Load `path` as the seed for `persona` and start watching it.
+        Raises OSError / ValueError if the file can't be read or parsed.
+        """
+        path = Path(path).resolve()
+        stamp = _stamp(path)
+        seed = load_seed(path)
+        entry = self._install(persona, path, seed, stamp)
+        if share and self.state is not None:
+            paths = dict(self.state.get("seed_paths") or {})
+            paths[persona] = str(path)
+            self.state["seed_paths"] = paths
+        return entry
+
+    def load_defaults(self, candidates: dict):
+        """
+        Register the first existing file per persona, e.g.
+        {"vexis": [dir / "vexis_import_seed.json", dir / "vexis_import_seed.json.txt"]}.
+        Unreadable defaults are skipped (the base prompt stays active).
+        """
+        for persona, paths in candidates.items():
+            for p in paths:
+                if Path(p).exists():
+                    try:
+                        self.register(persona, p, share=False)
+                    except (OSError, ValueError):
+                        pass
+                    break
+
+    def _install(self, persona, path, seed, stamp, error=None) -> PersonaSeed:
+        with self._lock:
+            old = self._seeds.get(persona)
+            version = (old.version if old else 0) + 1
+            entry = PersonaSeed(
+                persona, path, seed,
+                compile_prompt(self.base_prompts.get(persona, ""), seed),
+                version, stamp, error,
+            )
+            self._seeds[persona] = entry
+        for fn in self._listeners:
+            fn(entry)
+        return entry
+
+    # --- Watching ---
+
+    def check(self):
+        """
+        One poll: follow shared registrations, reload seeds whose file changed.
+        """
+        if self.state is not None:
+            for persona, p in (self.state.get("seed_paths") or {}).items():
+                cur = self._seeds.get(persona)
+                if cur is None or str(cur.path) != p:
+                    try:
+                        self.register(persona, p, share=False)
+                    except (OSError, ValueError):
+                        pass
+
+        for persona, cur in list(self._seeds.items()):
+            if cur.path is None:
+                continue
+            try:
+                stamp = _stamp(cur.path)
+            except OSError:
+                continue
+            if stamp == cur.stamp:
+                continue
+            try:
+                seed = load_seed(cur.path)
+            except (OSError, ValueError) as e:
+                # Keep serving the last good seed; remember the bad stamp
+                with self._lock:
+                    self._seeds[persona] = PersonaSeed(
+                        persona, cur.path, cur.seed, cur.prompt, cur.version, stamp,
+                        error=f"reload failed: {e}",
+                    )
+                continue
+            self._install(persona, cur.path, seed, stamp)
+
+    def start(self):
+        """
+        Pick up shared registrations now, then keep polling in the background.
+        """
+        self.check()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="nexus-seeds", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                self.check()
+            except Exception:
+                # The watcher must never die; next poll retries
+                pass
+
+    def info(self) -> dict:
+        return {p: s.info() for p, s in self._seeds.items()}
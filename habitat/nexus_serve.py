@@ -0,0 +1,128 @@
+"""
+Production launcher: N worker processes behind one listening socket.
+
+    python nexus_serve.py                                  # cipher_server, 1 worker per core
+    python nexus_serve.py --app echo_ai_shell --port 5000 --workers 4
+    python nexus_serve.py --workers 1                      # one threaded worker
+
+The parent binds the socket once, forks the workers (each imports the app
+itself, so no Flask/SQLite state crosses the fork) and restarts any worker
+that dies. Every worker serves requests on a threaded WSGI server without
+the debugger/reloader. Workers get ECHO_NEXUS_WORKER_ID, which switches
+the apps to shared mode:
+
+  - seeds and other CIPHER_STATE entries live in SQLite (nexus_state.py)
+  - /echo/status and /metrics merge every worker's numbers
+  - all stream appends go through nexus_streams' locked single writer
+
+Platforms without fork() (Windows) run one threaded worker instead. Other
+prefork servers work too, e.g. `ECHO_NEXUS_SHARED=1 gunicorn -w 4
+cipher_server:app`.
+"""
+import argparse
+import importlib
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+
+APPS = ("cipher_server", "echo_ai_shell")
+
+
+def _load_app(name: str):
+    module = importlib.import_module(name)
+    # Optional hook for work the app defers past import (e.g. model clients)
+    warm_up = getattr(module, "warm_up", None)
+    if warm_up is not None:
+        warm_up()
+    return module.app
+
+
+def _serve(app_name: str, sock: socket.socket, host: str, port: int):
+    from werkzeug.serving import make_server
+    app = _load_app(app_name)
+    server = make_server(host, port, app, threaded=True, fd=sock.fileno())
+    # The parent owns Ctrl-C; SIGTERM from it stops accepting and exits
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda *a: threading.Thread(target=server.shutdown).start())
+    server.serve_forever()
+
+
+def _spawn(worker: int, app_name: str, sock, host, port) -> int:
+    pid = os.fork()
+    if pid == 0:
+        os.environ["ECHO_NEXUS_WORKER_ID"] = str(worker)
+        try:
+            _serve(app_name, sock, host, port)
+        finally:
+            os._exit(0)
+    return pid
+
+
+def run_prefork(app_name: str, host: str, port: int, workers: int):
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(128)
+    sock.set_inheritable(True)
+
+    children = {}
+    stopping = False
+
+    def stop(*_):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for w in range(1, workers + 1):
+        children[_spawn(w, app_name, sock, host, port)] = w
+    print(f"[nexus_serve] {app_name} on {host}:{port} with {workers} workers "
+          f"(pids {', '.join(map(str, children))})", flush=True)
+
+    while children:
+        try:
+            pid, _ = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        w = children.pop(pid, None)
+        if w is not None and not stopping:
+            print(f"[nexus_serve] worker {w} (pid {pid}) exited; restarting", flush=True)
+            time.sleep(0.5)
+            children[_spawn(w, app_name, sock, host, port)] = w
+    sock.close()
+
+
+def run_single(app_name: str, host: str, port: int):
+    from werkzeug.serving import run_simple
+    run_simple(host, port, _load_app(app_name), threaded=True, use_reloader=False, use_debugger=False)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Run an Echo Nexus app with N worker processes.")
+    ap.add_argument("--app", choices=APPS, default="cipher_server")
+    ap.add_argument("--host", default="0.0.0.0")
+    ap.add_argument("--port", type=int, default=5000)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = ap.parse_args()
+
+    if args.workers > 1 and hasattr(os, "fork"):
+        run_prefork(args.app, args.host, args.port, args.workers)
+    else:
+        if args.workers > 1:
+            print("[nexus_serve] fork() not available; running one threaded worker", file=sys.stderr)
+        run_single(args.app, args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+State shared between habitat worker processes.
+
+SharedState is a small key/value store in SQLite (WAL mode) that every
+worker opens: imported seeds, per-worker status/metrics exports, and
+anything else that must not drift apart when nexus_serve.py runs several
+workers. Values are stored as JSON. Each thread gets its own connection.
+
+    state = SharedState(PATHS.state / "nexus_state.db",
+                        defaults={"seed": None})
+    state["seed"] = seed
+    state.update({"import_path": p, "imported_at_utc": now})
+    state["seed"]          # -> dict (or the default when unset)
+
+worker_id() tells a process whether it is one of several workers: the
+launcher sets ECHO_NEXUS_WORKER_ID; under another prefork server (e.g.
+gunicorn) set ECHO_NEXUS_SHARED=1 and the pid is used instead.
+"""
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS kv (
+    key        TEXT PRIMARY KEY,
+    value      TEXT NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+
+
+def worker_id():
+    """
+    Worker id string when running as one of several workers, else None.
+    """
+    wid = os.getenv("ECHO_NEXUS_WORKER_ID")
+    if wid:
+        return wid
+    if os.getenv("ECHO_NEXUS_SHARED") == "1":
+        return str(os.getpid())
+    return None
+
+
+class SharedState:
+    """
+    Dict-like JSON key/value store backed by one SQLite file.
+    """
+
+    def __init__(self, path, defaults=None, timeout: float = 5.0):
+        self.path = Path(path)
+        self.defaults = dict(defaults or {})
+        self.timeout = timeout
+        self._local = threading.local()
+        self._pid = None
+
+    def _conn(self) -> "sqlite3.Connection":
+        # Connections must not cross a fork; reopen in the child
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._pid != os.getpid():
+            # Imported here: standalone processes never open the shared DB
+            import sqlite3
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(_SCHEMA)
+            self._local.conn = conn
+            self._pid = os.getpid()
+        return conn
+
+    def get(self, key: str, default=None):
+        row = self._conn().execute("SELECT value FROM kv WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return self.defaults.get(key, default)
+        return json.loads(row[0])
+
+    def __getitem__(self, key: str):
+        return self.get(key)
+
+    def __setitem__(self, key: str, value):
+        self.update({key: value})
+
+    def __delitem__(self, key: str):
+        self._conn().execute("DELETE FROM kv WHERE key = ?", (key,))
+
+    def update(self, values: dict):
+        """
+        Write several keys in one transaction (readers never see half of it).
+        """
+        now = time.time()
+        rows = [(k, json.dumps(v, ensure_ascii=False), now) for k, v in values.items()]
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT INTO kv (key, value, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at",
+                rows,
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def items(self, prefix: str = "", max_age: float = None):
+        """
+        (key, value) pairs whose key starts with `prefix`, optionally only
+        those written within the last `max_age` seconds.
+        """
+        sql = "SELECT key, value FROM kv WHERE key >= ? AND key < ?"
+        args = [prefix, prefix + "\uffff"]
+        if max_age is not None:
+            sql += " AND updated_at >= ?"
+            args.append(time.time() - max_age)
+        return [(k, json.loads(v)) for k, v in self._conn().execute(sql, args)]
+
+
+class Publisher:
+    """
+    Throttled "write my export under <prefix><worker id>" helper used by
+    the status engine and metrics registry in multi-worker mode.
+
+    At most one write per `min_interval`; a change that arrives inside the
+    interval is picked up by a trailing write when the interval ends, so the
+    last update is never lost.
+    """
+
+    def __init__(self, state: SharedState, prefix: str, export_fn, min_interval: float = 1.0):
+        self.state = state
+        self.key = prefix + (worker_id() or "main")
+        self.prefix = prefix
+        self.export_fn = export_fn
+        self.min_interval = min_interval
+        self._last = 0.0
+        self._lock = threading.Lock()
+        self._trailing = None
+
+    def maybe_publish(self, force: bool = False):
+        with self._lock:
+            wait = self.min_interval - (time.monotonic() - self._last)
+            if wait > 0 and not force:
+                if self._trailing is None:
+                    self._trailing = threading.Timer(wait, self._publish_trailing)
+                    self._trailing.daemon = True
+                    self._trailing.start()
+                return
+            self._publish()
+
+    def _publish_trailing(self):
+        with self._lock:
+            self._trailing = None
+            self._publish()
+
+    def _publish(self):
+        self._last = time.monotonic()
+        self.state[self.key] = self.export_fn()
+
+    def gather(self, max_age: float = None):
+        return [v for _, v in self.state.items(self.prefix, max_age=max_age)]
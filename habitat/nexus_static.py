@@ -0,0 +1,211 @@
+"""
+Static assets for the habitat consoles, precompressed and cached by browsers.
+
+The console page, stylesheet and script live as plain files under
+habitat/static/<name>/ instead of strings inside view functions:
+
+    install_flask(app, STATIC_DIR / "console", prefix="/static/console", index="/")
+
+Each file is read and compressed once, on its first request, and kept in
+memory:
+
+  gzip     always (stdlib), for anything over MIN_COMPRESS_BYTES
+  br       with the optional `brotli` package; without it, a prebuilt
+           `<file>.br` next to the file is used if it isn't older than
+           the file (e.g. `brotli -k console.js`)
+
+HTML pages are served with `Cache-Control: no-cache` (revalidated by
+ETag, 304 when unchanged). The page's references to its own assets
+(`<prefix>/<name>`) are rewritten to `<prefix>/<name>?v=<content hash>`,
+and a request carrying the current hash is served as immutable for a
+year: an edited file gets a new URL, so nothing stale is ever reused.
+Every response has a strong ETag per encoding and `Vary: Accept-Encoding`.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+from pathlib import Path
+
+STATIC_DIR = Path(__file__).resolve().parent / "static"
+# Below this, compression headers outweigh the savings
+MIN_COMPRESS_BYTES = 256
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+CONTENT_TYPES = {
+    ".html": "text/html; charset=utf-8",
+    ".css": "text/css; charset=utf-8",
+    ".js": "text/javascript; charset=utf-8",
+    ".json": "application/json",
+    ".svg": "image/svg+xml",
+}
+# Preferred first when a client accepts several
+ENCODINGS = ("br", "gzip")
+
+
+def _brotli():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+class Asset:
+    """
+    One file: raw bytes, compressed copies and validators.
+    """
+
+    def __init__(self, path: Path, body: bytes = None):
+        self.path = path
+        self.body = path.read_bytes() if body is None else body
+        self.version = hashlib.blake2b(self.body, digest_size=12).hexdigest()
+        self.etag = f'"{self.version}"'
+        self.content_type = (CONTENT_TYPES.get(path.suffix.lower())
+                             or mimetypes.guess_type(path.name)[0] or "application/octet-stream")
+        self.encoded = {}
+        if len(self.body) >= MIN_COMPRESS_BYTES:
+            self._add("gzip", gzip.compress(self.body, compresslevel=9, mtime=0))
+            self._add("br", self._brotli_body(body is None))
+
+    def _add(self, coding: str, data):
+        if data is not None and len(data) < len(self.body):
+            self.encoded[coding] = data
+
+    def _brotli_body(self, from_disk: bool):
+        brotli = _brotli()
+        if brotli is not None:
+            return brotli.compress(self.body, quality=11)
+        # A prebuilt sidecar only matches the file as it is on disk
+        side = self.path.with_name(self.path.name + ".br")
+        try:
+            if from_disk and side.stat().st_mtime >= self.path.stat().st_mtime:
+                return side.read_bytes()
+        except OSError:
+            pass
+        return None
+
+    def variant(self, accept_encoding: str):
+        """
+        (body, content-encoding or None, etag) for a client's Accept-Encoding.
+        """
+        for coding in ENCODINGS:
+            if coding in self.encoded and _accepts(accept_encoding, coding):
+                return self.encoded[coding], coding, f'"{self.version}-{coding}"'
+        return self.body, None, self.etag
+
+
+class StaticAssets:
+    """
+    Lazily loaded, cached assets from one directory (no subdirectories),
+    served under `prefix`.
+    """
+
+    def __init__(self, directory, prefix: str):
+        self.directory = Path(directory)
+        self.prefix = prefix.rstrip("/")
+        self._assets = {}
+        self._lock = threading.RLock()
+
+    def get(self, name: str):
+        """
+        The Asset for `name`, or None if there is no such file.
+        """
+        asset = self._assets.get(name)
+        if asset is not None:
+            return asset
+        if not name or os.path.basename(name) != name or name.startswith(".") or name.endswith(".br"):
+            return None
+        path = self.directory / name
+        if not path.is_file():
+            return None
+        with self._lock:
+            asset = self._assets.get(name)
+            if asset is None:
+                if path.suffix.lower() == ".html":
+                    asset = Asset(path, self._fingerprint(path.read_bytes()))
+                else:
+                    asset = Asset(path)
+                self._assets[name] = asset
+        return asset
+
+    def _fingerprint(self, html: bytes) -> bytes:
+        """
+        Point the page's own asset URLs at their current content hash.
+        """
+        pattern = re.compile(rb'(["\'])' + re.escape(self.prefix.encode()) + rb'/([\w.-]+)\1')
+
+        def versioned(m):
+            asset = self.get(m.group(2).decode())
+            if asset is None:
+                return m.group(0)
+            q = m.group(1)
+            return q + f"{self.prefix}/{m.group(2).decode()}?v={asset.version}".encode() + q
+
+        return pattern.sub(versioned, html)
+
+    def response(self, name: str, version: str = "", if_none_match: str = "", accept_encoding: str = ""):
+        """
+        (status, headers, body) for a GET of `name` (?v=`version`);
+        (404, {}, b"") if missing.
+        """
+        asset = self.get(name)
+        if asset is None:
+            return 404, {}, b""
+        body, coding, etag = asset.variant(accept_encoding)
+        immutable = version == asset.version and asset.content_type != CONTENT_TYPES[".html"]
+        headers = {
+            "ETag": etag,
+            "Cache-Control": IMMUTABLE if immutable else REVALIDATE,
+            "Vary": "Accept-Encoding",
+        }
+        if _etag_matches(if_none_match, etag):
+            return 304, headers, b""
+        if coding:
+            headers["Content-Encoding"] = coding
+        headers["Content-Type"] = asset.content_type
+        headers["Content-Length"] = str(len(body))
+        return 200, headers, body
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if not header:
+        return False
+    tags = [t.strip() for t in header.split(",")]
+    # Weak comparison, as for any GET: W/"x" matches "x"
+    return "*" in tags or etag in (t[2:] if t.startswith("W/") else t for t in tags)
+
+
+def _accepts(header: str, coding: str) -> bool:
+    for part in (header or "").split(","):
+        name, _, params = part.strip().partition(";")
+        if name.strip().lower() != coding:
+            continue
+        q = params.strip()
+        return not (q.startswith("q=") and q[2:].strip() in ("0", "0.0", "0.00", "0.000"))
+    return False
+
+
+def install_flask(app, directory, prefix: str, index: str = None):
+    """
+    Serve `directory` under `prefix`/<name>; `index` (e.g. "/") serves index.html.
+    """
+    from flask import Response, abort, request
+
+    assets = StaticAssets(directory, prefix)
+    name = assets.directory.name
+
+    def send(filename: str):
+        status, headers, body = assets.response(
+            filename, request.args.get("v", ""),
+            request.headers.get("If-None-Match", ""), request.headers.get("Accept-Encoding", ""))
+        if status == 404:
+            abort(404)
+        return Response(body, status=status, headers=headers)
+
+    app.add_url_rule(f"{assets.prefix}/<filename>", f"static_{name}", send)
+    if index:
+        app.add_url_rule(index, f"static_{name}_index", lambda: send("index.html"))
+    return assets
@@ -0,0 +1,280 @@
+"""
+Streaming psi_eff / delta engine for /echo/status and /echo/handshake.
+
+The engine is fed every record as it is appended to a memory stream
+(cipher_server.append_jsonl calls observe()), so nothing is ever rescanned.
+Each event lands in fixed time buckets of a few rolling windows; running
+totals are adjusted when a bucket expires, so observe() is O(1) amortized.
+After every event a fresh snapshot dict is built and swapped in, and
+status calls just read that reference (aging it in memory if the habitat
+has been quiet for longer than a bucket) -- never the disk.
+
+What is counted (per window):
+
+    handshakes  accepted handshakes (channel "handshake", tag "in")
+    denied      rejected handshakes (channel "handshake", tag "denied")
+    replies     persona replies (channel "chat"/"handshake", kind "memory")
+    errors      replies that came back from the fallback stub
+    aborts      trust-gate aborts (channel "gate", tag "abort")
+    latency     details.latency_ms of replies
+
+Derived metrics:
+
+    delta   = (denied + errors + aborts) / (handshakes + denied + replies)
+    psi_eff = 2 * (1 - delta) * LATENCY_REF_MS / (LATENCY_REF_MS + mean latency)
+
+so a quiet, healthy habitat sits near 2.0 and anything with delta above the
+gate's 0.30 reports status "DRIFTING" instead of "RES0NANT".
+"""
+import threading
+import time
+
+# (name, length in seconds, bucket count)
+WINDOWS = (
+    ("1m", 60, 12),
+    ("15m", 900, 60),
+)
+HEADLINE_WINDOW = "15m"
+
+LATENCY_REF_MS = 4000.0
+DELTA_MAX = 0.30  # same bound as the trust gate
+
+_FIELDS = ("handshakes", "denied", "replies", "errors", "aborts", "latency_sum", "latency_n")
+_FALLBACK_PREFIXES = ("(fallback ",)
+
+
+class RollingWindow:
+    """
+    Fixed-size ring of time buckets with running totals.
+
+    Buckets are expired as time moves forward (each one at most once per
+    cycle), so `totals` always covers exactly the last `seconds`.
+    """
+
+    def __init__(self, seconds: int, buckets: int):
+        self.width = seconds / buckets
+        self.n = buckets
+        self.last_epoch = None
+        self.buckets = [dict.fromkeys(_FIELDS, 0) for _ in range(buckets)]
+        self.totals = dict.fromkeys(_FIELDS, 0)
+
+    def advance(self, now: float) -> int:
+        epoch = int(now // self.width)
+        if self.last_epoch is None:
+            self.last_epoch = epoch
+        elif epoch > self.last_epoch:
+            steps = min(epoch - self.last_epoch, self.n)
+            for e in range(epoch - steps + 1, epoch + 1):
+                old = self.buckets[e % self.n]
+                for k in _FIELDS:
+                    self.totals[k] -= old[k]
+                    old[k] = 0
+            self.last_epoch = epoch
+        return epoch
+
+    def add(self, now: float, counts: dict):
+        b = self.buckets[self.advance(now) % self.n]
+        for k, v in counts.items():
+            b[k] += v
+            self.totals[k] += v
+
+    def export(self):
+        """
+        Non-empty buckets as [epoch, counts] pairs (for merging across workers).
+        """
+        if self.last_epoch is None:
+            return []
+        out = []
+        for i, b in enumerate(self.buckets):
+            if any(b.values()):
+                epoch = self.last_epoch - ((self.last_epoch - i) % self.n)
+                out.append([epoch, dict(b)])
+        return out
+
+
+def classify(entry: dict) -> dict:
+    """
+    Map one stream record to the counters it contributes to (may be empty).
+    """
+    channel = entry.get("channel")
+    tags = entry.get("tags") or []
+    counts = {}
+
+    if channel == "handshake":
+        if "summary" in tags:
+            # Aggregated repeats (nexus_denials); each was observed as it happened
+            pass
+        elif "denied" in tags:
+            counts["denied"] = 1
+        elif "in" in tags:
+            counts["handshakes"] = 1
+    elif channel == "gate":
+        if "abort" in tags:
+            counts["aborts"] = 1
+
+    if channel in ("chat", "handshake") and entry.get("kind") == "memory":
+        details = entry.get("details") or {}
+        counts["replies"] = 1
+        text = details.get("text") or ""
+        if text.startswith(_FALLBACK_PREFIXES):
+            counts["errors"] = 1
+        latency = details.get("latency_ms")
+        if isinstance(latency, (int, float)):
+            counts["latency_sum"] = latency
+            counts["latency_n"] = 1
+
+    return counts
+
+
+def merge_buckets(exported, width: float, n: int, now: float) -> dict:
+    """
+    Sum exported [epoch, counts] buckets that are still inside the window.
+    """
+    oldest = int(now // width) - n + 1
+    totals = dict.fromkeys(_FIELDS, 0)
+    for epoch, counts in exported:
+        if epoch >= oldest:
+            for k in _FIELDS:
+                totals[k] += counts.get(k, 0)
+    return totals
+
+
+def derive(totals: dict) -> dict:
+    seen = totals["handshakes"] + totals["denied"] + totals["replies"]
+    drift = totals["denied"] + totals["errors"] + totals["aborts"]
+    delta = min(1.0, drift / seen) if seen else 0.0
+    mean_latency = totals["latency_sum"] / totals["latency_n"] if totals["latency_n"] else 0.0
+    psi_eff = 2.0 * (1.0 - delta) * LATENCY_REF_MS / (LATENCY_REF_MS + mean_latency)
+    return {
+        "psi_eff": round(psi_eff, 3),
+        "delta": round(delta, 3),
+        "events": seen,
+        "handshakes": totals["handshakes"],
+        "denied": totals["denied"],
+        "replies": totals["replies"],
+        "model_errors": totals["errors"],
+        "gate_aborts": totals["aborts"],
+        "mean_latency_ms": round(mean_latency, 1),
+    }
+
+
+def _snapshot(totals_by_window: dict, last_handshake, now: float) -> dict:
+    windows = {name: derive(t) for name, t in totals_by_window.items()}
+    head = windows[HEADLINE_WINDOW]
+    return {
+        "psi_eff": head["psi_eff"],
+        "delta": head["delta"],
+        "status": "RES0NANT" if head["delta"] <= DELTA_MAX else "DRIFTING",
+        "last_handshake": last_handshake,
+        "windows": windows,
+        "built_at": now,
+    }
+
+
+class StatusEngine:
+    """
+    Rolling psi_eff/delta over the memory-stream events it observes.
+    """
+
+    def __init__(self, windows=WINDOWS, clock=time.time):
+        self.clock = clock
+        self.windows = {name: RollingWindow(sec, n) for name, sec, n in windows}
+        self.last_handshake = None
+        self._lock = threading.Lock()
+        self._refresh_after = min(sec / n for _, sec, n in windows)
+        self._snapshot = self._build(clock())
+
+    def observe(self, path, entry: dict):
+        """
+        Stream observer hook: called once per appended record.
+        """
+        counts = classify(entry)
+        if not counts:
+            return
+        now = self.clock()
+        with self._lock:
+            for w in self.windows.values():
+                w.add(now, counts)
+            if counts.get("handshakes"):
+                self.last_handshake = entry.get("ts") or entry.get("ts_utc")
+            self._snapshot = self._build(now)
+
+    def _build(self, now: float) -> dict:
+        for w in self.windows.values():
+            w.advance(now)
+        return _snapshot({name: w.totals for name, w in self.windows.items()},
+                         self.last_handshake, now)
+
+    def export(self) -> dict:
+        """
+        Raw window buckets for other workers to merge (see merged_snapshot).
+        """
+        with self._lock:
+            return {
+                "last_handshake": self.last_handshake,
+                "windows": {
+                    name: {"width": w.width, "n": w.n, "buckets": w.export()}
+                    for name, w in self.windows.items()
+                },
+            }
+
+    def merged_snapshot(self, exports) -> dict:
+        """
+        Snapshot over this engine plus other workers' exports.
+        """
+        exports = [self.export()] + list(exports)
+        now = self.clock()
+        totals = {}
+        for name, w in self.windows.items():
+            buckets = []
+            for ex in exports:
+                buckets.extend((ex.get("windows") or {}).get(name, {}).get("buckets", []))
+            totals[name] = merge_buckets(buckets, w.width, w.n, now)
+        stamps = [ex.get("last_handshake") for ex in exports if ex.get("last_handshake")]
+        return _snapshot(totals, max(stamps) if stamps else None, now)
+
+    def snapshot(self) -> dict:
+        """
+        Latest precomputed snapshot. If no event arrived for longer than one
+        bucket, old buckets are aged out first (in memory, O(buckets)).
+        """
+        snap = self._snapshot
+        now = self.clock()
+        if now - snap["built_at"] > self._refresh_after:
+            with self._lock:
+                self._snapshot = snap = self._build(now)
+        return snap
+
+
+class SharedStatus:
+    """
+    Multi-worker view of a StatusEngine.
+
+    Each worker publishes its raw buckets through a nexus_state.Publisher
+    (throttled, on observe); snapshot() merges the other workers' exports
+    with the live local engine. The merged result is cached for
+    `cache_seconds`, so most status calls still never leave memory.
+    """
+
+    def __init__(self, engine: StatusEngine, publisher, cache_seconds: float = 1.0):
+        self.engine = engine
+        self.publisher = publisher
+        self.cache_seconds = cache_seconds
+        self._cached = None
+        self._cached_at = 0.0
+
+    def observe(self, path, entry: dict):
+        if classify(entry):
+            self.publisher.maybe_publish()
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        if self._cached is None or now - self._cached_at > self.cache_seconds:
+            max_age = max(sec for _, sec, _ in WINDOWS)
+            others = [
+                v for k, v in self.publisher.state.items(self.publisher.prefix, max_age=max_age)
+                if k != self.publisher.key
+            ]
+            self._cached = self.engine.merged_snapshot(others)
+            self._cached_at = now
+        return self._cached
@@ -0,0 +1,707 @@
+"""
+Storage backends for the memory streams.
+
+Everything that writes or reads a stream (cipher_server, echo_ai_shell,
+the echo_mem_* CLIs) goes through a store, addressed by the stream's
+usual path (e.g. PATHS.stream("root_memory.jsonl"), see nexus_paths.py):
+
+    store = open_store(PATHS)
+    store.append(MEMORY_STREAM, entry)
+    store.append_many(MEMORY_STREAM, entries)
+    store.tail(MEMORY_STREAM, 20)                      # last 20 records, oldest first
+    count, body = store.tail_raw(MEMORY_STREAM, 20)    # same, as a JSON array (bytes)
+    page = store.page_raw(MEMORY_STREAM, 100, before=cursor)   # paging, see page_raw
+    for cursor, e in store.walk(MEMORY_STREAM, reverse=True): ...   # lazy, newest first
+    store.search(MEMORY_STREAM, text="nexus", tag="Echo", channel="chat",
+                 author="Richard", since=unix_ts, limit=50)
+
+Two backends, picked by ECHO_STORE (or open_store(kind=...)):
+
+  jsonl   (default) the append-only JSONL files via nexus_streams. Reads
+          go through a read-only mmap (nexus_mmap): tail() touches only the
+          end of the file, search() jumps to a `since` offset from the
+          sidecar index and regex-scans the mapping for the filter before
+          parsing, and tail_raw() passes stored lines through as stored
+          (checked to parse, never re-serialized).
+  sqlite  one SQLite database in WAL mode (ECHO_STORE_DB, default
+          <root>/state/memory.db). Records keep their exact JSON text and
+          are indexed by stream + ts, channel, author and tag, with an FTS5
+          table over the note / summary / details.text for text search.
+          Streams are keyed by file name, so both schemas live side by side.
+
+The JSONL form stays the audit format: `python nexus_store.py export`
+writes any stream back out byte-for-byte as JSONL, and `import` loads an
+existing JSONL stream into SQLite.
+
+Text search differs slightly: JSONL matches a case-insensitive substring,
+FTS5 matches words (and word prefixes) in order.
+"""
+import json
+import os
+import re
+import sys
+import threading
+from pathlib import Path
+
+from nexus_index import StreamIndex, canonical, content_hash, parse_ts
+from nexus_mmap import MappedStream, json_array, is_record, parse_line
+from nexus_paths import as_paths, get_paths
+from nexus_streams import get_writer
+
+STORE_KINDS = ("jsonl", "sqlite")
+
+
+class StaleCursor(ValueError):
+    """
+    A page cursor that no longer points into the stream (rewritten by
+    compaction, truncated, or from the other backend): start over.
+    """
+
+
+def record_ts(e: dict):
+    return parse_ts(e.get("ts") or e.get("ts_utc"))
+
+
+def record_tags(e: dict):
+    tags = e.get("tags")
+    if isinstance(tags, list):
+        return [str(t) for t in tags]
+    return [str(e["tag"])] if e.get("tag") else []
+
+
+def record_column(value):
+    """
+    An indexed column value: strings as they are, None as NULL, anything
+    else (lists, objects, numbers) as canonical JSON. The record itself is
+    always kept whole in the body.
+    """
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+
+
+def record_text(e: dict) -> str:
+    """
+    Searchable text: note for CLI records, summary + details.text for chat.
+    """
+    if "note" in e:
+        return str(e.get("note") or "")
+    details = e.get("details")
+    text = details.get("text") if isinstance(details, dict) else None
+    return " ".join(str(t) for t in (e.get("summary"), text) if t)
+
+
+def _quoted(value: str) -> bytes:
+    return re.escape(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+
+
+def _cue(text, tag, channel, author):
+    """
+    A bytes regex every matching raw line must contain, to skip parsing
+    the rest (None if there is no safe one). _matches() still decides.
+    """
+    if tag is not None:
+        return re.compile(_quoted(tag))
+    if author is not None:
+        return re.compile(_quoted(author))
+    if channel is not None:
+        return re.compile(rb'"channel"\s*:\s*' + _quoted(channel))
+    # The longest word: a phrase may span summary and details.text
+    word = max(text.split(), key=len) if text and text.strip() else ""
+    if word and word.isascii() and word.isprintable() and not set(word) & set('"\\'):
+        return re.compile(re.escape(word.encode("ascii")), re.IGNORECASE)
+    return None
+
+
+def _matches(e, text, tag, channel, author, since, until):
+    if channel is not None and e.get("channel") != channel:
+        return False
+    if author is not None and (e.get("author") or e.get("user")) != author:
+        return False
+    if tag is not None and tag not in record_tags(e):
+        return False
+    if since is not None or until is not None:
+        t = record_ts(e)
+        if t is None or (since is not None and t < since) or (until is not None and t >= until):
+            return False
+    if text and text.lower() not in record_text(e).lower():
+        return False
+    return True
+
+
+# --- JSONL ---
+
+class JsonlStore:
+    """
+    The JSONL files themselves. Malformed lines come back from tail() as
+    {"raw": line}, or are skipped with skip_malformed=True (on_malformed,
+    if set, is called with the stream path for each one).
+
+    A long-lived store (the server, echo_memd.py) keeps each stream's
+    sparse index offsets and record count warm: the offsets are reloaded
+    only when the sidecar changes, and count() reads only new bytes.
+    """
+
+    kind = "jsonl"
+
+    def __init__(self, on_malformed=None):
+        self.on_malformed = on_malformed
+        self._lock = threading.Lock()
+        self._indexes = {}
+        self._counts = {}
+
+    def append(self, stream, record: dict):
+        get_writer(stream).append(record)
+
+    def append_many(self, stream, records):
+        get_writer(stream).append_many(records)
+
+    def _decode(self, stream, line, skip_malformed: bool):
+        e = parse_line(line)
+        if e is not None:
+            return e
+        if self.on_malformed is not None:
+            self.on_malformed(Path(stream))
+        if skip_malformed:
+            return None
+        return {"raw": bytes(line).decode("utf-8", "replace")}
+
+    def tail(self, stream, limit: int = 20, skip_malformed: bool = False):
+        # Only the last `limit` lines are sliced out of the map and parsed
+        with MappedStream(stream) as m:
+            out = [self._decode(stream, line, skip_malformed) for line in m.tail(limit)]
+        return [e for e in out if e is not None]
+
+    def tail_raw(self, stream, limit: int = 20):
+        """
+        (count, b"[...]") of the last `limit` records, passed through as
+        stored. Lines that aren't a JSON object are left out (and reported).
+        """
+        with MappedStream(stream) as m:
+            lines = m.tail(limit)
+            keep = [line for line in lines if is_record(line)]
+            body = json_array(keep)
+            count, dropped = len(keep), len(lines) - len(keep)
+            # Release the views before the map closes
+            del lines, keep
+        if self.on_malformed is not None:
+            for _ in range(dropped):
+                self.on_malformed(Path(stream))
+        return count, body
+
+    def page_raw(self, stream, limit: int = 100, before: str = None, after: str = None):
+        """
+        One page of records as stored, for cursor paging over the whole stream:
+
+            no cursor      the newest `limit` records
+            before=older  the `limit` records just before the page that gave `older`
+            after=newer   up to `limit` records appended since `newer`
+
+        Returns (count, b"[...]", older, newer), records oldest first; `older`
+        is None once the start of the stream is reached. Cursors are the
+        byte offset of a line start plus the file's inode, so a page fetched
+        across a compaction raises StaleCursor instead of skipping records.
+        """
+        with MappedStream(stream) as m:
+            if after is not None:
+                start = self._cursor_offset(m, after)
+                lines = []
+                for off, line in m.lines(start):
+                    lines.append((off, line))
+                    if len(lines) >= limit:
+                        break
+                newer = m.next_line(lines[-1][0]) if lines else start
+                older = start
+            else:
+                end = self._cursor_offset(m, before) if before is not None else m.size
+                lines = []
+                for off, line in m.rlines(end):
+                    lines.append((off, line))
+                    if len(lines) >= limit:
+                        break
+                lines.reverse()
+                newer = end
+                older = lines[0][0] if lines else m.begin
+            keep = [line for _, line in lines if is_record(line)]
+            body = json_array(keep)
+            count, dropped = len(keep), len(lines) - len(keep)
+            ino = m.ino or 0
+            older = None if older <= m.begin else f"j{ino}.{older}"
+            newer = f"j{ino}.{newer}"
+            del lines, keep
+        if self.on_malformed is not None:
+            for _ in range(dropped):
+                self.on_malformed(Path(stream))
+        return count, body, older, newer
+
+    @staticmethod
+    def _cursor_offset(m: MappedStream, cursor: str) -> int:
+        try:
+            ino, off = cursor[1:].split(".")
+            ino, off = int(ino), int(off)
+        except ValueError:
+            raise StaleCursor(f"Bad cursor: {cursor!r}")
+        if not cursor.startswith("j") or ino != (m.ino or 0) or off > m.size or m.line_start(off) != off:
+            raise StaleCursor(f"Cursor {cursor!r} no longer matches the stream")
+        return off
+
+    def walk(self, stream, cursor: str = None, reverse: bool = False):
+        """
+        Yield (cursor, record) lazily in stream order (newest first with
+        reverse=True), skipping malformed lines. Passing a yielded cursor
+        back resumes just past its record in the same direction; the
+        cursors are the same kind page_raw uses.
+        """
+        with MappedStream(stream) as m:
+            start = self._cursor_offset(m, cursor) if cursor is not None else None
+            ino = m.ino or 0
+            lines = m.rlines(start) if reverse else m.lines(start or 0)
+            for off, line in lines:
+                e = self._decode(stream, line, True)
+                del line
+                if e is not None:
+                    yield f"j{ino}.{off if reverse else m.next_line(off)}", e
+
+    def end_cursor(self, stream) -> str:
+        """
+        A reverse walk() cursor for the current end: records appended later
+        stay out of a walk started from it.
+        """
+        with MappedStream(stream) as m:
+            return f"j{m.ino or 0}.{m.size}"
+
+    def scan(self, stream, start: int = 0):
+        with MappedStream(stream) as m:
+            for _, line in m.lines(start):
+                e = self._decode(stream, line, True)
+                if e is not None:
+                    yield e
+
+    def _index(self, stream) -> StreamIndex:
+        key = str(stream)
+        index = StreamIndex(stream)
+        try:
+            mtime = index.meta_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        with self._lock:
+            hit = self._indexes.get(key)
+            if hit is not None and hit[0] == mtime:
+                return hit[1]
+        index.load(hashes=False)
+        with self._lock:
+            self._indexes[key] = (mtime, index)
+        return index
+
+    def _seek(self, m: MappedStream, stream, since) -> int:
+        """
+        Byte offset to scan from for records at/after `since` (sparse index).
+        """
+        off = self._index(stream).seek_ts(since)
+        # A stale index (file rewritten since) may not land on a line start
+        return off if off <= m.size and m.line_start(off) == off else 0
+
+    def search(self, stream, text=None, tag=None, channel=None, author=None,
+               since=None, until=None, limit=None):
+        """
+        Matching records in stream order; with `limit`, the latest `limit`.
+        """
+        out = []
+        cue = _cue(text, tag, channel, author)
+        with MappedStream(stream) as m:
+            start = self._seek(m, stream, since) if since is not None else 0
+            lines = m.matching(cue, start) if cue is not None else m.lines(start)
+            for _, line in lines:
+                e = parse_line(line)
+                if e is not None and _matches(e, text, tag, channel, author, since, until):
+                    out.append(e)
+        return out[-limit:] if limit else out
+
+    def count(self, stream) -> int:
+        """
+        Non-empty whole lines; only bytes appended since the last call are read.
+        """
+        key = str(stream)
+        try:
+            st = os.stat(stream)
+        except FileNotFoundError:
+            return 0
+        with self._lock:
+            ino, done, n = self._counts.get(key, (None, 0, 0))
+            if ino != st.st_ino or st.st_size < done:
+                # New or rewritten (compacted) file: count from the start
+                done, n = 0, 0
+            if st.st_size > done:
+                with open(stream, "rb") as f:
+                    f.seek(done)
+                    data = f.read(st.st_size - done)
+                cut = data.rfind(b"\n") + 1
+                n += sum(1 for line in data[:cut].split(b"\n") if line.strip())
+                done += cut
+            self._counts[key] = (st.st_ino, done, n)
+            return n
+
+    def warm(self, stream):
+        """
+        Load the index offsets and count records now (long-lived stores).
+        """
+        self._index(stream)
+        self.count(stream)
+
+    def export(self, stream, out):
+        with Path(stream).open("rb") as f:
+            for line in f:
+                if line.strip():
+                    out.write(line if line.endswith(b"\n") else line + b"\n")
+
+    def info(self) -> dict:
+        return {"kind": self.kind}
+
+
+# --- SQLite ---
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    id      INTEGER PRIMARY KEY,
+    stream  TEXT NOT NULL,
+    ts      REAL,
+    kind    TEXT,
+    channel TEXT,
+    author  TEXT,
+    hash    BLOB NOT NULL,  -- nexus_index.content_hash of the canonical form
+    body    TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS records_stream ON records (stream, id);
+CREATE INDEX IF NOT EXISTS records_ts ON records (stream, ts);
+CREATE INDEX IF NOT EXISTS records_channel ON records (stream, channel, ts);
+CREATE INDEX IF NOT EXISTS records_author ON records (stream, author, ts);
+CREATE INDEX IF NOT EXISTS records_hash ON records (stream, hash);
+CREATE TABLE IF NOT EXISTS record_tags (
+    tag       TEXT NOT NULL,
+    record_id INTEGER NOT NULL,
+    PRIMARY KEY (tag, record_id)
+) WITHOUT ROWID;
+"""
+_FTS_SCHEMA = "CREATE VIRTUAL TABLE IF NOT EXISTS records_fts USING fts5(text, content='')"
+
+
+class SqliteStore:
+    """
+    All streams in one WAL-mode SQLite file; one connection per thread
+    (reopened after a fork), like nexus_state.SharedState.
+    """
+
+    kind = "sqlite"
+
+    def __init__(self, path, timeout: float = 10.0):
+        self.path = Path(path)
+        self.timeout = timeout
+        self.fts = None
+        self._local = threading.local()
+        self._pid = None
+
+    def _conn(self) -> "sqlite3.Connection":
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._pid != os.getpid():
+            # Imported here: the JSONL backend (the default) never needs it
+            import sqlite3
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            if self.fts is None:
+                try:
+                    conn.execute(_FTS_SCHEMA)
+                    self.fts = True
+                except sqlite3.OperationalError:
+                    # SQLite built without FTS5: fall back to LIKE
+                    self.fts = False
+            self._local.conn = conn
+            self._pid = os.getpid()
+        return conn
+
+    @staticmethod
+    def key(stream) -> str:
+        return Path(stream).name
+
+    # --- Writes ---
+
+    def append(self, stream, record: dict):
+        self.append_many(stream, [record])
+
+    def append_many(self, stream, records):
+        key = self.key(stream)
+        rows = []
+        for e in records:
+            body = json.dumps(e, ensure_ascii=False)
+            rows.append((e, body, content_hash(canonical(e))))
+        if rows:
+            self._insert(key, rows)
+
+    def append_lines(self, stream, items):
+        """
+        Bulk load pre-encoded records: [(hash, line bytes), ...] (bulk ingest).
+        """
+        rows = []
+        for h, line in items:
+            body = line.decode("utf-8").rstrip("\n")
+            rows.append((json.loads(body), body, h))
+        if rows:
+            self._insert(self.key(stream), rows)
+
+    def _insert(self, key: str, rows):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for e, body, h in rows:
+                author = e.get("author") if "author" in e else e.get("user")
+                cur = conn.execute(
+                    "INSERT INTO records (stream, ts, kind, channel, author, hash, body) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, record_ts(e), record_column(e.get("kind")), record_column(e.get("channel")),
+                     record_column(author), h, body),
+                )
+                rid = cur.lastrowid
+                tags = set(record_tags(e))
+                if tags:
+                    conn.executemany("INSERT OR IGNORE INTO record_tags (tag, record_id) VALUES (?, ?)",
+                                     [(t, rid) for t in tags])
+                if self.fts:
+                    text = record_text(e)
+                    if text:
+                        conn.execute("INSERT INTO records_fts (rowid, text) VALUES (?, ?)", (rid, text))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    # --- Reads ---
+
+    def _tail_bodies(self, stream, limit: int):
+        if limit <= 0:
+            return []
+        rows = self._conn().execute(
+            "SELECT body FROM records WHERE stream = ? ORDER BY id DESC LIMIT ?", (self.key(stream), limit),
+        ).fetchall()
+        return [r[0] for r in reversed(rows)]
+
+    def tail(self, stream, limit: int = 20, skip_malformed: bool = False):
+        return [json.loads(body) for body in self._tail_bodies(stream, limit)]
+
+    def tail_raw(self, stream, limit: int = 20):
+        bodies = self._tail_bodies(stream, limit)
+        return len(bodies), ("[" + ",".join(bodies) + "]").encode("utf-8")
+
+    def page_raw(self, stream, limit: int = 100, before: str = None, after: str = None):
+        """
+        Same paging as JsonlStore.page_raw; cursors are record ids.
+        """
+        key = self.key(stream)
+        conn = self._conn()
+        if after is not None:
+            rid = self._cursor_id(after)
+            rows = conn.execute("SELECT id, body FROM records WHERE stream = ? AND id > ? ORDER BY id LIMIT ?",
+                                (key, rid, limit)).fetchall()
+            older, newer = rid, (rows[-1][0] if rows else rid)
+        else:
+            if before is not None:
+                rid = self._cursor_id(before)
+                rows = conn.execute(
+                    "SELECT id, body FROM records WHERE stream = ? AND id < ? ORDER BY id DESC LIMIT ?",
+                    (key, rid, limit)).fetchall()
+            else:
+                rows = conn.execute("SELECT id, body FROM records WHERE stream = ? ORDER BY id DESC LIMIT ?",
+                                    (key, limit)).fetchall()
+                rid = rows[0][0] if rows else 0
+            rows.reverse()
+            # A short page is the start of the stream
+            older = rows[0][0] if len(rows) >= limit else None
+            newer = rid
+        body = ("[" + ",".join(b for _, b in rows) + "]").encode("utf-8")
+        return len(rows), body, (None if not older else f"s{older}"), f"s{newer}"
+
+    @staticmethod
+    def _cursor_id(cursor: str) -> int:
+        try:
+            if not cursor.startswith("s"):
+                raise ValueError(cursor)
+            return int(cursor[1:])
+        except ValueError:
+            raise StaleCursor(f"Bad cursor: {cursor!r}")
+
+    def walk(self, stream, cursor: str = None, reverse: bool = False):
+        """
+        Same as JsonlStore.walk; rows are fetched as the walk advances.
+        """
+        q = "SELECT id, body FROM records WHERE stream = ?"
+        args = [self.key(stream)]
+        if cursor is not None:
+            q += " AND id < ?" if reverse else " AND id > ?"
+            args.append(self._cursor_id(cursor))
+        q += " ORDER BY id DESC" if reverse else " ORDER BY id"
+        for rid, body in self._conn().execute(q, args):
+            yield f"s{rid}", json.loads(body)
+
+    def end_cursor(self, stream) -> str:
+        last = self._conn().execute("SELECT MAX(id) FROM records WHERE stream = ?", (self.key(stream),)).fetchone()[0]
+        return f"s{(last or 0) + 1}"
+
+    def scan(self, stream):
+        cur = self._conn().execute("SELECT body FROM records WHERE stream = ? ORDER BY id", (self.key(stream),))
+        for (body,) in cur:
+            yield json.loads(body)
+
+    def search(self, stream, text=None, tag=None, channel=None, author=None,
+               since=None, until=None, limit=None):
+        """
+        Matching records in stream order; with `limit`, the latest `limit`.
+        """
+        sql = ["SELECT r.id, r.body FROM records r"]
+        where = ["r.stream = ?"]
+        args = [self.key(stream)]
+        if tag is not None:
+            sql.append("JOIN record_tags t ON t.record_id = r.id AND t.tag = ?")
+            args.insert(0, tag)
+        if channel is not None:
+            where.append("r.channel = ?")
+            args.append(channel)
+        if author is not None:
+            where.append("r.author = ?")
+            args.append(author)
+        if since is not None:
+            where.append("r.ts >= ?")
+            args.append(since)
+        if until is not None:
+            where.append("r.ts < ?")
+            args.append(until)
+        if text:
+            if self.fts:
+                where.append("r.id IN (SELECT rowid FROM records_fts WHERE records_fts MATCH ?)")
+                args.append(" ".join('"%s"*' % w.replace('"', '""') for w in text.split()))
+            else:
+                where.append("r.body LIKE ?")
+                args.append(f"%{text}%")
+        q = " ".join(sql) + " WHERE " + " AND ".join(where) + " ORDER BY r.id DESC"
+        if limit:
+            q += f" LIMIT {int(limit)}"
+        rows = self._conn().execute(q, args).fetchall()
+        return [json.loads(body) for _, body in reversed(rows)]
+
+    def count(self, stream) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM records WHERE stream = ?", (self.key(stream),)).fetchone()[0]
+
+    def warm(self, stream):
+        self.count(stream)
+
+    def known_hashes(self, stream, hashes) -> set:
+        """
+        Which of `hashes` the stream already holds (bulk ingest de-dupe).
+        """
+        conn = self._conn()
+        key = self.key(stream)
+        hashes = list(hashes)
+        found = set()
+        for i in range(0, len(hashes), 500):
+            chunk = hashes[i:i + 500]
+            marks = ",".join("?" * len(chunk))
+            found.update(r[0] for r in conn.execute(
+                f"SELECT hash FROM records WHERE stream = ? AND hash IN ({marks})", [key] + chunk))
+        return found
+
+    def export(self, stream, out):
+        for (body,) in self._conn().execute(
+                "SELECT body FROM records WHERE stream = ? ORDER BY id", (self.key(stream),)):
+            out.write(body.encode("utf-8") + b"\n")
+
+    def import_jsonl(self, stream, path, batch: int = 5000) -> int:
+        """
+        Load a JSONL stream file as-is (same record text). Returns records loaded.
+        """
+        n = 0
+        items = []
+        with Path(path).open("rb") as f:
+            for line in f:
+                line = line.strip().lstrip(b"\xef\xbb\xbf")
+                if not line:
+                    continue
+                try:
+                    e = json.loads(line)
+                except ValueError:
+                    continue
+                if not isinstance(e, dict):
+                    continue
+                body = line.decode("utf-8")
+                items.append((e, body, content_hash(canonical(e))))
+                if len(items) >= batch:
+                    self._insert(self.key(stream), items)
+                    n += len(items)
+                    items = []
+        if items:
+            self._insert(self.key(stream), items)
+            n += len(items)
+        return n
+
+    def info(self) -> dict:
+        return {"kind": self.kind, "path": str(self.path), "fts": self.fts}
+
+
+def open_store(root=None, kind: str = None, db_path=None, on_malformed=None):
+    """
+    The configured store: kind from ECHO_STORE (default "jsonl"); the SQLite
+    file from ECHO_STORE_DB or <state>/memory.db of `root` (a NexusPaths or
+    a root folder, see nexus_paths.py).
+    """
+    kind = (kind or os.getenv("ECHO_STORE") or "jsonl").lower()
+    if kind == "jsonl":
+        return JsonlStore(on_malformed)
+    if kind == "sqlite":
+        db_path = db_path or os.getenv("ECHO_STORE_DB")
+        if not db_path:
+            if root is None:
+                raise ValueError("sqlite store needs a root or ECHO_STORE_DB")
+            db_path = as_paths(root).state / "memory.db"
+        return SqliteStore(db_path)
+    raise ValueError(f"Unknown ECHO_STORE {kind!r} (expected one of {', '.join(STORE_KINDS)})")
+
+
+def main():
+    # Usage:
+    #   nexus_store.py import root_memory.jsonl vexis_memory.jsonl   -> JSONL streams into SQLite
+    #   nexus_store.py export root_memory.jsonl > audit.jsonl         -> any stream back out as JSONL
+    #   nexus_store.py count root_memory.jsonl --store sqlite
+    #
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Move memory streams between JSONL and SQLite.")
+    ap.add_argument("command", choices=("import", "export", "count"))
+    ap.add_argument("streams", nargs="+", help="stream file names (e.g. root_memory.jsonl)")
+    ap.add_argument("--root", help="Echo Nexus root (default: see nexus_paths.py)")
+    ap.add_argument("--store", choices=STORE_KINDS, help="backend for export/count (default: ECHO_STORE)")
+    ap.add_argument("--db", help="SQLite file (default: ECHO_STORE_DB or <root>/state/memory.db)")
+    args = ap.parse_args()
+
+    habitat = get_paths(args.root, start=__file__)
+    paths = [habitat.stream(Path(s).name) for s in args.streams]
+
+    if args.command == "import":
+        store = open_store(habitat, "sqlite", args.db)
+        for p in paths:
+            if not p.exists():
+                print(f"Memory stream not found at {p}", file=sys.stderr)
+                sys.exit(1)
+            if store.count(p):
+                print(f"{p.name}: already in {store.path}, skipped", file=sys.stderr)
+                continue
+            print(json.dumps({"stream": p.name, "imported": store.import_jsonl(p, p)}))
+        return
+
+    store = open_store(habitat, args.store, args.db)
+    for p in paths:
+        if args.command == "count":
+            print(json.dumps({"stream": p.name, "store": store.kind, "records": store.count(p)}))
+        else:
+            store.export(p, sys.stdout.buffer)
+
+
+if __name__ == "__main__":
+    main()
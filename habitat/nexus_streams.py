@@ -0,0 +1,167 @@
+"""
+Single serialized writer per memory stream, safe across worker processes.
+
+Every append to a JSONL stream goes through the StreamWriter for that
+path: a thread lock inside the process plus an OS file lock on
+<stream>.lock across processes, then one os.write() of the encoded lines
+on an O_APPEND descriptor. Whole records land in order and never
+interleave, whether they come from several nexus_serve.py workers, the
+echo_mem_* CLIs, or both.
+
+    from nexus_streams import append_record
+    append_record(MEMORY_STREAM, entry)
+
+    with get_writer(MEMORY_STREAM).locked():   # e.g. to rewrite the file
+        ...
+"""
+import contextlib
+import json
+import os
+import threading
+from pathlib import Path
+
+if os.name == "nt":
+    import msvcrt
+
+    def lock_file(fd):
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+
+    def unlock_file(fd):
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+    def try_lock_file(fd) -> bool:
+        os.lseek(fd, 0, os.SEEK_SET)
+        try:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        except OSError:
+            return False
+        return True
+else:
+    import fcntl
+
+    def lock_file(fd):
+        fcntl.flock(fd, fcntl.LOCK_EX)
+
+    def unlock_file(fd):
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+    def try_lock_file(fd) -> bool:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        return True
+
+_OPEN_FLAGS = os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0)
+
+
+def encode_record(data: dict) -> bytes:
+    return (json.dumps(data, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+class StreamWriter:
+    """
+    Append-only writer for one JSONL stream path.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+        self._thread_lock = threading.RLock()
+        self._fd = None
+        self._lock_fd = None
+        self._ino = None
+        self._pid = None
+
+    def _ensure_open(self):
+        # Reopen after a fork, or if the stream was replaced (e.g. compaction)
+        if self._pid != os.getpid():
+            self._fd = self._lock_fd = None
+        if self._lock_fd is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._lock_fd = os.open(str(self.lock_path), os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o644)
+            self._pid = os.getpid()
+
+    def _ensure_data_fd(self):
+        try:
+            ino = os.stat(self.path).st_ino
+        except FileNotFoundError:
+            ino = None
+        if self._fd is None or ino is None or ino != self._ino:
+            if self._fd is not None:
+                os.close(self._fd)
+            self._fd = os.open(str(self.path), _OPEN_FLAGS, 0o644)
+            self._ino = os.fstat(self._fd).st_ino
+        return self._fd
+
+    @contextlib.contextmanager
+    def locked(self):
+        """
+        Hold the stream exclusively (thread + process) for the block.
+        """
+        with self._thread_lock:
+            self._ensure_open()
+            lock_file(self._lock_fd)
+            try:
+                yield self
+            finally:
+                unlock_file(self._lock_fd)
+
+    def write_bytes(self, data: bytes):
+        with self.locked():
+            fd = self._ensure_data_fd()
+            view = memoryview(data)
+            while view:
+                n = os.write(fd, view)
+                view = view[n:]
+
+    def append(self, record: dict):
+        self.write_bytes(encode_record(record))
+
+    def append_many(self, records):
+        data = b"".join(encode_record(r) for r in records)
+        if data:
+            self.write_bytes(data)
+
+    def close(self):
+        with self._thread_lock:
+            for fd in (self._fd, self._lock_fd):
+                if fd is not None and self._pid == os.getpid():
+                    os.close(fd)
+            self._fd = self._lock_fd = None
+
+
+_WRITERS = {}
+_WRITERS_LOCK = threading.Lock()
+
+
+def get_writer(path) -> StreamWriter:
+    key = str(Path(path).absolute())
+    w = _WRITERS.get(key)
+    if w is None:
+        with _WRITERS_LOCK:
+            w = _WRITERS.get(key)
+            if w is None:
+                w = _WRITERS[key] = StreamWriter(path)
+    return w
+
+
+def close_writer(path):
+    """
+    Drop the writer for `path` and close its descriptors (e.g. when a
+    tenant habitat is unloaded); the next get_writer() opens a new one.
+    """
+    with _WRITERS_LOCK:
+        w = _WRITERS.pop(str(Path(path).absolute()), None)
+    if w is not None:
+        w.close()
+
+
+def append_record(path, record: dict):
+    get_writer(path).append(record)
+
+
+def append_records(path, records):
+    get_writer(path).append_many(records)
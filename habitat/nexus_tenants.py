@@ -0,0 +1,275 @@
+"""
+Several habitats behind one server: tenant routing and a resident-memory
+budget for the tenants' habitats.
+
+A request names its tenant by path prefix or header:
+
+    /t/alice/cipher/chat                  -> tenant "alice", route /cipher/chat
+    X-Echo-Tenant: alice  + /cipher/chat  -> the same
+
+TenantMiddleware (WSGI, in front of Flask) strips the prefix (it moves to
+SCRIPT_NAME, so the app's routes and rate-limit rules match unchanged)
+and leaves the name in environ["echo.tenant"]; requests without one are
+the server's own (root) habitat. Unknown tenants get a 404 before Flask
+runs. A tenant exists once its folder does: <PATHS.tenants>/<name>/, a
+habitat root of its own (config/nexus_config.json, memory/streams, ...):
+
+    nexus_tenants.py create alice        -> tenants/alice/ with its folders
+
+TenantRegistry loads a tenant's habitat on its first request, through the
+app's factory(name, paths), and keeps it resident while it is in use. The
+app decides what a habitat holds; the registry only needs:
+
+    habitat.cache_bytes()   estimated resident size (its memory budget)
+    habitat.tick()          housekeeping, every SWEEP_INTERVAL (seed polls, ...)
+    habitat.close()         flush and release everything before unloading
+
+When the tenants' habitats together go over `budget_bytes`, the least
+recently used ones idle for at least `idle_seconds` are unloaded; their
+next request loads them again from disk.
+"""
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from nexus_metrics import TENANT_CACHE_BYTES, TENANT_EVICTIONS_TOTAL, TENANTS_RESIDENT
+from nexus_paths import CONFIG_NAME, get_paths
+
+TENANT_HEADER = "X-Echo-Tenant"
+PATH_PREFIX = "/t/"
+ENVIRON_KEY = "echo.tenant"
+SWEEP_INTERVAL = 2.0
+
+_NAME_RE = re.compile(r"[a-z0-9][a-z0-9_-]{0,62}\Z")
+
+
+def valid_name(name) -> bool:
+    """
+    Lowercase letters, digits, "-" and "_" (it is a folder name and a URL segment).
+    """
+    return isinstance(name, str) and bool(_NAME_RE.match(name))
+
+
+def _json_error(start_response, status: str, message: str, headers=()):
+    body = json.dumps({"error": message}).encode("utf-8")
+    start_response(status, [("Content-Type", "application/json"),
+                            ("Content-Length", str(len(body))), *headers])
+    return [body]
+
+
+class TenantMiddleware:
+    """
+    WSGI wrapper: /t/<name>/... or X-Echo-Tenant -> environ[ENVIRON_KEY].
+    `known(name)` says whether a tenant exists.
+    """
+
+    def __init__(self, wsgi_app, known):
+        self.app = wsgi_app
+        self.known = known
+
+    def __call__(self, environ, start_response):
+        path = environ.get("PATH_INFO") or "/"
+        name = None
+        if path.startswith(PATH_PREFIX):
+            name, sep, rest = path[len(PATH_PREFIX):].partition("/")
+            if not sep:
+                # /t/alice -> /t/alice/, so the console's relative URLs stay inside it
+                query = environ.get("QUERY_STRING")
+                location = environ.get("SCRIPT_NAME", "") + path + "/" + (f"?{query}" if query else "")
+                start_response("308 Permanent Redirect", [("Location", location), ("Content-Length", "0")])
+                return [b""]
+            environ["SCRIPT_NAME"] = environ.get("SCRIPT_NAME", "") + PATH_PREFIX + name
+            environ["PATH_INFO"] = "/" + rest
+        header = environ.get("HTTP_X_ECHO_TENANT")
+        if header:
+            if name is not None and header != name:
+                return _json_error(start_response, "400 Bad Request",
+                                   f"{TENANT_HEADER} {header!r} does not match the path's tenant {name!r}")
+            name = header
+        if name is not None:
+            if not valid_name(name) or not self.known(name):
+                return _json_error(start_response, "404 Not Found", f"Unknown tenant: {name!r}")
+            environ[ENVIRON_KEY] = name
+        return self.app(environ, start_response)
+
+
+class TenantRegistry:
+    """
+    name -> resident habitat, created on first use by factory(name, paths)
+    for the tenant folder <tenants_dir>/<name> (paths from nexus_paths).
+    """
+
+    def __init__(self, factory, tenants_dir, budget_bytes: int, idle_seconds: float,
+                 sweep_interval: float = SWEEP_INTERVAL):
+        self.factory = factory
+        self.tenants_dir = tenants_dir
+        self.budget_bytes = budget_bytes
+        self.idle_seconds = idle_seconds
+        self.sweep_interval = sweep_interval
+        self.loads = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._live = OrderedDict()   # name -> habitat, least recently used first
+        self._used = {}              # name -> time.monotonic() of the last get()
+        self._thread = None
+
+    def exists(self, name) -> bool:
+        return valid_name(name) and (self.tenants_dir / name).is_dir()
+
+    def get(self, name: str):
+        """
+        The tenant's habitat, loading it if needed (KeyError if there is no such tenant).
+        The sweeper thread starts with the first load.
+        """
+        loaded = False
+        with self._lock:
+            habitat = self._live.get(name)
+            if habitat is None:
+                if not self.exists(name):
+                    raise KeyError(name)
+                habitat = self.factory(name, get_paths(self.tenants_dir / name))
+                self._live[name] = habitat
+                self.loads += 1
+                loaded = True
+                TENANTS_RESIDENT.set(len(self._live))
+            else:
+                self._live.move_to_end(name)
+            self._used[name] = time.monotonic()
+        if loaded:
+            self.start()
+        return habitat
+
+    def evict(self, name: str, idle_for: float = None) -> bool:
+        """
+        Unload a tenant's habitat; with `idle_for`, only if it has not been
+        used for that many seconds (checked under the lock, so a request
+        that just got it keeps a live habitat).
+        """
+        with self._lock:
+            if idle_for is not None and time.monotonic() - self._used.get(name, 0.0) < idle_for:
+                return False
+            habitat = self._live.pop(name, None)
+            self._used.pop(name, None)
+            TENANTS_RESIDENT.set(len(self._live))
+        if habitat is None:
+            return False
+        habitat.close()
+        return True
+
+    def sweep(self):
+        """
+        Housekeeping for every resident habitat, then unload idle ones (LRU
+        first) until the total is back under budget. Returns evicted names.
+        """
+        with self._lock:
+            live = list(self._live.items())
+        sizes = {}
+        for name, habitat in live:
+            try:
+                habitat.tick()
+            except Exception:
+                # One tenant's housekeeping must not stop the others'
+                pass
+            sizes[name] = habitat.cache_bytes()
+        total = sum(sizes.values())
+        evicted = []
+        for name, _ in live:
+            if total <= self.budget_bytes:
+                break
+            if self.evict(name, idle_for=self.idle_seconds):
+                total -= sizes[name]
+                evicted.append(name)
+        if evicted:
+            self.evictions += len(evicted)
+            TENANT_EVICTIONS_TOTAL.inc(len(evicted))
+        TENANT_CACHE_BYTES.set(total)
+        return evicted
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="nexus-tenants", daemon=True)
+                self._thread.start()
+        return self
+
+    def _run(self):
+        while True:
+            time.sleep(self.sweep_interval)
+            try:
+                self.sweep()
+            except Exception:
+                # The sweeper must never die; next round retries
+                pass
+
+    def info(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            live = list(self._live.items())
+        tenants = {name: {"cache_bytes": h.cache_bytes(), "idle_s": round(now - self._used.get(name, now), 1)}
+                   for name, h in live}
+        return {
+            "resident": len(tenants),
+            "cache_bytes": sum(t["cache_bytes"] for t in tenants.values()),
+            "budget_bytes": self.budget_bytes,
+            "idle_seconds": self.idle_seconds,
+            "loads": self.loads,
+            "evictions": self.evictions,
+            "tenants": tenants,
+        }
+
+
+def create_tenant(tenants_dir, name: str, settings: dict = None):
+    """
+    Make <tenants_dir>/<name>/ a habitat root: config + memory/state folders.
+    """
+    if not valid_name(name):
+        raise ValueError(f"Bad tenant name {name!r} (lowercase letters, digits, '-' and '_')")
+    root = tenants_dir / name
+    config = root / CONFIG_NAME
+    config.parent.mkdir(parents=True, exist_ok=True)
+    if not config.exists():
+        config.write_text(json.dumps(dict({"Name": name}, **(settings or {})), indent=4) + "\n", encoding="utf-8")
+    paths = get_paths(root)
+    for folder in (paths.streams, paths.profiles, paths.state, paths.seeds):
+        folder.mkdir(parents=True, exist_ok=True)
+    return paths
+
+
+def main():
+    # Usage:
+    #   nexus_tenants.py list
+    #   nexus_tenants.py create alice                     -> tenants/alice/ (config, streams, state, seeds)
+    #   nexus_tenants.py create bob --consent "Bob Smith"  -> handshake consent name for bob's Vexis
+    #
+    # Then: POST /t/alice/cipher/chat, or any route with "X-Echo-Tenant: alice".
+    #
+    import argparse
+    import sys
+
+    ap = argparse.ArgumentParser(description="Manage the tenant habitats hosted by one cipher_server.")
+    ap.add_argument("command", choices=("list", "create"))
+    ap.add_argument("name", nargs="?")
+    ap.add_argument("--consent", help="handshake consent name (nexus_config.json \"Consent\")")
+    ap.add_argument("--root", help="Echo Nexus root (default: see nexus_paths.py)")
+    args = ap.parse_args()
+
+    tenants_dir = get_paths(args.root, start=__file__).tenants
+    if args.command == "list":
+        names = sorted(p.name for p in tenants_dir.iterdir() if p.is_dir() and valid_name(p.name)) \
+            if tenants_dir.is_dir() else []
+        print(json.dumps({"tenants_dir": str(tenants_dir), "tenants": names}, indent=2))
+        return
+    if not args.name:
+        ap.error("create needs a tenant name")
+    try:
+        paths = create_tenant(tenants_dir, args.name, {"Consent": args.consent} if args.consent else None)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+    print(json.dumps(paths.as_dict(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+One timeline over several memory streams: a k-way merge by timestamp.
+
+Cipher's chat lives in root_memory.jsonl and Vexis's in vexis_memory.jsonl;
+the timeline interleaves any set of streams, newest first (or oldest
+first), one page at a time:
+
+    streams = {"root_memory.jsonl": MEMORY_STREAM, "vexis_memory.jsonl": VEXIS_MEMORY_STREAM}
+    page = timeline_page(store, streams, limit=50)
+    page["entries"]    [{"ts", "stream", "record"}, ...]
+    page = timeline_page(store, streams, limit=50, cursor=page["next"])
+
+Each stream is walked lazily through store.walk() (an mmap line walk for
+JSONL, a row cursor for SQLite) and the walks are merged with heapq.merge,
+so a page reads about `limit + streams` records and memory stays flat no
+matter how long the histories are. Streams are taken in file order
+(appends are time-ordered); a record without a usable timestamp sorts
+with its neighbour.
+
+Timestamps are normalized: `ts` or `ts_utc`, with "Z", an offset or none
+(= UTC), comes back as one ISO 8601 UTC `ts`. The cursor is composite:
+the direction plus each stream's own position, so ties across streams and
+records appended between pages are never skipped or repeated. A newest-
+first timeline pins every stream's end on its first page; newer records
+show up by starting over. Stale positions (a stream was compacted) raise
+nexus_store.StaleCursor.
+"""
+import base64
+import heapq
+import json
+from datetime import datetime, timezone
+
+from nexus_store import StaleCursor, record_ts
+
+ORDERS = ("desc", "asc")
+
+
+def norm_ts(t):
+    """
+    unix seconds -> ISO 8601 UTC string (None stays None).
+    """
+    if t is None:
+        return None
+    return datetime.fromtimestamp(t, tz=timezone.utc).isoformat()
+
+
+def encode_cursor(order: str, positions: dict) -> str:
+    raw = json.dumps({"o": order, "p": positions}, separators=(",", ":"), sort_keys=True)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """
+    -> (order, {stream name: store cursor}); StaleCursor if it isn't one of ours.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        doc = json.loads(raw)
+        order, positions = doc["o"], doc["p"]
+    except (ValueError, TypeError, KeyError):
+        raise StaleCursor(f"Bad timeline cursor: {cursor!r}")
+    if (order not in ORDERS or not isinstance(positions, dict)
+            or not all(isinstance(p, str) for p in positions.values())):
+        raise StaleCursor(f"Bad timeline cursor: {cursor!r}")
+    return order, positions
+
+
+def _keyed(store, idx: int, name: str, path, start, reverse: bool):
+    """
+    One stream's walk as heap items: (sort key, idx, seq, name, cursor, ts, record).
+    """
+    sign = -1.0 if reverse else 1.0
+    last = float("inf") if reverse else float("-inf")
+    walk = store.walk(path, start, reverse)
+    try:
+        for seq, (pos, e) in enumerate(walk):
+            t = record_ts(e)
+            if t is not None:
+                last = t
+            yield sign * last, idx, seq, name, pos, t, e
+    finally:
+        # Unmaps the stream / ends the SQLite cursor as soon as the page is done
+        walk.close()
+
+
+def timeline_page(store, streams: dict, limit: int = 50, cursor: str = None, order: str = "desc") -> dict:
+    """
+    One page of the merged timeline of `streams` ({name: path}).
+    Returns {"entries", "count", "next", "more"}: pass `next` back as
+    `cursor` for the following page (it keeps the page's direction).
+    An ascending walk's `next` also picks up records appended later.
+    """
+    if cursor:
+        order, positions = decode_cursor(cursor)
+    else:
+        if order not in ORDERS:
+            raise ValueError(f"order must be one of {', '.join(ORDERS)}")
+        positions = {}
+    reverse = order == "desc"
+    if reverse:
+        for name, path in streams.items():
+            if name not in positions:
+                positions[name] = store.end_cursor(path)
+
+    walks = [_keyed(store, idx, name, path, positions.get(name), reverse)
+             for idx, (name, path) in enumerate(streams.items())]
+    merged = heapq.merge(*walks)
+    entries = []
+    try:
+        for _, _, _, name, pos, t, e in merged:
+            entries.append({"ts": norm_ts(t), "stream": name, "record": e})
+            positions[name] = pos
+            if len(entries) >= limit:
+                break
+        more = next(merged, None) is not None
+    finally:
+        for walk in walks:
+            walk.close()
+    return {
+        "count": len(entries),
+        "entries": entries,
+        "next": encode_cursor(order, positions),
+        "more": more,
+    }
+
+
+def iter_timeline(store, streams: dict, order: str = "desc", cursor: str = None, page_size: int = 500):
+    """
+    Every timeline entry from `cursor` on, page by page (CLI / export use).
+    """
+    while True:
+        page = timeline_page(store, streams, page_size, cursor, order)
+        yield from page["entries"]
+        if not page["more"]:
+            return
+        cursor = page["next"]
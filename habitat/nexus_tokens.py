@@ -0,0 +1,170 @@
+"""
+Purpose-token validation for /echo/handshake: expiry, a validated-token
+cache, and a replay (nonce) window.
+
+    purpose_token = {"scope": "observe_and_respond", "ttl": 1730966400,
+                     "consent": "Richard Rice"}
+
+- `ttl` is the token's absolute expiry (unix seconds). Expired tokens are
+  refused; tokens without one are accepted unless require_ttl is set.
+- A token that validated once is cached per sender (LRU, evicted at its
+  expiry), so repeat handshakes skip validation and reuse the cached scope.
+- An optional top-level "nonce" of a handshake that validated is remembered
+  for `window` seconds; a second handshake with the same (sender, nonce) is
+  refused as a replay. Both the
+  lookup and the expiry sweep are O(1) amortized per request.
+
+Caches are per process; under nexus_serve.py each worker keeps its own.
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+
+TOKEN_CACHE_SIZE = 4096
+TOKEN_CACHE_SECONDS = 300.0
+NONCE_WINDOW_SECONDS = 300.0
+NONCE_MAX = 100_000
+
+
+class TokenError(Exception):
+    """
+    Token refused; `reason` is one of "consent", "expired", "missing_ttl", "bad_ttl".
+    """
+
+    def __init__(self, reason: str, detail: str = ""):
+        super().__init__(detail or reason)
+        self.reason = reason
+
+
+def _expiry(purpose: dict, now: float, require_ttl: bool):
+    ttl = purpose.get("ttl")
+    if ttl is None:
+        if require_ttl:
+            raise TokenError("missing_ttl", "Purpose token has no ttl")
+        return None
+    try:
+        expires = float(ttl)
+    except (TypeError, ValueError):
+        raise TokenError("bad_ttl", f"Purpose token ttl is not a timestamp: {ttl!r}")
+    if expires <= now:
+        raise TokenError("expired", "Purpose token expired")
+    return expires
+
+
+class TokenCache:
+    """
+    (sender, token fields) -> (scope, expires_at), LRU-bounded.
+    """
+
+    def __init__(self, size: int = TOKEN_CACHE_SIZE, max_age: float = TOKEN_CACHE_SECONDS):
+        self.size = size
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def key(sender: str, purpose: dict):
+        return (sender, purpose.get("consent"), purpose.get("scope"), purpose.get("ttl"))
+
+    def get(self, key, now: float):
+        with self._lock:
+            hit = self._entries.get(key)
+            if hit is not None:
+                if hit[1] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return hit[0]
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, scope: str, expires, now: float):
+        until = now + self.max_age
+        if expires is not None:
+            until = min(until, expires)
+        with self._lock:
+            self._entries[key] = (scope, until)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def info(self) -> dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+class NonceWindow:
+    """
+    Remembers (sender, nonce) for `window` seconds. seen() is O(1): a set
+    lookup plus popping however many entries have aged out of the deque.
+    """
+
+    def __init__(self, window: float = NONCE_WINDOW_SECONDS, max_entries: int = NONCE_MAX):
+        self.window = window
+        self.max_entries = max_entries
+        self.replays = 0
+        self._lock = threading.Lock()
+        self._seen = set()
+        self._order = deque()
+
+    def seen(self, sender: str, nonce: str, now: float) -> bool:
+        """
+        True if this nonce was already used inside the window (a replay);
+        otherwise records it and returns False.
+        """
+        key = (sender, nonce)
+        with self._lock:
+            order = self._order
+            while order and (order[0][0] <= now - self.window or len(order) > self.max_entries):
+                self._seen.discard(order.popleft()[1])
+            if key in self._seen:
+                self.replays += 1
+                return True
+            self._seen.add(key)
+            order.append((now, key))
+            return False
+
+
+class TokenValidator:
+    """
+    Validates handshake purpose tokens against the expected consent name.
+    """
+
+    def __init__(self, expected_consent: str, require_ttl: bool = False,
+                 cache: TokenCache = None, nonces: NonceWindow = None):
+        self.expected_consent = expected_consent
+        self.require_ttl = require_ttl
+        self.cache = cache or TokenCache()
+        self.nonces = nonces or NonceWindow()
+
+    def is_replay(self, sender: str, nonce, now: float = None) -> bool:
+        if nonce is None or nonce == "":
+            return False
+        return self.nonces.seen(sender, str(nonce), time.time() if now is None else now)
+
+    def validate(self, sender: str, purpose: dict, now: float = None) -> str:
+        """
+        Return the token's scope, or raise TokenError.
+        """
+        now = time.time() if now is None else now
+        key = TokenCache.key(sender, purpose)
+        try:
+            hash(key)
+        except TypeError:
+            key = None
+        if key is not None:
+            scope = self.cache.get(key, now)
+            if scope is not None:
+                return scope
+
+        if purpose.get("consent") != self.expected_consent:
+            raise TokenError("consent", "Consent validation failed")
+        expires = _expiry(purpose, now, self.require_ttl)
+        scope = purpose.get("scope", "")
+        if key is not None:
+            self.cache.put(key, scope, expires, now)
+        return scope
+
+    def info(self) -> dict:
+        return dict(self.cache.info(), replays=self.nonces.replays, nonces=len(self.nonces._seen))
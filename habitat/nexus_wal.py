@@ -0,0 +1,405 @@
+"""
+Write-ahead queue for stream appends: put() returns as soon as the record
+is in a memory-mapped spill file, and a background thread writes queued
+records to the store in order.
+
+    queue = WriteQueue(store, PATHS.state / "wal" / "writes-main.spill").start()
+    queue.put(stream, record)          # a memcpy into the mapping, no stream I/O
+    entries, queued = queue.read(stream, lambda: store.tail(stream, 200))
+
+Durability: the spill file is a ring buffer in a shared file mapping, so a
+record survives the process dying (crash, kill -9) once put() returns --
+the kernel owns the dirty pages. Like a plain append (no fsync either) it
+does not survive the machine losing power before they reach the disk.
+start() first replays whatever a previous run left between the file's
+head and tail. A crash between a flush and its head update replays that
+batch again: delivery is at-least-once.
+
+Ordering: records are written in put() order. Read-your-writes: read()
+pairs a store read with the records still queued for that stream; a flush
+that overlaps the read is detected (an even/odd epoch, as in a seqlock)
+and the read is redone under the flush lock, so a record is never missed
+or seen twice.
+
+When the ring is full, put() waits for the flusher (backpressure) and
+raises after PUT_TIMEOUT. Each process owns its spill file (an OS lock);
+under nexus_serve.py every worker id has its own, replayed when that
+worker starts again. Leftover files (e.g. gunicorn pid ids) can be
+replayed by hand:
+
+    nexus_wal.py info  state/wal/writes-4711.spill
+    nexus_wal.py replay state/wal/writes-4711.spill
+"""
+import atexit
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import deque
+from itertools import islice
+from pathlib import Path
+
+from nexus_metrics import WRITE_QUEUE_RECORDS_TOTAL, WRITE_QUEUE_STALLS_TOTAL
+from nexus_streams import try_lock_file, unlock_file
+
+MAGIC = b"ECHOWAL1"
+CAPACITY = 8 * 1024 * 1024
+FLUSH_BATCH = 256
+PUT_TIMEOUT = 30.0
+RETRY_SECONDS = 1.0
+# start() waits this long for a previous owner that is still draining
+# (an unloading tenant habitat, a worker being replaced)
+LOCK_WAIT = 15.0
+
+_HEADER = struct.Struct("<8sQQQ")   # magic, capacity, head, tail (logical offsets)
+_FRAME = struct.Struct("<II")       # payload length, crc32
+HEADER_BYTES = 64
+_PAD = 0xFFFFFFFF                   # rest of the ring is unused; next frame at offset 0
+
+
+def _frames(m, capacity: int, head: int, tail: int):
+    """
+    Payloads between `head` and `tail`, oldest first; stops at a torn frame.
+    """
+    pos = head
+    while pos < tail:
+        phys = pos % capacity
+        room = capacity - phys
+        if room < _FRAME.size:
+            pos += room
+            continue
+        n, crc = _FRAME.unpack_from(m, HEADER_BYTES + phys)
+        if n == _PAD:
+            pos += room
+            continue
+        start = HEADER_BYTES + phys + _FRAME.size
+        if _FRAME.size + n > room or pos + _FRAME.size + n > tail:
+            return
+        payload = bytes(m[start:start + n])
+        if zlib.crc32(payload) != crc:
+            return
+        yield payload
+        pos += _FRAME.size + n
+
+
+def read_spill(fd) -> list:
+    """
+    [(stream Path, record), ...] still queued in the spill file open as
+    `fd`, oldest first. (Read through the owner's fd: on Windows the
+    owner's lock keeps other handles out.)
+    """
+    size = os.fstat(fd).st_size
+    if size < HEADER_BYTES:
+        return []
+    with mmap.mmap(fd, size, access=mmap.ACCESS_READ) as m:
+        magic, capacity, head, tail = _HEADER.unpack_from(m, 0)
+        if magic != MAGIC or HEADER_BYTES + capacity > size or not head <= tail <= head + capacity:
+            return []
+        items = []
+        for payload in _frames(m, capacity, head, tail):
+            try:
+                stream, record = json.loads(payload)
+            except ValueError:
+                break
+            items.append((Path(stream), record))
+        return items
+
+
+def write_in_order(store, items):
+    """
+    Append (stream, record) pairs in order, one append_many per run of the same stream.
+    """
+    run_stream, run = None, []
+    for stream, record in items:
+        if run and stream != run_stream:
+            store.append_many(run_stream, run)
+            run = []
+        run_stream = stream
+        run.append(record)
+    if run:
+        store.append_many(run_stream, run)
+
+
+class WriteQueue:
+    """
+    Asynchronous, crash-safe appends to `store` (a nexus_store backend)
+    through the spill file at `path`.
+    """
+
+    def __init__(self, store, path, capacity: int = CAPACITY, batch: int = FLUSH_BATCH):
+        self.store = store
+        self.path = Path(path)
+        self.capacity = capacity
+        self.batch = batch
+        self.queued = 0
+        self.flushed = 0
+        self.replayed = 0
+        self.error = None
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._pending = deque()     # (stream, record, end offset)
+        self._epoch = 0             # odd while a flush is writing
+        self._head = 0
+        self._tail = 0
+        self._fd = None
+        self._map = None
+        self._thread = None
+        self._closed = False
+
+    # --- Setup / recovery ---
+
+    def start(self):
+        """
+        Take the spill file, replay what it still holds, start the flusher.
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(str(self.path), os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o644)
+        deadline = time.monotonic() + LOCK_WAIT
+        while not try_lock_file(fd):
+            if time.monotonic() > deadline:
+                os.close(fd)
+                raise RuntimeError(f"{self.path} is in use by another process")
+            time.sleep(0.05)
+        try:
+            items = read_spill(fd)
+            if items:
+                write_in_order(self.store, items)
+                self.replayed = len(items)
+                WRITE_QUEUE_RECORDS_TOTAL.inc(len(items), event="replayed")
+            size = HEADER_BYTES + self.capacity
+            if os.fstat(fd).st_size != size:
+                os.ftruncate(fd, size)
+            self._map = mmap.mmap(fd, size)
+            _HEADER.pack_into(self._map, 0, MAGIC, self.capacity, 0, 0)
+        except BaseException:
+            unlock_file(fd)
+            os.close(fd)
+            raise
+        self._fd = fd
+        self._thread = threading.Thread(target=self._run, name="nexus-wal", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+        return self
+
+    # --- Writes ---
+
+    def put(self, stream, record: dict):
+        self.put_many(stream, [record])
+
+    def put_many(self, stream, records):
+        """
+        Queue `records` for `stream`; returns once they are in the spill file.
+        """
+        stream = Path(stream)
+        payloads = [json.dumps([str(stream), r], ensure_ascii=False).encode("utf-8") for r in records]
+        for record, payload in zip(records, payloads):
+            if _FRAME.size + len(payload) > self.capacity // 2:
+                self._write_through(stream, record)
+                continue
+            with self._cond:
+                end = self._reserve(payload)
+                self._pending.append((stream, record, end))
+                self.queued += 1
+                self._cond.notify_all()
+        WRITE_QUEUE_RECORDS_TOTAL.inc(len(records), event="queued")
+
+    def _reserve(self, payload: bytes) -> int:
+        # Called with _cond held. Copies one frame into the ring, waiting
+        # for the flusher while it doesn't fit; returns its end offset.
+        if self._closed:
+            raise RuntimeError("write queue is closed")
+        need = _FRAME.size + len(payload)
+        deadline = None
+        while True:
+            room = self.capacity - self._tail % self.capacity
+            skip = 0 if room >= need else room
+            if self._tail + skip + need - self._head <= self.capacity:
+                break
+            if deadline is None:
+                deadline = time.monotonic() + PUT_TIMEOUT
+                WRITE_QUEUE_STALLS_TOTAL.inc(reason="full")
+            left = deadline - time.monotonic()
+            if left <= 0:
+                raise OSError(f"write queue {self.path.name} stayed full for {PUT_TIMEOUT:g}s"
+                              f" (flusher: {self.error or 'busy'})")
+            self._cond.wait(left)
+        m = self._map
+        if skip:
+            if room >= _FRAME.size:
+                _FRAME.pack_into(m, HEADER_BYTES + self._tail % self.capacity, _PAD, 0)
+            self._tail += skip
+        off = HEADER_BYTES + self._tail % self.capacity
+        _FRAME.pack_into(m, off, len(payload), zlib.crc32(payload))
+        m[off + _FRAME.size:off + need] = payload
+        self._tail += need
+        # Tail last: a crash mid-copy leaves the frame outside head..tail
+        struct.pack_into("<Q", m, 24, self._tail)
+        return self._tail
+
+    def _write_through(self, stream, record):
+        # Too big for the ring: write it directly, after everything queued before it
+        self.flush()
+        with self._flush_lock:
+            with self._cond:
+                self._epoch += 1
+            try:
+                self.store.append(stream, record)
+            finally:
+                with self._cond:
+                    self._epoch += 1
+
+    # --- Flusher ---
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                batch = list(islice(self._pending, self.batch))
+            try:
+                self._flush(batch)
+                self.error = None
+            except Exception as e:
+                # Records stay queued (and in the spill file); retry
+                self.error = str(e)
+                WRITE_QUEUE_STALLS_TOTAL.inc(reason="error")
+                time.sleep(RETRY_SECONDS)
+
+    def _flush(self, batch):
+        with self._flush_lock:
+            with self._cond:
+                self._epoch += 1
+            done = False
+            try:
+                write_in_order(self.store, [(s, r) for s, r, _ in batch])
+                done = True
+            finally:
+                with self._cond:
+                    if done:
+                        for _ in batch:
+                            self._pending.popleft()
+                        self._head = batch[-1][2]
+                        struct.pack_into("<Q", self._map, 16, self._head)
+                        self.flushed += len(batch)
+                    self._epoch += 1
+                    self._cond.notify_all()
+        WRITE_QUEUE_RECORDS_TOTAL.inc(len(batch), event="flushed")
+
+    def flush(self, timeout: float = None) -> bool:
+        """
+        Wait until everything queued so far is written. False on timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            target = self._tail
+            while self._pending and self._head < target:
+                left = None if deadline is None else deadline - time.monotonic()
+                if left is not None and left <= 0:
+                    return False
+                self._cond.wait(left)
+        return True
+
+    # --- Reads ---
+
+    def read(self, stream, read_fn):
+        """
+        (read_fn(), records still queued for `stream`, oldest first).
+        read_fn reads `stream` from the store; together the two hold every
+        record put() so far exactly once.
+        """
+        stream = Path(stream)
+        with self._cond:
+            epoch = self._epoch
+        if not epoch % 2:
+            result = read_fn()
+            with self._cond:
+                if self._epoch == epoch:
+                    return result, [r for s, r, _ in self._pending if s == stream]
+        # A flush overlapped the read: redo it with the flusher held off
+        with self._flush_lock:
+            result = read_fn()
+            with self._cond:
+                return result, [r for s, r, _ in self._pending if s == stream]
+
+    # --- Shutdown ---
+
+    def close(self, timeout: float = 10.0):
+        """
+        Drain and stop. Records the flusher couldn't write stay in the
+        spill file for the next start().
+        """
+        with self._cond:
+            if self._closed or self._thread is None:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        atexit.unregister(self.close)
+        if self._thread.is_alive():
+            # Still retrying a failed write; leave the file mapped for it
+            return
+        self._map.close()
+        unlock_file(self._fd)
+        os.close(self._fd)
+
+    def info(self) -> dict:
+        with self._cond:
+            return {
+                "path": str(self.path),
+                "capacity": self.capacity,
+                "pending": len(self._pending),
+                "pending_bytes": self._tail - self._head,
+                "queued": self.queued,
+                "flushed": self.flushed,
+                "replayed": self.replayed,
+                "error": self.error,
+            }
+
+
+def main():
+    # Usage:
+    #   nexus_wal.py info state/wal/writes-main.spill     -> records still queued, per stream
+    #   nexus_wal.py replay state/wal/writes-4711.spill   -> write them to the store, then remove the file
+    #
+    # Both refuse a spill file a running process still owns.
+    #
+    import argparse
+    import sys
+
+    from nexus_paths import get_paths
+    from nexus_store import open_store
+
+    ap = argparse.ArgumentParser(description="Inspect or replay a write-ahead queue spill file.")
+    ap.add_argument("command", choices=("info", "replay"))
+    ap.add_argument("spill")
+    ap.add_argument("--root", help="Echo Nexus root (default: see nexus_paths.py)")
+    args = ap.parse_args()
+
+    path = Path(args.spill)
+    fd = os.open(str(path), os.O_RDWR | getattr(os, "O_BINARY", 0))
+    try:
+        if not try_lock_file(fd):
+            print(f"{path} is in use by another process", file=sys.stderr)
+            sys.exit(1)
+        items = read_spill(fd)
+        if args.command == "info":
+            counts = {}
+            for stream, _ in items:
+                counts[str(stream)] = counts.get(str(stream), 0) + 1
+            print(json.dumps({"spill": str(path), "queued": counts}, indent=2))
+            return
+        write_in_order(open_store(get_paths(args.root, start=__file__)), items)
+        unlock_file(fd)
+    finally:
+        os.close(fd)
+    path.unlink()
+    print(json.dumps({"spill": str(path), "replayed": len(items)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+// Echo Nexus console: chat box + virtualized memory log.
+//
+// The log keeps every loaded entry as one formatted line, but only the rows
+// in view (plus OVERSCAN) exist in the DOM. Pages come from
+// /<persona>/memory/page: the newest page first, older pages when scrolled
+// near the top (?before=<older>), new entries on refresh (?after=<newer>).
+// API URLs are relative to the page, so a tenant's console (/t/<name>/)
+// talks to that tenant's habitat.
+
+const ROW_HEIGHT = 20;   // px, must match .log-row in console.css
+const PAGE_SIZE = 200;
+const OVERSCAN = 10;
+
+const log = {
+  source: null,
+  lines: [],        // oldest first
+  older: null,      // cursor for the page before lines[0]; null at the start
+  newer: null,      // cursor for entries after the last line
+  loading: false,
+  generation: 0,    // bumped on reset; stale responses are dropped
+};
+
+const logDiv = document.getElementById('log');
+const spacer = document.getElementById('logSpacer');
+const rows = document.getElementById('logRows');
+const status = document.getElementById('logStatus');
+
+function formatEntry(e) {
+  if (e.raw !== undefined) return `[malformed] ${e.raw}`;
+  const ts = e.ts || e.ts_utc || "";
+  const author = e.author || e.user || "";
+  const summary = e.summary || e.note || "";
+  const text = (e.details && e.details.text) ? e.details.text : "";
+  const tags = e.tags || [];
+  let tagLabel = "";
+  if (tags.includes("vexis")) {
+    tagLabel = "[VEXIS]";
+  } else if (tags.includes("cipher")) {
+    tagLabel = "[CIPHER]";
+  }
+  return `[${ts}] ${tagLabel} ${author}: ${summary}${text ? " :: " + text : ""}`;
+}
+
+function pageUrl(params) {
+  const base = log.source === "vexis" ? "vexis/memory/page" : "cipher/memory/page";
+  return base + "?" + new URLSearchParams(Object.assign({ n: PAGE_SIZE }, params));
+}
+
+async function fetchPage(params) {
+  const res = await fetch(pageUrl(params));
+  if (res.status === 410) return null;   // stream compacted under us: start over
+  if (!res.ok) throw new Error("HTTP " + res.status);
+  return res.json();
+}
+
+function atBottom() {
+  return logDiv.scrollTop + logDiv.clientHeight >= logDiv.scrollHeight - ROW_HEIGHT;
+}
+
+function render() {
+  spacer.style.height = (log.lines.length * ROW_HEIGHT) + "px";
+  const first = Math.max(0, Math.floor(logDiv.scrollTop / ROW_HEIGHT) - OVERSCAN);
+  const last = Math.min(log.lines.length, Math.ceil((logDiv.scrollTop + logDiv.clientHeight) / ROW_HEIGHT) + OVERSCAN);
+  rows.style.transform = `translateY(${first * ROW_HEIGHT}px)`;
+  const frag = document.createDocumentFragment();
+  for (let i = first; i < last; i++) {
+    const row = document.createElement('div');
+    row.className = 'log-row';
+    row.textContent = log.lines[i];
+    row.title = log.lines[i];
+    frag.appendChild(row);
+  }
+  rows.replaceChildren(frag);
+}
+
+let renderQueued = false;
+function scheduleRender() {
+  if (renderQueued) return;
+  renderQueued = true;
+  requestAnimationFrame(() => {
+    renderQueued = false;
+    render();
+    if (logDiv.scrollTop < PAGE_SIZE * ROW_HEIGHT / 4) loadOlder();
+  });
+}
+
+async function resetLog() {
+  log.generation++;
+  const gen = log.generation;
+  log.source = document.getElementById('logSource').value;
+  log.lines = [];
+  log.older = log.newer = null;
+  log.loading = true;
+  status.textContent = "Loading memory log...";
+  render();
+  try {
+    const data = await fetchPage({});
+    if (gen !== log.generation) return;
+    if (data === null) throw new Error("stream changed, retry");
+    log.lines = data.entries.map(formatEntry);
+    log.older = data.older;
+    log.newer = data.newer;
+    status.textContent = "";
+    render();
+    logDiv.scrollTop = logDiv.scrollHeight;
+  } catch (err) {
+    if (gen === log.generation) status.textContent = "Error loading memory log: " + err;
+  } finally {
+    if (gen === log.generation) log.loading = false;
+  }
+}
+
+async function loadOlder() {
+  if (log.loading || !log.older) return;
+  const gen = log.generation;
+  log.loading = true;
+  try {
+    const data = await fetchPage({ before: log.older });
+    if (gen !== log.generation) return;
+    if (data === null) return resetLog();
+    const added = data.entries.map(formatEntry);
+    log.lines = added.concat(log.lines);
+    log.older = data.older;
+    // Keep the rows in view where they were
+    logDiv.scrollTop += added.length * ROW_HEIGHT;
+    render();
+  } catch (err) {
+    status.textContent = "Error loading older entries: " + err;
+  } finally {
+    if (gen === log.generation) log.loading = false;
+  }
+}
+
+async function loadNewer() {
+  if (log.newer === null) return resetLog();
+  const gen = log.generation;
+  const stick = atBottom();
+  try {
+    for (;;) {
+      const data = await fetchPage({ after: log.newer });
+      if (gen !== log.generation) return;
+      if (data === null) return resetLog();
+      log.lines = log.lines.concat(data.entries.map(formatEntry));
+      log.newer = data.newer;
+      if (data.count < PAGE_SIZE) break;
+    }
+    render();
+    if (stick) logDiv.scrollTop = logDiv.scrollHeight;
+  } catch (err) {
+    status.textContent = "Error refreshing memory log: " + err;
+  }
+}
+
+document.getElementById('send').onclick = async () => {
+  const message = document.getElementById('msg').value;
+  const persona = document.getElementById('persona').value;
+
+  if (!message.trim()) return;
+  status.textContent = "Sending...";
+
+  let endpoint = "cipher/chat";
+  if (persona === "vexis") {
+    endpoint = "vexis/chat";
+  }
+
+  try {
+    const res = await fetch(endpoint, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ user: 'Richard', message })
+    });
+    const data = await res.json();
+    document.getElementById('msg').value = "";
+    status.textContent = data.reply ? "[reply] " + data.reply : (data.error || "");
+    await loadNewer();
+  } catch (err) {
+    status.textContent = "Error sending chat: " + err;
+  }
+};
+
+logDiv.addEventListener('scroll', scheduleRender, { passive: true });
+window.addEventListener('resize', scheduleRender);
+document.getElementById('refresh').onclick = loadNewer;
+document.getElementById('logSource').onchange = resetLog;
+resetLog();